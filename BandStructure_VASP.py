@@ -7,18 +7,48 @@ from tkinter import StringVar, IntVar, DoubleVar, BooleanVar
 from tkinter import font as tkFont
 
 import json
+import hashlib
 import numpy as np
 import os
+import shutil
+import tempfile
 import datetime
 import re 
+import threading
+import multiprocessing
+import time
+import platform
+import tracemalloc
+import cProfile
+import pstats
+import io
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from Kpoints_new import K_points
 
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+try:
+    from contourpy import contour_generator
+except ImportError:
+    contour_generator = None
+
 import matplotlib.pyplot as plt
 from matplotlib.transforms import Affine2D
 from matplotlib.collections import LineCollection
 from matplotlib.collections import PathCollection
 from matplotlib.gridspec import GridSpec
 from matplotlib import cm
+from matplotlib.colors import to_rgba_array
 from matplotlib.backends.backend_tkagg import (FigureCanvasTkAgg, NavigationToolbar2Tk)
 from matplotlib.backend_bases import key_press_handler
 from matplotlib.figure import Figure
@@ -106,6 +136,189 @@ class Help:
         text.grid(row = 0, column = 0, padx = 10, pady = (30, 10))
 
 
+class Profiler:
+    """
+    Named timers and peak memory of the stages of loading and plotting
+    """
+
+    def __init__(self):
+        """
+        Stages are recorded in the order of their first call with the total and the last time, the number of calls,
+        and the largest peak memory of a call. Stages of worker threads are recorded as 'name (background)' with the
+        time only, because tracemalloc and cProfile follow the main thread
+        """
+        self.stages = {}
+        self.memory = False
+        self.profile = None
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+
+    @property
+    def stack(self):
+        """
+        Open stages of the calling thread
+        """
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+
+        return self.local.stack
+
+
+    def clear(self):
+        """
+        Remove all recorded stages and the cProfile statistics
+        """
+        with self.lock:
+            self.stages = {}
+        if self.profile is not None:
+            self.profile = cProfile.Profile()
+
+
+    def capture(self, memory=False, profile=False):
+        """
+        Choose what is recorded besides the time
+        Input:
+        ----------------------------
+        memory: Boolean
+            If True, the peak memory of each stage is traced with tracemalloc (slower)
+        profile: Boolean
+            If True, the outermost stages are profiled with cProfile
+        """
+        self.memory = memory
+        self.profile = cProfile.Profile() if profile else None
+
+
+    def snapshot(self):
+        """
+        Copy of the recorded stages, which worker threads may change at the same time
+        """
+        with self.lock:
+            return {name: dict(record) for name, record in self.stages.items()}
+
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Record time (and peak memory) of a stage, stages can be nested
+        Input:
+        ----------------------------
+        name: str
+            name of the stage
+        """
+        main = threading.current_thread() is threading.main_thread()
+        if not main:
+            name = '{} (background)'.format(name)
+
+        stack = self.stack
+        outermost = len(stack) == 0
+        tracing = main and self.memory and outermost and not tracemalloc.is_tracing()
+        profiling = main and self.profile is not None and outermost
+        measure = main and (tracing or tracemalloc.is_tracing())
+
+        if tracing:
+            tracemalloc.start()
+        if profiling:
+            self.profile.enable()
+
+        with self.lock:
+            self.stages.setdefault(name, {'time / s': 0., 'last / s': 0., 'calls': 0})
+
+        frame = {'start': 0, 'peak': 0}
+        if measure:
+            current, peak = tracemalloc.get_traced_memory()
+            # reset_peak drops the peak which the enclosing stage reached so far, so it is kept in its frame
+            if len(stack) > 0:
+                stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+            frame['start'] = current
+            tracemalloc.reset_peak()
+        stack.append(frame)
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            stack.pop()
+
+            memory = None
+            if measure and tracemalloc.is_tracing():
+                peak = max(tracemalloc.get_traced_memory()[1], frame['peak'])
+                memory = (peak - frame['start']) / 2**20
+                if len(stack) > 0:
+                    stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+
+            with self.lock:
+                record = self.stages.setdefault(name, {'time / s': 0., 'last / s': 0., 'calls': 0})
+                record['time / s'] += seconds
+                record['last / s'] = seconds
+                record['calls'] += 1
+                if memory is not None:
+                    record['peak memory / MB'] = max(memory, record.get('peak memory / MB', 0.))
+
+            if profiling:
+                self.profile.disable()
+            if tracing:
+                tracemalloc.stop()
+
+
+    def statistics(self, lines=25):
+        """
+        Functions with the largest cumulative time from cProfile
+        """
+        if self.profile is None:
+            return ''
+
+        stream = io.StringIO()
+        try:
+            pstats.Stats(self.profile, stream=stream).sort_stats('cumulative').print_stats(lines)
+        except TypeError:
+            return ''
+
+        return stream.getvalue()
+
+
+    def report(self):
+        """
+        Report of all stages with the versions of Python and NumPy
+        """
+        return {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'stages': self.snapshot(),
+        }
+
+
+    def text(self):
+        """
+        Table of the stages
+        """
+        lines = ['{:<28}{:>12}{:>12}{:>8}{:>18}'.format('Stage', 'Total / s', 'Last / s', 'Calls', 'Peak memory / MB')]
+        for name, record in self.snapshot().items():
+            memory = record.get('peak memory / MB')
+            lines.append('{:<28}{:>12.4f}{:>12.4f}{:>8}{:>18}'.format(name, record['time / s'], record['last / s'],
+                record['calls'], '-' if memory is None else '{:.1f}'.format(memory)))
+
+        return '\n'.join(lines)
+
+
+    def write(self, filename):
+        """
+        Write the report as JSON file
+        """
+        report = self.report()
+        if self.profile is not None:
+            report['cProfile'] = self.statistics()
+
+        with open(filename, 'w') as fil:
+            json.dump(report, fil, indent=2)
+
+
+profiler = Profiler()
+
+
 class Energy:
     """
     Get information and parameters from PROCAR files
@@ -136,6 +349,10 @@ class Energy:
             array of orbital DOS where orb is the number of different orbitals (s, p, d, f)
         DOS_element_new: ndarray, shape (M, N, Cmp), dtype=float
             array of elemental DOS summing up the same element where Cmp is the number of elements
+        orbitals: list, shape (orb)
+            names of the orbitals from the PROCAR header
+        index, kpath, breaks: list
+            set by Calculation and get_distance, empty until then
         """
         self.procar = procar
         self.kpts = kpoints
@@ -147,13 +364,29 @@ class Energy:
         self.DOS_elements = DOS_elements
         self.DOS_orbitals = DOS_orbitals
         self.DOS_element_new = DOS_element_new
+        self.orbitals = []
+        self.index = []; self.kpath = []; self.breaks = []
 
 
     def get_energies(self):
         """
         Get information from PROCAR file
         """
-        Input_pro = self.procar[1].split()
+        Nmb_kpts, Nmb_bands, Nmb_ions = self.read_header(self.procar[1])
+        self.orbitals = self.procar[7].split()[1:-1]
+
+        length = self.block_length(Nmb_bands, Nmb_ions)
+        data = self.parse_kpoints(self.procar[3:3 + Nmb_kpts * length], Nmb_bands, Nmb_ions, len(self.orbitals))
+
+        for key, value in data.items():
+            setattr(self, key, value)
+
+
+    def read_header(self, line):
+        """
+        Read number of kpoints, bands, and ions from the second line of a PROCAR file
+        """
+        Input_pro = line.split()
 
         if Input_pro[3] != "#":
             Nmb_kpts = int(Input_pro[3])
@@ -165,73 +398,273 @@ class Energy:
             Nmb_bands = int(Input_pro[6])
             Nmb_ions = int(Input_pro[10])
 
-        self.kpts = np.zeros(Nmb_kpts, dtype=int); self.coord = np.zeros((Nmb_kpts, 3), dtype=float)
-        self.weight = np.zeros(Nmb_kpts, dtype=float); self.energy = np.zeros((Nmb_bands, Nmb_kpts), dtype=float)
-        self.occ = np.zeros((Nmb_bands, Nmb_kpts), dtype=float); self.totDOS = np.zeros((Nmb_bands, Nmb_kpts), dtype=float)
-        self.DOS_elements = np.zeros((Nmb_bands, Nmb_kpts, Nmb_ions), dtype=float)
-        self.DOS_orbitals = np.zeros((Nmb_bands, Nmb_kpts, len(self.procar[7].split()) - 2), dtype=float)
+        return Nmb_kpts, Nmb_bands, Nmb_ions
+
+
+    def block_length(self, Nmb_bands, Nmb_ions):
+        """
+        Number of lines of one kpoint in a PROCAR file
+        """
+        return (Nmb_ions + 5) * Nmb_bands + 3
 
-        for i in range(int(Nmb_kpts)):
 
-            line = ((int(Nmb_ions) + 5) * int(Nmb_bands) + 5) * i + 3 - i * 2
-            self.kpts[i] = self.procar[line].split()[1]
+    def parse_kpoints(self, lines, Nmb_bands, Nmb_ions, Nmb_orb):
+        """
+        Parse complete kpoint blocks of a PROCAR file; all numbers of the ion lines are converted at once
+        Input:
+        -----------------------
+        lines: list
+            Lines of n kpoints, starting with the line of the first kpoint
+        Nmb_bands: int
+            number of bands
+        Nmb_ions: int
+            number of ions
+        Nmb_orb: int
+            number of orbitals
+        Output:
+        -----------------------
+        data: dictionary
+            kpts, coord, weight, energy, occ, totDOS, DOS_elements, DOS_orbitals of the n kpoints
+        """
+        length = self.block_length(Nmb_bands, Nmb_ions)
+        Nmb_kpts = len(lines) // length
+        blocks = np.array(lines[:Nmb_kpts * length], dtype=object).reshape(Nmb_kpts, length)
+
+        head = [re.findall(r'-?\d+\.\d+', x.split(':', 1)[1]) for x in blocks[:, 0]]
+        head = np.array(head, dtype=float).reshape(Nmb_kpts, 4)
+
+        band_rows = 2 + (Nmb_ions + 5) * np.arange(Nmb_bands)
+        band = np.array([x.split() for x in blocks[:, band_rows].ravel()], dtype=object).reshape(Nmb_kpts, Nmb_bands, -1)
+
+        ion_rows = (band_rows[:, None] + 3 + np.arange(Nmb_ions)).ravel()
+        ions = np.fromstring(' '.join(blocks[:, ion_rows].ravel()), dtype=float, sep=' ')
+        ions = ions.reshape(Nmb_kpts, Nmb_bands, Nmb_ions, Nmb_orb + 2)
+
+        total = np.fromstring(' '.join([x.split(None, 1)[1] for x in blocks[:, band_rows + 3 + Nmb_ions].ravel()]), dtype=float, sep=' ')
+        total = total.reshape(Nmb_kpts, Nmb_bands, Nmb_orb + 1)
+
+        return {
+            'kpts': np.array([x.split()[1] for x in blocks[:, 0]], dtype=int),
+            'coord': head[:, :3],
+            'weight': head[:, 3],
+            'energy': band[:, :, 4].astype(float).T.copy(),
+            'occ': band[:, :, 7].astype(float).T.copy(),
+            'totDOS': total[:, :, -1].T.copy(),
+            'DOS_elements': np.ascontiguousarray(ions[:, :, :, -1].transpose(1, 0, 2)),
+            'DOS_orbitals': np.ascontiguousarray(total[:, :, :-1].transpose(1, 0, 2)),
+        }
 
-            for xx in range(3):
-                self.coord[i][xx] = self.procar[line].split()[3 + xx]
 
-            self.weight[i] = self.procar[line].split()[8]
+    def stream(self, filename, budget):
+        """
+        Read a PROCAR file in chunks of kpoints, so the file is never loaded completely
+        Input:
+        -----------------------
+        filename: str
+            name of the PROCAR file
+        budget: float
+            memory budget of one chunk in MB
+        Output:
+        -----------------------
+        Generator of dictionaries from parse_kpoints
+        """
+        with open(filename) as fil:
+            header = [fil.readline() for i in range(3)]
+            Nmb_kpts, Nmb_bands, Nmb_ions = self.read_header(header[1])
+            length = self.block_length(Nmb_bands, Nmb_ions)
 
+            first = list(islice(fil, length))
+            self.orbitals = first[4].split()[1:-1]
+            Nmb_orb = len(self.orbitals)
 
-            for j in range(int(Nmb_bands)):
-                lines = (int(Nmb_ions) + 5) * j + 2 + line
-                self.energy[j][i] = self.procar[lines].split()[4]
-                self.occ[j][i] = self.procar[lines].split()[7]
-                self.totDOS[j][i] = self.procar[lines + 3 + int(Nmb_ions)].split()[len(self.procar[7].split()) - 1]
+            text = os.path.getsize(filename) / Nmb_kpts
+            arrays = 8 * Nmb_bands * (Nmb_ions * (Nmb_orb + 3) + Nmb_orb + 6)
+            chunk = max(1, int(budget * 2**20 / (4 * text + 2 * arrays)))
 
-                for k in range(int(Nmb_ions)):
-                    self.DOS_elements[j][i][k] = self.procar[lines + 3 + k].split()[-1]
-                for l in range(len(self.procar[7].split()) - 2):
-                    self.DOS_orbitals[j][i][l] = self.procar[lines + 3 + int(Nmb_ions)].split()[l + 1]
+            # only the kpoints of the first spin, as in get_energies
+            remaining = Nmb_kpts
+            lines = first + list(islice(fil, (min(chunk, remaining) - 1) * length))
+            while remaining > 0 and len(lines) >= length:
+                yield self.parse_kpoints(lines, Nmb_bands, Nmb_ions, Nmb_orb)
+                remaining -= len(lines) // length
+                lines = list(islice(fil, min(chunk, remaining) * length))
 
 
-    def get_band_gap(self):
+    def stream_band_gap(self, filename, budget):
         """
-        Get the band gap in eV
+        Get the band gap in eV by reading the PROCAR file in chunks
+        Input:
+        -----------------------
+        filename: str
+            name of the PROCAR file
+        budget: float
+            memory budget of one chunk in MB
         """
         VBM = -1000; CBM = 1000
-        for i in range(len(self.energy)):
+        for data in self.stream(filename, budget):
+            # kpoints without weight (e.g. the band path of a hybrid calculation) do not belong to the DOS mesh
+            mesh = data['weight'] > 0
+            Eg, vbm = self.band_edges(data['energy'][:, mesh], data['occ'][:, mesh])
+            VBM = max(VBM, vbm); CBM = min(CBM, vbm + Eg)
 
-            for k in range(len(self.energy[0])):
+        return CBM - VBM, VBM
 
-                if self.occ[i][k] > 0.01:
-                    if VBM < self.energy[i][k]:
-                        VBM = self.energy[i][k]
 
-                else:
-                    if CBM > self.energy[i][k]:
-                        CBM = self.energy[i][k]
+    def stream_DOS(self, filename, shift, minE, maxE, Eres, matrix, budget):
+        """
+        Accumulate the total, projected, and orbital DOS chunk by chunk, the chunks are dropped after binning
+        Input:
+        --------------------------
+        filename: str
+            name of the PROCAR file
+        shift: float
+            energy which is subtracted from all energies (valence band maximum)
+        minE, maxE, Eres: float
+            energy range and resolution in eV
+        matrix: shape (Ions, G)
+            Matrix from group_matrix to sum up the ions
+        budget: float
+            memory budget of one chunk in MB
+        Output:
+        --------------------------
+        partial: ndarray, shape (S, G), dtype=float
+            DOS of each group
+        orbital: ndarray, shape (S, orb), dtype=float
+            DOS of each orbital
+        """
+        total = 0; partial = 0; orbital = 0
+
+        for data in self.stream(filename, budget):
+            energy = data['energy'] - shift
+            Nmb_bands, Nmb_kpts, Nmb_ions = data['DOS_elements'].shape
+            groups = np.asarray(matrix.T @ data['DOS_elements'].reshape(-1, Nmb_ions).T).T.reshape(Nmb_bands, Nmb_kpts, -1)
+
+            self.energy_DOS, t = self.histogram(energy, data['weight'], data['totDOS'], minE, maxE, Eres)
+            total = total + t
+            partial = partial + self.histogram(energy, data['weight'], groups, minE, maxE, Eres)[1]
+            orbital = orbital + self.histogram(energy, data['weight'], data['DOS_orbitals'], minE, maxE, Eres)[1]
+
+        self.totDOS_DOS = total
+
+        return partial, orbital
+
+
+    def get_band_gap(self):
+        """
+        Get the band gap in eV
+        """
+        return self.band_edges(self.energy, self.occ)
+
+
+    def band_edges(self, energy, occ):
+        """
+        Get the band gap and the valence band maximum in eV from energies and occupations
+        """
+        occupied = np.asarray(occ) > 0.01
+        VBM = np.max(energy[occupied], initial=-1000)
+        CBM = np.min(energy[~occupied], initial=1000)
 
         return CBM - VBM, VBM
 
 
-    def tick_label(self, kpoint):
+    def tick_label(self, label):
         """
-        Write elements in LaTeX format
+        Write labels of high-symmetry points in LaTeX format
         """
-        if len(kpoint.split()[-1]) > 1:
-            return "${}$".format(kpoint.split()[-1])
+        if label.upper() == 'GAMMA':
+            label = '\\Gamma'
+
+        if len(label) > 1:
+            return "${}$".format(label)
         else:
-            return '{}'.format(kpoint.split()[-1])
+            return '{}'.format(label)
 
 
-    def get_distance(self, Kpoint_mesh, kpoints):
+    def reciprocal_vectors(self, contcar):
         """
-        Write the list of ticks and position of the ticks in the plot
+        Reciprocal lattice vectors of the lattice in a CONTCAR file
+        Input:
+        --------------------------
+        contcar: Lines from CONTCAR file
+        Output:
+        --------------------------
+        reciprocal: ndarray, shape (3, 3), dtype=float
+            reciprocal lattice vectors b1, b2, b3 (rows) in 1/Ang including 2 pi
+        """
+        scale = float(contcar[1].split()[0])
+        lattice = np.array([x.split()[:3] for x in contcar[2:5]], dtype=float)
+
+        if scale < 0:
+            scale = (-scale / abs(np.linalg.det(lattice)))**(1 / 3)
+
+        return 2 * np.pi * np.linalg.inv(scale * lattice).T
+
+
+    def kpoint_labels(self, kpoints, Nmb_kpts):
+        """
+        Labels of the kpoints from a KPOINTS file in line mode or with an explicit list of kpoints
         Input:
         --------------------------
-        Kpoint_mesh: list
-            List of number of kpoints between high-symmetry points
         kpoints: Lines from KPOINTS file
+        Nmb_kpts: int
+            number of kpoints in the PROCAR file
+        Output:
+        --------------------------
+        labels: list, shape (Nmb_kpts)
+            label of each kpoint, '' if the kpoint has no label
+        """
+        def label(line):
+            if '!' in line:
+                words = line.split('!')[-1].split()
+            else:
+                # the fourth column is a weight in explicit lists and may be the label in line mode
+                words = line.split()[3:]
+                if len(words) > 0 and re.fullmatch(r'[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?', words[0]):
+                    words = words[1:]
+            return words[-1] if len(words) > 0 else ''
+
+        labels = [''] * Nmb_kpts
+
+        if kpoints[2].strip()[:1].lower() == 'l':
+            Nmb_line = int(kpoints[1].split()[0])
+            ends = [label(x) for x in kpoints[4:] if len(x.split()) >= 3]
+
+            for s in range(len(ends) // 2):
+                for k, name in [(s * Nmb_line, ends[2 * s]), ((s + 1) * Nmb_line - 1, ends[2 * s + 1])]:
+                    if k < Nmb_kpts:
+                        labels[k] = name
+
+        else:
+            points = [x for x in kpoints[3:] if len(x.split()) >= 3]
+            for k in range(min(len(points), Nmb_kpts)):
+                labels[k] = label(points[k])
+
+        return labels
+
+
+    def coordinate_precision(self):
+        """
+        Rounding error of the kpoint coordinates (e.g. 5e-5 for a KPOINTS file with four decimals)
+        """
+        coord = np.asarray(self.coord, dtype=float)
+        for decimals in range(4, 9):
+            if np.all(np.abs(coord * 10**decimals - np.round(coord * 10**decimals)) < 1e-3):
+                return 0.5 * 10**-decimals
+
+        return 0.5e-8
+
+
+    def get_distance(self, reciprocal, labels):
+        """
+        Distances along the path in reciprocal space from the kpoint coordinates; the path is split at repeated
+        kpoints (junctions) and at discontinuous jumps, which have no distance. If the KPOINTS file has labels,
+        turns are only found at labelled kpoints and jumps only between two labelled kpoints
+        Input:
+        --------------------------
+        reciprocal: ndarray, shape (3, 3), dtype=float
+            reciprocal lattice vectors from reciprocal_vectors
+        labels: list, shape (N)
+            label of each kpoint from kpoint_labels
 
         Output:
         -------------------------
@@ -240,31 +673,150 @@ class Energy:
         distance: List
             List of distances between 0 and 1
         """
+        delta = np.diff(np.asarray(self.coord, dtype=float) @ reciprocal, axis=0)
+        step = np.linalg.norm(delta, axis=1)
+        repeat = step < 1e-5
+
+        # compare each step with the previous and the next step which is not a repeated point; rounded coordinates
+        # change the direction of a step by up to four times their rounding error
+        noise = 4 * self.coordinate_precision() * np.linalg.norm(reciprocal, axis=1).sum()
+        moving = np.flatnonzero(~repeat)
+        change = np.linalg.norm(np.diff(delta[moving], axis=0), axis=1) > 0.25 * np.maximum(step[moving][1:], step[moving][:-1]) + noise
+        jump = np.zeros(len(step), dtype=bool)
+        jump[moving[1:-1]] = change[:-1] & change[1:]
+
+        labelled = np.array([x != '' for x in labels])
+        if np.count_nonzero(labelled) >= 2:
+            jump &= labelled[:-1] & labelled[1:]
+            junction = repeat & labelled[:-1] & labelled[1:]
+        else:
+            junction = repeat
+
+        after_repeat = np.concatenate(([True], repeat[:-1] | jump[:-1]))
+        turn = np.zeros(len(step), dtype=bool)
+        turn[moving[1:]] = ~jump[moving[1:]] & ~jump[moving[:-1]] & ~after_repeat[moving[1:]]
+        turn[moving[1:]] &= labelled[moving[1:]] if np.count_nonzero(labelled) >= 2 else change
+
+        breaks = np.flatnonzero(junction | jump)
+
+        # each step is measured along the straight piece it belongs to, so rounded coordinates do not add length
+        starts = np.union1d(np.concatenate(([0], breaks + 1)), np.flatnonzero(turn))
+        ends = np.union1d(np.concatenate((breaks, [len(step)])), np.flatnonzero(turn))
+        index = np.arange(len(step))
+        cart = np.asarray(self.coord, dtype=float) @ reciprocal
+        chord = cart[ends[np.searchsorted(ends, index + 1)]] - cart[starts[np.searchsorted(starts, index, side='right') - 1]]
+        length = np.linalg.norm(chord, axis=1)
+        straight = length > 1e-5
+        step[straight] = np.einsum('ij,ij->i', delta[straight], chord[straight]) / length[straight]
+
+        step[jump | repeat] = 0
+        self.kpath = np.concatenate(([0], np.cumsum(step)))
+        total = self.kpath[-1] if self.kpath[-1] > 0 else 1.
+        self.kpts = self.kpath / total
+
+        self.breaks = breaks + 1
+
+        positions = [(0, labels[0], '')]
+        positions += [(k, labels[k], '') for k in np.flatnonzero(turn)]
+        positions += [(k, labels[k], labels[k + 1]) for k in breaks]
+        positions.sort()
+        positions.append((len(self.kpath) - 1, labels[-1], ''))
+
+        ticks = []
+        for k, first, second in positions:
+            if second == '' or second == first:
+                ticks.append(self.tick_label(first))
+            elif first == '':
+                ticks.append(self.tick_label(second))
+            else:
+                ticks.append('{}$\\mid$ {}'.format(self.tick_label(first), self.tick_label(second)))
+
+        distance = [self.kpts[k] for k, first, second in positions]
+
+        return ticks, distance
+
+
+    def append(self, data):
+        """
+        Append the arrays of new kpoints
+        Input:
+        ----------------------------
+        data: dictionary
+            arrays from parse_kpoints (and DOS_element_new), kpoints are the first axis of kpts, coord, and weight
+            and the second axis of all other arrays
+        """
+        for key, value in data.items():
+            axis = 0 if key in ['kpts', 'coord', 'weight', 'index'] else 1
+
+            if getattr(self, key, None) is None or len(getattr(self, key)) == 0:
+                setattr(self, key, np.asarray(value))
+            else:
+                setattr(self, key, np.concatenate((getattr(self, key), value), axis=axis))
 
-        ticks = []; distance_new = [0]
-        for i in range(len(Kpoint_mesh)):
 
-            distance_new.append(Kpoint_mesh[i] + distance_new[-1])
+    def select(self, mask):
+        """
+        Arrays of the chosen kpoints
+        Input:
+        ----------------------------
+        mask: ndarray, shape (N), dtype=bool
+            True for each kpoint which is kept
+        Output:
+        ----------------------------
+        data: dictionary
+            arrays of the chosen kpoints
+        """
+        Nmb_kpts = len(mask); data = {}
 
-        ticks.append(self.tick_label(kpoints[3]))
+        for key in ['kpts', 'coord', 'weight', 'index', 'kpath']:
+            value = getattr(self, key, None)
+            if value is not None and len(value) == Nmb_kpts:
+                data[key] = np.asarray(value)[mask]
 
-        for k in range(4, len(kpoints)):
+        for key in ['energy', 'occ', 'totDOS', 'DOS_elements', 'DOS_orbitals', 'DOS_element_new']:
+            value = getattr(self, key, None)
+            if value is not None and np.ndim(value) >= 2:
+                data[key] = np.asarray(value)[:, mask]
 
-            if len(kpoints[k].split()) < 1 and k + 1 != len(kpoints):
+        return data
 
-                if kpoints[k - 1].split()[-1] == kpoints[k + 1].split()[-1]:
-                    ticks.append(self.tick_label(kpoints[k - 1]))
 
-                else:
-                    ticks.append('{}$\\mid$ {}'.format(self.tick_label(kpoints[k -1]), self.tick_label(kpoints[k + 1])))
+    def subset(self, mask):
+        """
+        New Energy with the chosen kpoints, e.g. the weighted kpoints for the DOS
+        Input:
+        ----------------------------
+        mask: ndarray, shape (N), dtype=bool
+            True for each kpoint which is kept
+        """
+        new = Energy(None)
+        new.orbitals = self.orbitals
 
-            elif k + 1 == len(kpoints):
-                ticks.append(self.tick_label(kpoints[k - 1]))
+        for key, value in self.select(mask).items():
+            setattr(new, key, value)
 
-        distance = [x / distance_new[-1] for x in distance_new]
-        self.kpts = [x / distance_new[-1] for x in self.kpts]
+        return new
 
-        return ticks, distance
+
+    def collapse_repeats(self):
+        """
+        Remove the second of two repeated kpoints at a junction if both have the same energies,
+        the next path starts at the remaining kpoint
+        """
+        same = np.all(np.abs(np.diff(self.coord, axis=0)) < 1e-6, axis=1)
+        same &= np.all(np.abs(np.diff(self.energy, axis=1)) < 1e-4, axis=0)
+
+        if not np.any(same):
+            return
+
+        keep = np.concatenate(([True], ~same))
+        position = np.cumsum(keep) - 1
+        breaks = position[self.breaks]
+
+        for key, value in self.select(keep).items():
+            setattr(self, key, value)
+
+        self.breaks = np.unique(breaks)
 
 
     def element_DOS(self, contcar):
@@ -274,16 +826,60 @@ class Energy:
         ----------------------------
         contcar: CONTCAR file includes a list and order of the ions
         """
+        self.project(self.group_matrix(self.species_groups(contcar)))
+
+
+    def species_groups(self, contcar):
+        """
+        Ion indices of each element in the order of the CONTCAR file
+        Input:
+        ----------------------------
+        contcar: CONTCAR file includes a list and order of the ions
+        Output:
+        ----------------------------
+        groups: list
+            List of arrays of ion indices (starting at 0), one for each element
+        """
         Nmb_Cmp = np.array(contcar[6].split(), dtype=int)
-        self.DOS_element_new = np.zeros((len(self.DOS_elements), len(self.DOS_elements[0]), len(Nmb_Cmp)), dtype=float)
+        bounds = np.concatenate(([0], np.cumsum(Nmb_Cmp)))
+
+        return [np.arange(bounds[c], bounds[c + 1]) for c in range(len(Nmb_Cmp))]
+
+
+    def group_matrix(self, groups):
+        """
+        Sparse matrix (dense if scipy is not installed) which sums up the ions of each group
+        Input:
+        ----------------------------
+        groups: list, shape (G)
+            List of ion indices (starting at 0) for each group; an ion can be part of several groups
+        Output:
+        ----------------------------
+        matrix: shape (Ions, G)
+        """
+        Nmb_ions = np.shape(self.DOS_elements)[-1]
+        rows = np.concatenate([np.asarray(g, dtype=int) for g in groups] + [np.zeros(0, dtype=int)])
+        columns = np.repeat(np.arange(len(groups)), [len(g) for g in groups])
+
+        if sparse is not None:
+            return sparse.csr_matrix((np.ones(len(rows)), (rows, columns)), shape=(Nmb_ions, len(groups)))
+
+        matrix = np.zeros((Nmb_ions, len(groups)))
+        np.add.at(matrix, (rows, columns), 1.)
+        return matrix
 
-        for i in range(len(self.DOS_elements)):
-            for j in range(len(self.DOS_elements[i])):
-                counter = 0
-                for c in range(len(Nmb_Cmp)):
-                    for k in range(Nmb_Cmp[c]):
-                        self.DOS_element_new[i][j][c] += self.DOS_elements[i][j][counter]
-                        counter += 1
+
+    def project(self, matrix):
+        """
+        Sum up the elemental DOS of the ions for each group with one matrix product
+        Input:
+        ----------------------------
+        matrix: shape (Ions, G)
+            Matrix from group_matrix
+        """
+        Nmb_bands, Nmb_kpts, Nmb_ions = np.shape(self.DOS_elements)
+        flat = np.reshape(self.DOS_elements, (-1, Nmb_ions))
+        self.DOS_element_new = np.asarray(matrix.T @ flat.T).T.reshape(Nmb_bands, Nmb_kpts, -1)
 
 
     def sum_partial_DOS(self, totalDOS, minE, maxE, Eres):
@@ -291,54 +887,2067 @@ class Energy:
         Get partial DOS over the entire Brillouin zone
         Input:
         --------------------------
-        totalDOS: ndarray, shape (M, N), dtype=float
-            total DOS (elemental, orbital) for M bands and N kpoints
+        totalDOS: ndarray, shape (M, N) or (M, N, C), dtype=float
+            total DOS (elemental, orbital) for M bands and N kpoints (and C elements or orbitals)
         minE: float
             minimum energy in eV
         maxE: float
             maximum energy in eV
         Eres: float
             stepsize to solve
+        Output:
+        --------------------------
+        Energy_DOS: ndarray, shape (S), dtype=float
+            center of each energy step
+        TOTAL_DOS: ndarray, shape (S) or (S, C), dtype=float
+            DOS of each energy step
+        """
+        return self.histogram(self.energy, self.weight, totalDOS, minE, maxE, Eres)
+
+
+    def histogram(self, energy, weight, values, minE, maxE, Eres):
+        """
+        Sum up weighted values in energy steps
+        Input:
+        --------------------------
+        energy: ndarray, shape (M, N), dtype=float
+            energies of M bands and N kpoints
+        weight: ndarray, shape (N), dtype=float
+            weight of each kpoint
+        values: ndarray, shape (M, N) or (M, N, C), dtype=float
+            values to sum up for each band and kpoint
+        minE, maxE, Eres: float
+            energy range and resolution in eV
+        Output:
+        --------------------------
+        Energy_DOS: ndarray, shape (S), dtype=float
+            center of each energy step
+        TOTAL_DOS: ndarray, shape (S) or (S, C), dtype=float
+            sum of each energy step
         """
         steps = int((maxE - minE) / Eres)
-        Energy_DOS = np.zeros(steps, dtype=float); TOTAL_DOS = np.zeros_like(Energy_DOS)
+        Energy_DOS = minE + np.arange(steps) * Eres + 0.001
 
-        for i in range(steps):
-            Energy_DOS[i] = minE + i * Eres + 0.001
+        values = np.asarray(values, dtype=float)
+        channels = values.shape[2:]
+        index = np.floor((energy - (minE + 0.001 - 0.5 * Eres)) / Eres).astype(int)
+        valid = (index >= 0) & (index < steps)
 
-            for j in range(len(self.energy)):
-                for k in range(len(self.energy[0])):
-                    if  Energy_DOS[i] -0.5 * Eres < self.energy[j][k] < Energy_DOS[i] + 0.5 * Eres:
-                        TOTAL_DOS[i] += totalDOS[j][k] * self.weight[k]
+        weight = np.reshape(weight, (1, -1) + (1,) * (values.ndim - 2))
+        values = (values * weight)[valid].reshape(np.count_nonzero(valid), int(np.prod(channels)))
 
-        return Energy_DOS, TOTAL_DOS
+        TOTAL_DOS = np.stack([np.bincount(index[valid], weights=values[:, c], minlength=steps) for c in range(values.shape[1])], axis=-1)
 
+        return Energy_DOS, TOTAL_DOS.reshape((steps,) + channels)
 
-class EntryItem:
+
+    def joint_DOS(self, maxE, Eres, projections=None, threshold=0.1, budget=64., Nmb_lowest=10):
+        """
+        Joint DOS of the transitions from occupied to unoccupied states at the same kpoint; the band pairs are
+        processed in chunks so the memory stays bounded for many bands
+        Input:
+        --------------------------
+        maxE: float
+            maximum transition energy in eV
+        Eres: float
+            stepsize in eV
+        projections: ndarray, shape (M, N, C), dtype=float
+            If given, each transition is weighted by the overlap of the normalized projections of both states
+        threshold: float
+            minimum overlap of an allowed transition for the list of the lowest transitions
+        budget: float
+            memory budget of one chunk of band pairs in MB
+        Nmb_lowest: int
+            number of the lowest transitions
+        Output:
+        --------------------------
+        result: dictionary
+            energy (S) and JDOS (S) in 1/eV per cell, direct_gap (N) of each kpoint, gap_distribution (S) in 1/eV,
+            and lowest: list of (transition energy, kpoint, occupied band, unoccupied band, overlap) counted from 1
+        """
+        energy = np.asarray(self.energy, dtype=float)
+        occ = np.asarray(self.occ, dtype=float)
+        weight = np.asarray(self.weight, dtype=float) / np.sum(self.weight)
+        Nmb_bands, Nmb_kpts = energy.shape
+
+        # occupation between 0 and 1 (PROCAR writes 1 or 2 per band without spin polarization)
+        filling = np.clip(occ / max(np.max(occ), 1e-12), 0, 1) * (occ > 0.01)
+        valence = np.flatnonzero(np.any(filling > 0, axis=1))
+        conduction = np.flatnonzero(np.any(filling < 1, axis=1))
+
+        if projections is not None:
+            projections = np.asarray(projections, dtype=float)
+            norm = np.linalg.norm(projections, axis=-1, keepdims=True)
+            projections = np.divide(projections, norm, out=np.zeros_like(projections), where=norm > 0)
+
+        steps = int(np.ceil(maxE / Eres))
+        JDOS = np.zeros(steps)
+        lowest = np.zeros((0, 5))
+
+        chunk = max(int(np.sqrt(budget * 2**20 / (8 * 6 * Nmb_kpts))), 1)
+        top = np.max(np.where(filling > 0, energy, -np.inf), axis=1)
+        bottom = np.min(np.where(filling < 1, energy, np.inf), axis=1)
+
+        for i in range(0, len(valence), chunk):
+            v = valence[i:i + chunk]
+            for j in range(0, len(conduction), chunk):
+                c = conduction[j:j + chunk]
+                if bottom[c].min() - top[v].max() >= maxE:
+                    continue
+
+                delta = energy[c][None, :, :] - energy[v][:, None, :]
+                strength = filling[v][:, None, :] * (1 - filling[c])[None, :, :]
+                if projections is not None:
+                    overlap = np.einsum('vkx,ckx->vck', projections[v], projections[c])
+                else:
+                    overlap = np.ones_like(delta)
+
+                valid = (delta > 0) & (delta < maxE) & (strength > 0)
+                index = (delta[valid] / Eres).astype(int)
+                JDOS += np.bincount(index, weights=(strength * overlap * weight)[valid], minlength=steps)[:steps]
+
+                # candidates of the lowest allowed transitions
+                allowed = np.flatnonzero(valid & (overlap >= threshold))
+                if len(allowed) > Nmb_lowest:
+                    allowed = allowed[np.argpartition(delta.ravel()[allowed], Nmb_lowest)[:Nmb_lowest]]
+                a, b, k = np.unravel_index(allowed, delta.shape)
+                lowest = np.concatenate((lowest, np.column_stack([delta[a, b, k], k, v[a], c[b], overlap[a, b, k]])))
+                lowest = lowest[np.argsort(lowest[:, 0], kind='stable')[:Nmb_lowest]]
+
+        # smallest transition energy at each kpoint
+        direct_gap = np.min(np.where(filling < 1, energy, np.inf), axis=0) - np.max(np.where(filling > 0, energy, -np.inf), axis=0)
+        inside = np.isfinite(direct_gap) & (direct_gap >= 0) & (direct_gap < maxE)
+        gap_distribution = np.bincount((direct_gap[inside] / Eres).astype(int), weights=weight[inside], minlength=steps)[:steps]
+
+        return {
+            'energy': (np.arange(steps) + 0.5) * Eres, 'JDOS': JDOS / Eres, 'direct_gap': direct_gap,
+            'gap_distribution': gap_distribution / Eres,
+            'lowest': [(float(e), int(k) + 1, int(vb) + 1, int(cb) + 1, float(o)) for e, k, vb, cb, o in lowest],
+        }
+
+
+    def segments(self, distance):
+        """
+        Straight segments of the path between high-symmetry points
+        Input:
+        --------------------------
+        distance: list
+            positions of the ticks from get_distance
+        Output:
+        --------------------------
+        segments: list
+            List of (first, last) kpoint index of each segment; a turn or a junction belongs to both segments
+        """
+        kpts = np.asarray(self.kpts, dtype=float)
+        turns = np.flatnonzero(np.any(np.isclose(kpts[:, None], np.asarray(distance, dtype=float)[None, :], atol=1e-9), axis=1))
+        boundaries = np.union1d(turns, np.asarray(self.breaks, dtype=int))
+        boundaries = boundaries[(boundaries > 0) & (boundaries < len(kpts) - 1)]
+
+        segments = []; first = 0
+        for b in boundaries:
+            # a jump has no length, the segment before ends at the previous kpoint
+            last = b - 1 if self.kpath[b] == self.kpath[b - 1] else b
+            if last > first:
+                segments.append((int(first), int(last)))
+            first = b
+        if len(kpts) - 1 > first:
+            segments.append((int(first), len(kpts) - 1))
+
+        return segments
+
+
+    def effective_masses(self, segments, window=0.3, points=4, energy_range=0.1):
+        """
+        Fit parabolas to all maxima of the valence bands and minima of the conduction bands near the band edges along
+        each segment; all windows are fitted with one batched least-squares solve
+        Input:
+        --------------------------
+        segments: list
+            List of (first, last) kpoint index from segments
+        window: float
+            maximum distance of an extremum from the band edge in eV
+        points: int
+            maximum number of kpoints on each side of an extremum
+        energy_range: float
+            maximum energy difference of a fitted kpoint from the extremum in eV
+        Output:
+        --------------------------
+        masses: dictionary
+            arrays of band (from 0), carrier (+1 electron, -1 hole), segment, kpoint, energy (fit at the extremum in eV),
+            slope, curvature (in eV Ang^2), mass (m*/m_e = 3.80998 / curvature), Nmb_points, lower and upper bound
+            of the fit window along kpath (1/Ang)
+        """
+        energy = np.asarray(self.energy, dtype=float)
+        kpath = np.asarray(self.kpath, dtype=float)
+        valence = np.mean(np.asarray(self.occ) > 0.01, axis=1) > 0.5
+        VBM = np.max(energy[valence], initial=-np.inf)
+        CBM = np.min(energy[~valence], initial=np.inf)
+
+        offsets = np.arange(-points, points + 1)
+        candidates = []
+        segments = segments or [(0, energy.shape[1] - 1)]
+
+        for s, (first, last) in enumerate(segments):
+            E = energy[:, first:last + 1]
+            # neighbours at the ends of a segment are the kpoint itself
+            left = np.concatenate((E[:, :1], E[:, :-1]), axis=1); right = np.concatenate((E[:, 1:], E[:, -1:]), axis=1)
+            maximum = (E >= left) & (E >= right) & valence[:, None] & (E >= VBM - window)
+            minimum = (E <= left) & (E <= right) & ~valence[:, None] & (E <= CBM + window)
+
+            for carrier, found in [(-1, maximum), (1, minimum)]:
+                band, k = np.nonzero(found)
+                index = k[:, None] + offsets[None, :]
+                inside = (index >= 0) & (index <= last - first)
+                index = np.clip(index, 0, last - first) + first
+                candidates.append((band, k + first, index, inside, np.full(len(band), carrier), np.full(len(band), s)))
+
+        band, k, index, inside, carrier, segment = [np.concatenate(x) for x in zip(*candidates)]
+        x = kpath[index] - kpath[k][:, None]
+        y = energy[band[:, None], index]
+        mask = inside & (np.abs(y - energy[band, k][:, None]) <= energy_range)
+        # kpoints of a plateau with the same energy count once
+        mask &= np.concatenate((np.ones((len(x), 1), dtype=bool), np.diff(x, axis=1) != 0), axis=1)
+
+        enough = mask.sum(axis=1) >= 3
+        x, y, mask = x[enough], y[enough], mask[enough]
+        band, k, carrier, segment = band[enough], k[enough], carrier[enough], segment[enough]
+        if len(band) == 0:
+            return {key: np.zeros(0) for key in ['band', 'carrier', 'segment', 'kpoint', 'energy', 'slope', 'curvature', 'mass',
+                'Nmb_points', 'lower', 'upper']}
+
+        design = np.stack([np.ones_like(x), x, x**2], axis=-1) * mask[..., None]
+        normal = np.einsum('cwi,cwj->cij', design, design)
+        rhs = np.einsum('cwi,cw->ci', design, y)
+        a, b, c = np.linalg.solve(normal, rhs[..., None])[..., 0].T
+
+        return {
+            'band': band, 'carrier': carrier, 'segment': segment, 'kpoint': k, 'energy': a, 'slope': b, 'curvature': c,
+            'mass': np.divide(3.80998, c, out=np.full_like(c, np.inf), where=c != 0), 'Nmb_points': mask.sum(axis=1),
+            'lower': kpath[k] + np.min(np.where(mask, x, np.inf), axis=1), 'upper': kpath[k] + np.max(np.where(mask, x, -np.inf), axis=1),
+        }
+
+
+class ProcarWatcher:
     """
-    Combine different tkinter items with Label items
+    Follow a PROCAR file which is still written by VASP; only the appended bytes are read and parsed
     """
 
-    def __init__(self, parent, name, row = 0, column = 1, padx = 10, pady = 6, width = 20, columnspan = 1, state = NORMAL, ipadx = 0, options = ['0']):
+    def __init__(self, filename):
         """
-        Combine Entry/Menu items with Label items
         Input:
-        -------------------------------------
-        parent: class
-        name: str
-            Name of the Label
-        row: int
-            number of row
-        column: int
-            number of column
-        padx: int
-            space in x-direction of grid
-        pady: int
-            space in y-direction of grid
-        width: int
-            width of the Entry
-        columnspan: int
-            column span of Entry and Label
+        ----------------------------
+        filename: str
+            name of the PROCAR file
+        """
+        self.filename = filename
+        self.offset = 0
+        self.rest = b''
+        self.lines = []
+        self.header = None
+        self.orbitals = []
+        self.Nmb_read = 0
+        self.reader = Energy(None)
+
+
+    def changed(self):
+        """
+        True if the file has grown since the last poll; only the size of the file is checked
+        """
+        return os.path.isfile(self.filename) and os.path.getsize(self.filename) > self.offset
+
+
+    def complete(self):
+        """
+        True if all kpoints given in the header are parsed
+        """
+        return self.header is not None and self.Nmb_read >= self.header[0]
+
+
+    def poll(self):
+        """
+        Read the bytes appended since the last poll and parse the new complete kpoint blocks,
+        incomplete lines and blocks are kept for the next poll
+        Output:
+        ----------------------------
+        data: dictionary or None
+            arrays of the new kpoints from parse_kpoints, None if no kpoint was completed
+        """
+        if not self.changed():
+            return None
+
+        with open(self.filename, 'rb') as fil:
+            fil.seek(self.offset)
+            new = fil.read()
+
+        self.offset += len(new)
+        new = self.rest + new
+        cut = new.rfind(b'\n') + 1
+        self.rest = new[cut:]
+        self.lines += new[:cut].decode().splitlines(True)
+
+        if self.header is None:
+            if len(self.lines) < 8:
+                return None
+
+            self.header = self.reader.read_header(self.lines[1])
+            self.orbitals = self.lines[7].split()[1:-1]
+            del self.lines[:3]
+
+        Nmb_kpts, Nmb_bands, Nmb_ions = self.header
+        length = self.reader.block_length(Nmb_bands, Nmb_ions)
+        Nmb_new = min(len(self.lines) // length, Nmb_kpts - self.Nmb_read)
+
+        if Nmb_new < 1:
+            return None
+
+        data = self.reader.parse_kpoints(self.lines[:Nmb_new * length], Nmb_bands, Nmb_ions, len(self.orbitals))
+        del self.lines[:Nmb_new * length]
+        self.Nmb_read += Nmb_new
+
+        return data
+
+
+def fingerprint(foldername):
+    """
+    Fingerprint of a calculation from the path, size, and modification time of its VASP files
+    """
+    if not set(Calculation.required_files).issubset(set(os.listdir(foldername))):
+        raise ValueError('{} does not include {}'.format(foldername, ', '.join(Calculation.required_files)))
+
+    digest = hashlib.sha256(os.path.realpath(foldername).encode())
+    for name in ['CONTCAR', 'KPOINTS', 'PROCAR_band', 'PROCAR_DOS']:
+        if os.path.isfile(os.path.join(foldername, name)):
+            stat = os.stat(os.path.join(foldername, name))
+            digest.update('{} {} {}'.format(name, stat.st_size, stat.st_mtime_ns).encode())
+
+    return digest.hexdigest()
+
+
+class Calculation:
+    """
+    Load the electronic properties of one VASP calculation without the graphical user interface
+    """
+
+    required_files = ['CONTCAR', 'KPOINTS', 'PROCAR_band']
+
+    def __init__(self, foldername, list_energy, stream=False, budget=1024., projection_groups=list(), watch=False):
+        """
+        Folder needs to include CONTCAR, KPOINTS, and PROCAR_band files; without PROCAR_DOS the weighted kpoints of PROCAR_band are used for the DOS if the path kpoints have zero weight (hybrid functionals)
+        Input:
+        -----------------------
+        foldername: str
+            folder of the calculation
+        list_energy: list, shape (3)
+            minimum energy, maximum energy, and resolution in eV
+        stream: Boolean
+            If True, PROCAR_DOS is read in chunks (default is False)
+        budget: float
+            memory budget of one chunk in MB
+        projection_groups: list
+            List of (name, array of ion indices starting at 0); the elements are used if empty
+        watch: Boolean
+            If True, PROCAR_band is still written and followed by a ProcarWatcher (default is False)
+        """
+        self.foldername = foldername
+        self.watch = watch
+        self.name = os.path.basename(os.path.normpath(foldername))
+        self.list_energy = list_energy
+        self.stream = stream
+        self.budget = budget
+        self.projection_groups = projection_groups
+
+
+    def load(self):
+        """
+        Load the electronic properties from PROCAR_band and PROCAR_DOS and compute the DOS over the entire Brillouin zone
+        """
+        with profiler.stage('load'):
+            with profiler.stage('parse PROCAR'):
+                self.get_energies()
+            with profiler.stage('k-path'):
+                self.get_kpoints()
+            with profiler.stage('projection (element_DOS)'):
+                self.sum_DOS_elements()
+            with profiler.stage('DOS (sum_partial_DOS)'):
+                self.sum_DOS()
+
+            with profiler.stage('get_contribution'):
+                self.contrib = self.get_contribution(self.Band.energy, self.Band.DOS_element_new)
+                self.contrib_orbital = self.get_contribution(self.Band.energy, self.Band.DOS_orbitals)
+
+        return self
+
+
+    def compact(self):
+        """
+        Remove the arrays of each ion and kpoint which are not needed to plot bands and DOS
+        """
+        for data in [self.Band, self.DOS]:
+            data.DOS_elements = None; data.DOS_element_new = None
+            data.DOS_orbitals = None; data.totDOS = None
+
+        self.contrib = None; self.contrib_orbital = None
+
+        return self
+
+
+    session_arrays = {
+        'Band': ['kpts', 'kpath', 'coord', 'weight', 'index', 'breaks', 'energy', 'occ', 'totDOS', 'DOS_elements', 'DOS_orbitals',
+            'DOS_element_new'],
+        'DOS': ['coord', 'weight', 'energy', 'occ', 'totDOS', 'DOS_elements', 'DOS_orbitals', 'DOS_element_new', 'energy_DOS', 'totDOS_DOS'],
+        'calc': ['Energy_DOS', 'partial_DOS', 'orbital_DOS', 'contrib', 'contrib_orbital', 'reciprocal'],
+    }
+
+    def save(self, session):
+        """
+        Save all arrays as .npy files (which are memory-mapped when the session is opened) into a session folder
+        Input:
+        ---------------------------
+        session: str
+            session folder
+        Output:
+        ---------------------------
+        info: dictionary
+            everything else needed to restore the calculation
+        """
+        os.makedirs(session, exist_ok=True)
+        arrays = []
+
+        for owner, keys in self.session_arrays.items():
+            data = self if owner == 'calc' else getattr(self, owner)
+            for key in keys:
+                value = getattr(data, key, None)
+                if value is not None:
+                    np.save('{}/{}_{}.npy'.format(session, owner, key), np.asarray(value))
+                    arrays.append('{}_{}'.format(owner, key))
+
+        return {
+            'arrays': arrays,
+            'foldername': self.foldername, 'list_energy': self.list_energy, 'stream': self.stream, 'budget': self.budget,
+            'projection_groups': [[name, np.asarray(ions).tolist()] for name, ions in self.projection_groups],
+            'VBM': float(self.VBM), 'ticks': list(self.ticks), 'distance': np.asarray(self.distance, dtype=float).tolist(),
+            'cmp': list(self.cmp), 'species': list(self.species), 'species_ions': [np.asarray(x).tolist() for x in self.species_ions],
+            'orbitals': list(self.Band.orbitals), 'orbitals_DOS': list(self.DOS.orbitals), 'DOS_streamed': bool(self.DOS_streamed),
+            'band_subset': bool(self.band_subset), 'kpoint_lines': list(self.kpoint_lines),
+        }
+
+
+    def restore(self, session, info):
+        """
+        Restore a calculation from a session folder without reading the PROCAR files
+        Input:
+        ---------------------------
+        session: str
+            session folder
+        info: dictionary
+            output of save
+        """
+        self.Band = Energy(None); self.DOS = Energy(None)
+        arrays = info.get('arrays')
+
+        for owner, keys in self.session_arrays.items():
+            data = self if owner == 'calc' else getattr(self, owner)
+            for key in keys:
+                filename = '{}/{}_{}.npy'.format(session, owner, key)
+                if os.path.isfile(filename):
+                    setattr(data, key, np.load(filename, mmap_mode='r'))
+                elif arrays is not None and '{}_{}'.format(owner, key) in arrays:
+                    raise FileNotFoundError('{} is missing in the session'.format(filename))
+
+        for key in ['VBM', 'ticks', 'distance', 'cmp', 'species', 'DOS_streamed', 'band_subset', 'kpoint_lines']:
+            setattr(self, key, info[key])
+
+        self.species_ions = [np.array(x, dtype=int) for x in info['species_ions']]
+        self.Band.orbitals = info['orbitals']; self.DOS.orbitals = info['orbitals_DOS']
+        self.partial_DOS = list(getattr(self, 'partial_DOS', list()))
+        self.orbital_DOS = list(getattr(self, 'orbital_DOS', list()))
+
+        if np.ndim(self.Band.DOS_elements) == 3:
+            self.projection_matrix = self.Band.group_matrix([ions for name, ions in self.projection_groups] or self.species_ions)
+
+        self.masses = self.effective_masses()
+
+        return self
+
+
+    def get_energies(self):
+        """
+        Get information from PROCAR_DOS and PROCAR_band files; remove the valence band maximum from the energies
+        """
+
+        self.DOS_streamed = self.stream and os.path.isfile(self.foldername + "/PROCAR_DOS")
+
+        if self.watch:
+            self.watcher = ProcarWatcher(self.foldername + "/PROCAR_band")
+            data = self.watcher.poll()
+
+            if data is None:
+                raise ValueError('PROCAR_band does not include a complete kpoint yet')
+
+            self.Band = Energy(None)
+            self.Band.orbitals = self.watcher.orbitals
+            self.Band.append(data)
+
+        else:
+            with open(self.foldername +"/PROCAR_band") as pro_band:
+                procar_band = pro_band.readlines()
+
+            self.Band = Energy(procar_band)
+            self.Band.get_energies()
+
+        self.Band.index = np.asarray(self.Band.kpts, dtype=int) - 1
+
+        # band runs with hybrid functionals include the weighted kpoints of the self-consistent mesh
+        weight = np.asarray(self.Band.weight)
+        self.band_subset = np.any(weight == 0) and np.any(weight > 0)
+
+        if self.DOS_streamed:
+            self.DOS = Energy(None)
+            Eg, VBM = self.DOS.stream_band_gap(self.foldername + "/PROCAR_DOS", self.budget)
+
+        else:
+            if os.path.isfile(self.foldername + "/PROCAR_DOS"):
+                with open(self.foldername +"/PROCAR_DOS") as pro_DOS:
+                    procar_DOS = pro_DOS.readlines()
+
+                self.DOS = Energy(procar_DOS)
+                self.DOS.get_energies()
+
+            elif self.band_subset:
+                self.DOS = self.Band
+
+            else:
+                # in line mode all kpoints of the path have a weight, which is no sampling of the Brillouin zone
+                raise ValueError('PROCAR_DOS is missing and PROCAR_band has no separate weighted kpoint mesh for the DOS')
+
+            self.DOS = self.DOS.subset(np.asarray(self.DOS.weight) > 0)
+
+            Eg, VBM = self.DOS.get_band_gap()
+            self.DOS.energy -= VBM
+
+        if self.band_subset:
+            self.Band = self.Band.subset(weight == 0)
+
+        self.Band.procar = None; self.DOS.procar = None
+
+        self.VBM = VBM
+        self.Band.energy -= VBM
+
+
+    def update_band(self):
+        """
+        Append the kpoints which VASP has written to PROCAR_band since the last update
+        Output:
+        ---------------------------
+        Boolean: True if new kpoints were added
+        """
+        data = self.watcher.poll()
+
+        if data is None:
+            return False
+
+        new = Energy(None)
+        new.append(data)
+        new.index = np.asarray(new.kpts, dtype=int) - 1
+
+        if self.band_subset:
+            new = new.subset(new.weight == 0)
+
+            if len(new.weight) == 0:
+                return False
+
+        new.energy -= self.VBM
+        new.project(self.projection_matrix)
+
+        self.Band.append({key: getattr(new, key) for key in list(data) + ['index', 'DOS_element_new']})
+        self.contrib = np.concatenate((self.contrib, self.get_contribution(new.energy, new.DOS_element_new)), axis=1)
+        self.contrib_orbital = np.concatenate((self.contrib_orbital, self.get_contribution(new.energy, new.DOS_orbitals)), axis=1)
+        self.path_axis()
+
+        return True
+
+
+    def sum_DOS(self):
+        """
+        Compute total, projected, and orbital DOS; PROCAR_DOS is read again in chunks if it is streamed
+        """
+        minE, maxE, Eres = [float(x) for x in self.list_energy]
+
+        if self.DOS_streamed:
+            partial, orbital = self.DOS.stream_DOS(self.foldername + "/PROCAR_DOS", self.VBM, minE, maxE, Eres,
+                self.projection_matrix, self.budget)
+            self.Energy_DOS = self.DOS.energy_DOS
+
+        else:
+            self.DOS.energy_DOS, self.DOS.totDOS_DOS = self.DOS.sum_partial_DOS(self.DOS.totDOS, minE, maxE, Eres)
+            self.Energy_DOS, orbital = self.DOS.sum_partial_DOS(self.DOS.DOS_orbitals, minE, maxE, Eres)
+            self.Energy_DOS, partial = self.DOS.sum_partial_DOS(self.DOS.DOS_element_new, minE, maxE, Eres)
+
+        self.orbital_DOS = list(orbital.T)
+        self.partial_DOS = list(partial.T)
+
+
+    def get_contribution(self, energy, DOS_elements_new):
+        """
+        Get the contributions for each band and kpoint
+        Input:
+        ----------------------
+        energy: ndarray, shape (M, N), dtype=float
+            Array of energies for M bands and N kpoints
+        DOS_element_new: ndarray, shape (M, N, X), dtype=float
+            Array of DOS for each band and kpoint as well as element (orbital)
+        """
+
+        DOS_elements_new = np.asarray(DOS_elements_new, dtype=float)
+        total_DOS = np.linalg.norm(DOS_elements_new, axis=-1, keepdims=True)
+
+        return np.divide(DOS_elements_new, total_DOS, out=np.zeros_like(DOS_elements_new), where=total_DOS > 0)
+
+
+    def get_kpoints(self):
+        """
+        Get ticks and distances along the path from the kpoint coordinates, the lattice of CONTCAR, and the labels of KPOINTS
+        """
+
+        with open(self.foldername + "/CONTCAR") as con:
+            self.reciprocal = self.Band.reciprocal_vectors(con.readlines())
+
+        with open(self.foldername + "/KPOINTS") as k:
+            self.kpoint_lines = k.readlines()
+
+        self.path_axis()
+
+
+    def path_axis(self):
+        """
+        Distances and ticks of the band kpoints; repeated kpoints at junctions are drawn once (not while PROCAR_band is watched)
+        """
+        labels = self.Band.kpoint_labels(self.kpoint_lines, int(np.max(self.Band.index, initial=0)) + 1)
+        self.ticks, self.distance = self.Band.get_distance(self.reciprocal, [labels[i] for i in self.Band.index])
+
+        if not self.watch:
+            self.Band.collapse_repeats()
+
+        self.masses = self.effective_masses()
+
+
+    def sum_DOS_elements(self):
+        """
+        Sum over the ions to get DOS for one element, or for the projection groups if defined
+        """
+
+        with open(self.foldername + '/CONTCAR') as con:
+            contcar = con.readlines()
+
+        self.species = contcar[5].split()
+        self.species_ions = self.Band.species_groups(contcar)
+
+        self.project_groups(self.projection_groups or list(zip(self.species, self.species_ions)))
+
+
+    def project_groups(self, groups):
+        """
+        Project Band and DOS on groups of ions without reading the PROCAR files again
+        Input:
+        ---------------------------
+        groups: list
+            List of (name, array of ion indices starting at 0)
+        """
+        self.cmp = [name for name, ions in groups]
+        self.projection_matrix = self.Band.group_matrix([ions for name, ions in groups])
+
+        self.Band.project(self.projection_matrix)
+        if not self.DOS_streamed:
+            self.DOS.project(self.projection_matrix)
+        self.mesh_slice = None
+
+
+    def parse_groups(self, text):
+        """
+        Read projection groups, one group per line as 'name: ions', e.g. 'Surface: 1-8, 17, Li'
+        Ions are counted from 1 as in the CONTCAR file; an element symbol adds all ions of this element
+        Input:
+        ---------------------------
+        text: str
+            Text of the projection group window
+        Output:
+        ---------------------------
+        groups: list
+            List of (name, array of ion indices starting at 0)
+        """
+        Nmb_ions = np.shape(self.Band.DOS_elements)[-1]
+        groups = list()
+
+        for line in text.splitlines():
+            if line.strip() == '':
+                continue
+
+            name, _, selection = line.partition(':')
+            ions = list()
+            for item in selection.replace(',', ' ').split():
+                if item in self.species:
+                    ions.append(self.species_ions[self.species.index(item)])
+                elif '-' in item:
+                    first, last = item.split('-')
+                    ions.append(np.arange(int(first) - 1, int(last)))
+                else:
+                    ions.append(np.array([int(item) - 1]))
+
+            ions = np.unique(np.concatenate(ions + [np.zeros(0, dtype=int)]))
+            if len(ions) == 0 or ions[0] < 0 or ions[-1] >= Nmb_ions:
+                raise ValueError('Group {} needs ions between 1 and {}'.format(name.strip(), Nmb_ions))
+
+            groups.append((name.strip(), ions))
+
+        return groups
+
+
+    def interpolate(self, ratio=5., density=8, mesh=24):
+        """
+        Fit star functions to the energies of the DOS mesh, evaluate them densely along the path and on a fine mesh
+        for the DOS, and compare them with the kpoints of PROCAR_band
+        Input:
+        ---------------------------
+        ratio: float
+            number of star functions per irreducible kpoint
+        density: int
+            number of steps between two kpoints of PROCAR_band
+        mesh: int or list, shape (3)
+            number of kpoints of the fine mesh along each reciprocal lattice vector
+        Output:
+        ---------------------------
+        interpolation: dictionary
+            kpts and energy along the path, Energy_DOS and DOS of the fine mesh and of the DOS kpoints,
+            residual at the kpoints of PROCAR_band, and a report
+        """
+        minE, maxE, Eres = [float(x) for x in self.list_energy]
+        Nmb_bands = min(len(self.DOS.energy), len(self.Band.energy))
+        mesh = np.broadcast_to(np.asarray(mesh, dtype=int), (3,))
+
+        with profiler.stage('interpolation (fit)'):
+            model = self.star_model(ratio)
+
+        with profiler.stage('interpolation (path)'):
+            coord, kpts = model.dense_path(self.Band.coord, self.Band.kpts, density)
+            energy = model.evaluate(coord)
+            residual = model.evaluate(self.Band.coord) - np.asarray(self.Band.energy[:Nmb_bands])
+
+        with profiler.stage('interpolation (DOS mesh)'):
+            DOS = 0.
+            for chunk in model.evaluate_mesh(mesh):
+                Energy_DOS, part = self.DOS.histogram(chunk, np.full(chunk.shape[1], 1. / np.prod(mesh)), np.ones_like(chunk),
+                    minE, maxE, Eres)
+                DOS = DOS + part
+
+            weight = np.asarray(self.DOS.weight) / np.sum(self.DOS.weight)
+            Energy_DOS, DOS_kpoints = self.DOS.histogram(self.DOS.energy[:Nmb_bands], weight,
+                np.ones((Nmb_bands, len(weight))), minE, maxE, Eres)
+
+        self.interpolation = {'kpts': kpts, 'energy': energy, 'Energy_DOS': Energy_DOS, 'DOS': DOS, 'DOS_kpoints': DOS_kpoints,
+            'residual': residual}
+        self.interpolation['report'] = self.interpolation_report(model, residual, len(kpts), mesh, minE, maxE)
+
+        return self.interpolation
+
+
+    def star_model(self, ratio):
+        """
+        Star function fit of the energies of the DOS kpoints; the fit is kept for the next interpolation
+        """
+        if self.DOS_streamed or len(getattr(self.DOS, 'coord', list())) == 0:
+            raise ValueError('The interpolation needs the kpoints of PROCAR_DOS, please load without streaming')
+
+        if getattr(self, 'model', None) is None or self.model.ratio != ratio:
+            with open(self.foldername + '/CONTCAR') as con:
+                contcar = con.readlines()
+
+            Nmb_bands = min(len(self.DOS.energy), len(self.Band.energy))
+            self.model = StarInterpolation(contcar, ratio=ratio).fit(self.DOS.coord, self.DOS.energy[:Nmb_bands])
+
+        return self.model
+
+
+    def transport(self, ratio=5., mesh=24, Eres=0.005, spin=2):
+        """
+        Transport distribution from the energies and velocities of the star function fit on a fine mesh
+        Input:
+        ---------------------------
+        ratio: float
+            number of star functions per irreducible kpoint
+        mesh: int or list, shape (3)
+            number of kpoints of the fine mesh along each reciprocal lattice vector
+        Eres: float
+            energy resolution in eV
+        spin: int
+            electrons per state (2 without spin polarization)
+        Output:
+        ---------------------------
+        transport: Transport
+        """
+        minE, maxE = float(self.list_energy[0]), float(self.list_energy[1])
+        mesh = np.broadcast_to(np.asarray(mesh, dtype=int), (3,))
+
+        with profiler.stage('transport distribution'):
+            model = self.star_model(ratio)
+            volume = abs(np.linalg.det(model.lattice))
+            weight = np.full(np.prod(mesh), 1. / np.prod(mesh))
+
+            # velocity in m/s from the derivative in eV Ang
+            factor = Transport.e * 1e-10 / Transport.hbar
+
+            # occupied fraction of each band on the DOS kpoints, so the electrons are counted on the same mesh as the states
+            occupied = (np.asarray(self.DOS.occ) > 0.01) @ np.asarray(self.DOS.weight) / np.sum(self.DOS.weight)
+            DOS, distribution, electrons, b = 0., 0., 0., 0
+
+            for energy, derivative in model.evaluate_mesh(mesh, gradient=True):
+                Energy_DOS, part = self.DOS.histogram(energy, weight, np.ones_like(energy), minE, maxE, Eres)
+                DOS = DOS + spin * part
+                Energy_DOS, part = self.DOS.histogram(energy, weight, occupied[b:b + len(energy), None] * np.ones_like(energy),
+                    minE, maxE, Eres)
+                electrons += spin * np.sum(part)
+                Energy_DOS, part = self.DOS.histogram(energy, weight, np.moveaxis((factor * derivative)**2, 0, -1), minE, maxE, Eres)
+                distribution = distribution + spin * part / (volume * 1e-30)
+                b += len(energy)
+
+        return Transport(Energy_DOS, DOS, distribution, volume, electrons, budget=self.budget / 16)
+
+
+    def fermi_level(self, Eres=0.005, spin=2):
+        """
+        Solver of the chemical potential from the DOS of the DOS kpoints
+        Input:
+        ---------------------------
+        Eres: float
+            energy resolution in eV
+        spin: int
+            electrons per state (2 without spin polarization)
+        Output:
+        ---------------------------
+        solver: FermiLevel
+        """
+        if self.DOS_streamed:
+            raise ValueError('The chemical potential needs the energies of PROCAR_DOS, please load without streaming')
+
+        minE, maxE = float(self.list_energy[0]), float(self.list_energy[1])
+        energy = np.asarray(self.DOS.energy)
+        occupied = np.asarray(self.DOS.occ) > 0.01
+        weight = np.asarray(self.DOS.weight) / np.sum(self.DOS.weight)
+
+        Energy_DOS, states = self.DOS.histogram(energy, weight, np.ones_like(energy), minE, maxE, Eres)
+        Energy_DOS, electrons = self.DOS.histogram(energy, weight, occupied.astype(float), minE, maxE, Eres)
+
+        CBM = np.min(energy[~occupied], initial=np.inf)
+        midgap = 0.5 * CBM if np.isfinite(CBM) and CBM > 0 else 0.
+        volume = (2 * np.pi)**3 / abs(np.linalg.det(self.reciprocal))
+
+        return FermiLevel(Energy_DOS, spin * states, spin * np.sum(electrons), volume, midgap, budget=self.budget / 16)
+
+
+    def joint_DOS(self, maxE=6., Eres=0.02, weighting='none'):
+        """
+        Joint DOS, distribution of the direct gaps, and lowest transitions on the DOS kpoints
+        Input:
+        ---------------------------
+        maxE: float
+            maximum transition energy in eV
+        Eres: float
+            energy resolution in eV
+        weighting: str
+            'none', 'elements' (projection groups), or 'orbitals' for the overlap of the projections of both states
+        Output:
+        ---------------------------
+        result: dictionary
+            output of Energy.joint_DOS and the coordinates of the DOS kpoints
+        """
+        if self.DOS_streamed:
+            raise ValueError('The joint DOS needs the energies of PROCAR_DOS, please load without streaming')
+
+        projections = {'none': None, 'elements': self.DOS.DOS_element_new, 'orbitals': self.DOS.DOS_orbitals}[weighting]
+
+        with profiler.stage('joint DOS'):
+            result = self.DOS.joint_DOS(maxE, Eres, projections=projections, budget=self.budget / 16)
+
+        result['coord'] = np.asarray(self.DOS.coord)
+        result['weighting'] = weighting
+
+        return result
+
+
+    def energy_surface(self, energies, origin=(0, 0, 0), axis1=(1, 0, 0), axis2=(0, 1, 0), resolution=150, weighting='none'):
+        """
+        Lines of constant energy on a plane through the Brillouin zone from the kpoint mesh of PROCAR_DOS
+        Input:
+        ---------------------------
+        energies: list
+            energies of the lines in eV
+        origin, axis1, axis2: list, shape (3)
+            center and axes of the plane in fractional coordinates of the reciprocal lattice
+        resolution: int
+            number of points along each axis of the plane
+        weighting: str
+            'none', 'elements' (projection groups), or 'orbitals' for the character along the lines
+        Output:
+        ---------------------------
+        result: dictionary
+            lines as list of (energy, band, vertices (V, 2) in 1/Ang, projections (V, C) or None, closed, area in 1/Ang^2),
+            outline of the plane, names of the channels, and the mesh
+        """
+        if self.DOS_streamed or len(getattr(self.DOS, 'coord', list())) == 0:
+            raise ValueError('The constant energy lines need the kpoints of PROCAR_DOS, please load without streaming')
+
+        if getattr(self, 'mesh_slice', None) is None or self.mesh_slice[0] != weighting:
+            if getattr(self, 'model', None) is not None:
+                rotations = self.model.rotations
+            else:
+                with open(self.foldername + '/CONTCAR') as con:
+                    rotations = StarInterpolation(con.readlines()).rotations
+
+            projections = {'none': None, 'elements': self.DOS.DOS_element_new, 'orbitals': self.DOS.DOS_orbitals}[weighting]
+            with profiler.stage('unfold mesh'):
+                self.mesh_slice = (weighting, MeshSlice(self.DOS.coord, self.DOS.energy, self.DOS.weight, rotations, projections))
+
+        mesh = self.mesh_slice[1]
+        origin, axis1, axis2 = [np.asarray(x, dtype=float) for x in (origin, axis1, axis2)]
+        if np.linalg.norm(np.cross(axis1 @ self.reciprocal, axis2 @ self.reciprocal)) < 1e-8:
+            raise ValueError('The axes of the plane must not be parallel')
+
+        with profiler.stage('constant energy lines'):
+            lines, surface, bands = mesh.isolines(energies, origin, axis1, axis2, resolution)
+
+        # orthonormal axes in the plane, the first one along axis1
+        u, v = axis1 @ self.reciprocal, axis2 @ self.reciprocal
+        e1 = u / np.linalg.norm(u); e2 = v - (v @ e1) * e1; e2 /= np.linalg.norm(e2)
+        transform = np.array([[u @ e1, v @ e1], [u @ e2, v @ e2]])
+
+        result = {'lines': [], 'names': {'none': [], 'elements': self.cmp, 'orbitals': self.DOS.orbitals}[weighting],
+            'weighting': weighting, 'mesh': mesh.mesh, 'energies': np.atleast_1d(np.asarray(energies, dtype=float)),
+            'outline': np.array([[-0.5, -0.5], [0.5, -0.5], [0.5, 0.5], [-0.5, 0.5], [-0.5, -0.5]]) @ transform.T}
+
+        for energy, band, vertices in lines:
+            xy = vertices @ transform.T
+            closed = bool(np.allclose(vertices[0], vertices[-1]))
+            area = 0.5 * abs(np.sum(xy[:-1, 0] * xy[1:, 1] - xy[1:, 0] * xy[:-1, 1])) if closed else 0.
+            projections = None if weighting == 'none' else mesh.character(vertices, band, origin, axis1, axis2)
+            result['lines'].append((energy, band, xy, projections, closed, area))
+
+        return result
+
+
+    def effective_masses(self, window=0.3, points=4, energy_range=0.1):
+        """
+        Effective masses of the extrema near the band edges along each segment of the band path
+        Input:
+        ---------------------------
+        window: float
+            maximum distance of an extremum from the band edge in eV
+        points: int
+            maximum number of kpoints on each side of an extremum
+        energy_range: float
+            maximum energy difference of a fitted kpoint from the extremum in eV
+        Output:
+        ---------------------------
+        masses: dictionary
+            output of Energy.effective_masses and the direction of each segment (e.g. Gamma-X)
+        """
+        with profiler.stage('effective masses'):
+            segments = self.Band.segments(self.distance)
+            masses = self.Band.effective_masses(segments, window, points, energy_range)
+
+        names = []
+        for first, last in segments:
+            start = self.ticks[int(np.argmin(np.abs(np.asarray(self.distance) - self.Band.kpts[first])))]
+            end = self.ticks[int(np.argmin(np.abs(np.asarray(self.distance) - self.Band.kpts[last])))]
+            names.append('{}-{}'.format(self.plain_label(start.split('$\\mid$')[-1]), self.plain_label(end.split('$\\mid$')[0])))
+
+        masses['direction'] = [names[s] for s in masses['segment']]
+
+        return masses
+
+
+    def plain_label(self, tick):
+        """
+        Label of a high-symmetry point without LaTeX, e.g. for tables
+        """
+        return tick.replace('\\Gamma', '\u0393').replace('$', '').strip()
+
+
+    def interpolation_report(self, model, residual, Nmb_path, mesh, minE, maxE, threshold=0.05):
+        """
+        Summary of the fit and of the residual at the kpoints of PROCAR_band for the bands in the energy range
+        """
+        energy = np.asarray(self.Band.energy[:len(residual)])
+        window = np.flatnonzero((energy.max(axis=1) >= minE) & (energy.min(axis=1) <= maxE))
+        if len(window) == 0:
+            window = np.arange(len(residual))
+
+        error = np.abs(residual[window])
+        band, k = np.unravel_index(np.argmax(error), error.shape)
+        worst = window[np.max(error, axis=1) > threshold] + 1
+
+        lines = [
+            'Star functions: {} for {} irreducible kpoints ({} symmetry operations with time reversal)'.format(
+                len(model.sizes), model.Nmb_kpts, len(model.rotations)),
+            'Path: {} kpoints, DOS mesh: {} x {} x {}'.format(Nmb_path, *mesh),
+            'Residual at the {} kpoints of PROCAR_band, bands {} to {}:'.format(residual.shape[1], window[0] + 1, window[-1] + 1),
+            '    RMS {:.4f} eV, maximum {:.4f} eV (band {} at kpoint {})'.format(np.sqrt(np.mean(error**2)), error[band, k],
+                window[band] + 1, k + 1),
+            'Bands with residuals above {} eV: {}'.format(threshold, ', '.join(str(b) for b in worst) if len(worst) else 'none'),
+        ]
+
+        return '\n'.join(lines)
+
+
+def load_calculation(foldername, list_energy):
+    """
+    Load a calculation for the comparison of several calculations (used by the worker processes)
+    """
+    return Calculation(foldername, list_energy).load().compact()
+
+
+def load_session(session):
+    """
+    Open a session folder written by MainApplication.save_session
+    Output:
+    ---------------------------
+    calc: Calculation
+    info: dictionary
+        settings of the session
+    """
+    with open(session + '/session.json') as fil:
+        info = json.load(fil)
+
+    c = info['calculation']
+    groups = [(name, np.array(ions, dtype=int)) for name, ions in c['projection_groups']]
+    calc = Calculation(c['foldername'], c['list_energy'], stream=c['stream'], budget=c['budget'], projection_groups=groups)
+
+    return calc.restore(session, c), info
+
+
+class StarInterpolation:
+    """
+    Smooth Fourier interpolation of band energies with star functions (symmetrized plane waves) as in BoltzTraP
+    """
+
+    def __init__(self, contcar, ratio=5., symprec=1e-3, budget=64.):
+        """
+        The symmetry operations are found from the lattice and the positions of CONTCAR; time reversal is included
+        Input:
+        --------------------------
+        contcar: Lines from CONTCAR file
+        ratio: float
+            number of star functions per fitted kpoint
+        symprec: float
+            tolerance of the positions in Ang
+        budget: float
+            memory budget of the phase matrix of one chunk in MB
+        """
+        self.ratio = ratio
+        self.symprec = symprec
+        self.budget = budget
+
+        self.lattice, self.positions, self.types = self.read_structure(contcar)
+        self.rotations = self.point_group()
+
+
+    def read_structure(self, contcar):
+        """
+        Lattice and fractional positions of a CONTCAR file
+        Output:
+        --------------------------
+        lattice: ndarray, shape (3, 3), dtype=float
+            lattice vectors a1, a2, a3 (rows) in Ang
+        positions: ndarray, shape (Ions, 3), dtype=float
+            fractional coordinates of the ions
+        types: ndarray, shape (Ions), dtype=int
+            index of the element of each ion
+        """
+        scale = float(contcar[1].split()[0])
+        lattice = np.array([x.split()[:3] for x in contcar[2:5]], dtype=float)
+        if scale < 0:
+            scale = (-scale / abs(np.linalg.det(lattice)))**(1 / 3)
+        lattice *= scale
+
+        Nmb_Cmp = np.array(contcar[6].split(), dtype=int)
+        line = 8 if contcar[7].strip()[0] in 'sS' else 7
+        positions = np.array([x.split()[:3] for x in contcar[line + 1:line + 1 + Nmb_Cmp.sum()]], dtype=float)
+
+        if contcar[line].strip()[0] in 'cCkK':
+            positions = scale * positions @ np.linalg.inv(lattice)
+
+        return lattice, positions, np.repeat(np.arange(len(Nmb_Cmp)), Nmb_Cmp)
+
+
+    def point_group(self):
+        """
+        Rotations of the crystal acting on fractional coordinates
+        Output:
+        --------------------------
+        rotations: ndarray, shape (G, 3, 3), dtype=int
+            integer matrices W with x' = W x including the inversion of time reversal
+        """
+        # all integer matrices with entries -1, 0, 1 which keep the lengths of the lattice
+        candidates = np.indices((3,) * 9).reshape(9, -1).T.reshape(-1, 3, 3) - 1
+        metric = self.lattice @ self.lattice.T
+        change = np.einsum('nji,jk,nkl->nil', candidates, metric, candidates) - metric
+        candidates = candidates[np.abs(change).max(axis=(1, 2)) < 1e-3 * np.abs(metric).max()]
+
+        rotations = [W for W in candidates if self.keeps_crystal(W)]
+        rotations = np.concatenate((rotations, np.negative(rotations)))
+
+        return np.unique(rotations, axis=0)
+
+
+    def keeps_crystal(self, W):
+        """
+        True if the rotation W with any translation maps every ion onto an ion of the same element
+        """
+        moved = self.positions @ W.T
+        same = self.types[:, None] == self.types[None, :]
+
+        # the translation maps the first ion of the rarest element onto one of the ions of this element
+        rare = np.argmin(np.bincount(self.types))
+        first = np.flatnonzero(self.types == rare)[0]
+
+        for translation in self.positions[self.types == rare] - moved[first]:
+            delta = moved[:, None, :] + translation - self.positions[None, :, :]
+            delta -= np.round(delta)
+            close = np.linalg.norm(delta @ self.lattice, axis=-1) < self.symprec
+
+            if np.all(np.any(close & same, axis=1)):
+                return True
+
+        return False
+
+
+    def stars(self, number):
+        """
+        Lattice vectors of the shortest stars
+        Input:
+        --------------------------
+        number: int
+            number of stars including the origin
+        """
+        volume = abs(np.linalg.det(self.lattice))
+        radius = (3 * number * len(self.rotations) * volume / (4 * np.pi))**(1 / 3)
+        reciprocal = 2 * np.pi * np.linalg.inv(self.lattice).T
+
+        while True:
+            bound = np.ceil(radius * np.linalg.norm(reciprocal, axis=1) / (2 * np.pi)).astype(int)
+            vectors = np.indices(2 * bound + 1).reshape(3, -1).T - bound
+            length = np.linalg.norm(vectors @ self.lattice, axis=1)
+            vectors, length = vectors[length <= radius], length[length <= radius]
+
+            # every vector of a star has the same smallest code of all its images
+            base = 2 * bound.max() + 1
+            key = np.full(len(vectors), np.iinfo(np.int64).max)
+            for W in self.rotations:
+                image = vectors @ W.T + bound.max()
+                key = np.minimum(key, (image[:, 0] * base + image[:, 1]) * base + image[:, 2])
+
+            key, star = np.unique(key, return_inverse=True)
+            star_length = np.zeros(len(key)); star_length[star] = length
+
+            if len(key) >= number or len(key) == len(vectors):
+                break
+            radius *= 1.25
+
+        # stars sorted by length, the vectors of one star next to each other
+        order = np.argsort(np.round(star_length, 8), kind='stable')[:number]
+        rank = np.full(len(key), -1); rank[order] = np.arange(len(order))
+        keep = rank[star] >= 0
+        sort = np.argsort(rank[star][keep], kind='stable')
+
+        self.vectors = vectors[keep][sort]
+        self.star = rank[star][keep][sort]
+        self.sizes = np.bincount(self.star)
+        self.starts = np.concatenate(([0], np.cumsum(self.sizes)[:-1]))
+        self.lengths = star_length[order]
+
+
+    def star_functions(self, coord):
+        """
+        Star functions at kpoints, evaluated in chunks
+        Input:
+        --------------------------
+        coord: ndarray, shape (K, 3), dtype=float
+            kpoints in fractional coordinates of the reciprocal lattice
+        Output:
+        --------------------------
+        functions: ndarray, shape (K, S), dtype=float
+        """
+        coord = np.asarray(coord, dtype=float)
+        functions = np.empty((len(coord), len(self.sizes)))
+        chunk = max(int(self.budget * 2**20 / (8 * len(self.vectors))), 1)
+
+        for i in range(0, len(coord), chunk):
+            phase = np.cos(2 * np.pi * coord[i:i + chunk] @ self.vectors.T)
+            functions[i:i + chunk] = np.add.reduceat(phase, self.starts, axis=1) / self.sizes
+
+        return functions
+
+
+    def irreducible(self, coord):
+        """
+        Remove kpoints which are equivalent by symmetry to a previous kpoint (e.g. a mesh without symmetry reduction)
+        Output:
+        --------------------------
+        coord: ndarray, shape (N, 3), dtype=float
+        unique: ndarray, shape (N), dtype=int
+            indices of the kept kpoints
+        """
+        coord = np.asarray(coord, dtype=float)
+
+        # k.(W R) = (W^T k).R, so kpoints are rotated by the transposed matrices
+        images = np.einsum('gji,kj->gki', self.rotations, coord)
+        images = np.round((images - np.floor(images)) * 1e5).astype(np.int64) % 100000
+        key = np.min((images[..., 0] * 100000 + images[..., 1]) * 100000 + images[..., 2], axis=0)
+
+        unique = np.sort(np.unique(key, return_index=True)[1])
+
+        return coord[unique], unique
+
+
+    def roughness(self, c1=0.75, c2=0.75):
+        """
+        Roughness of each star which is minimized by the fit (Pickett, Krakauer, and Allen)
+        """
+        x = self.lengths[1:] / self.lengths[1]
+        return (1 - c1 * x**2)**2 + c2 * x**6
+
+
+    def fit(self, coord, energy):
+        """
+        Fit all bands at once; the interpolation passes exactly through the energies
+        Input:
+        --------------------------
+        coord: ndarray, shape (N, 3), dtype=float
+            irreducible kpoints (fractional)
+        energy: ndarray, shape (M, N), dtype=float
+            energies of M bands
+        """
+        coord, unique = self.irreducible(coord)
+        energy = np.asarray(energy, dtype=float)[:, unique]
+        self.Nmb_kpts = len(coord)
+        self.stars(max(int(self.ratio * len(coord)), len(coord) + 1))
+
+        functions = self.star_functions(coord)
+        delta = functions[:-1, 1:] - functions[-1, 1:]
+        rho = self.roughness()
+
+        H = (delta / rho) @ delta.T
+        rhs = (energy[:, :-1] - energy[:, -1:]).T
+
+        try:
+            multipliers = np.linalg.solve(H, rhs)
+        except np.linalg.LinAlgError:
+            multipliers = np.linalg.lstsq(H, rhs, rcond=None)[0]
+
+        coefficients = (delta.T @ multipliers) / rho[:, None]
+        constant = energy[:, -1] - functions[-1, 1:] @ coefficients
+        self.coefficients = np.vstack((constant, coefficients))
+
+        return self
+
+
+    def evaluate(self, coord):
+        """
+        Interpolated energies at any kpoints
+        Output:
+        --------------------------
+        energy: ndarray, shape (M, K), dtype=float
+        """
+        coord = np.asarray(coord, dtype=float)
+        energy = np.empty((self.coefficients.shape[1], len(coord)))
+        chunk = max(int(self.budget * 2**20 / (8 * len(self.vectors))), 1)
+
+        for i in range(0, len(coord), chunk):
+            energy[:, i:i + chunk] = (self.star_functions(coord[i:i + chunk]) @ self.coefficients).T
+
+        return energy
+
+
+    def evaluate_mesh(self, mesh, bands=16, gradient=False):
+        """
+        Interpolated energies on a Gamma-centred mesh of the entire Brillouin zone with one FFT per chunk of bands;
+        the lattice vectors are folded onto the mesh, which is exact at the mesh points
+        Input:
+        --------------------------
+        mesh: int or list, shape (3)
+            number of kpoints along each reciprocal lattice vector
+        bands: int
+            number of bands of one chunk
+        gradient: Boolean
+            If True, the derivatives of the energies along x, y, and z are computed as well (default is False)
+        Output:
+        --------------------------
+        generator of ndarray, shape (B, K)
+            energies of a chunk of bands on the K mesh points,
+            or tuple of energies and derivatives in eV Ang, shape (3, B, K), if gradient is True
+        """
+        mesh = np.broadcast_to(np.asarray(mesh, dtype=int), (3,))
+        index = tuple((self.vectors % mesh).T)
+        cartesian = self.vectors @ self.lattice
+        Nmb_bands = self.coefficients.shape[1]
+
+        for b in range(0, Nmb_bands, bands):
+            coefficients = self.coefficients[self.star, b:b + bands] / self.sizes[self.star, None]
+            grid = np.zeros(tuple(mesh) + (coefficients.shape[1],))
+            np.add.at(grid, index, coefficients)
+            energy = np.fft.fftn(grid, axes=(0, 1, 2)).real.reshape(-1, grid.shape[-1]).T
+
+            if not gradient:
+                yield energy
+                continue
+
+            # d/dk cos(k.R) = -R sin(k.R), which is the imaginary part of the same FFT with the coefficients times R
+            derivative = np.empty((3,) + energy.shape)
+            for axis in range(3):
+                grid[:] = 0
+                np.add.at(grid, index, coefficients * cartesian[:, axis, None])
+                derivative[axis] = np.fft.fftn(grid, axes=(0, 1, 2)).imag.reshape(-1, grid.shape[-1]).T
+
+            yield energy, derivative
+
+
+    def dense_path(self, coord, kpts, density):
+        """
+        Kpoints between the kpoints of a band structure; jumps of the path are not filled
+        Input:
+        --------------------------
+        coord: ndarray, shape (N, 3), dtype=float
+            kpoints of the path (fractional)
+        kpts: ndarray, shape (N), dtype=float
+            position of each kpoint on the axis
+        density: int
+            number of steps between two kpoints
+        Output:
+        --------------------------
+        coord, kpts: ndarray, shape (K, 3) and (K)
+        """
+        coord = np.asarray(coord, dtype=float); kpts = np.asarray(kpts, dtype=float)
+        t = np.arange((len(kpts) - 1) * density + 1) / density
+        i = np.minimum(t.astype(int), len(kpts) - 2); f = (t - i)[:, None]
+
+        keep = (f[:, 0] == 0) | (f[:, 0] == 1) | (kpts[i + 1] > kpts[i])
+        new_coord = coord[i] + f * (coord[i + 1] - coord[i])
+        new_kpts = kpts[i] + f[:, 0] * (kpts[i + 1] - kpts[i])
+
+        return new_coord[keep], new_kpts[keep]
+
+
+class Transport:
+    """
+    Boltzmann transport in the constant relaxation time approximation on a grid of temperatures and chemical potentials
+    """
+
+    k_B = 8.617333262e-5     # eV/K
+    e = 1.602176634e-19      # C
+    hbar = 1.054571817e-34   # J s
+
+    def __init__(self, energy, DOS, distribution, volume, electrons, budget=64.):
+        """
+        Input:
+        --------------------------
+        energy: ndarray, shape (S), dtype=float
+            center of each energy step in eV
+        DOS: ndarray, shape (S), dtype=float
+            states of each energy step per cell
+        distribution: ndarray, shape (S, 3), dtype=float
+            transport distribution (sum of the squared velocities along x, y, and z per volume) of each energy step in 1/(m s^2)
+        volume: float
+            volume of the cell in Ang^3
+        electrons: float
+            number of electrons in the energy range per cell
+        budget: float
+            memory budget of one chunk of chemical potentials in MB
+        """
+        self.energy = np.asarray(energy, dtype=float)
+        self.DOS = np.asarray(DOS, dtype=float)
+        self.distribution = np.asarray(distribution, dtype=float)
+        self.volume = volume
+        self.electrons = electrons
+        self.budget = budget
+
+
+    def integrals(self, temperatures, potentials):
+        """
+        Moments of the transport distribution and the number of electrons for all temperatures and chemical potentials
+        Input:
+        --------------------------
+        temperatures: ndarray, shape (T), dtype=float
+            temperatures in K
+        potentials: ndarray, shape (P), dtype=float
+            chemical potentials in eV
+        Output:
+        --------------------------
+        L: ndarray, shape (3, T, P, 3), dtype=float
+            integrals of the transport distribution times (E - mu)^n (-df/dE) for n = 0, 1, 2
+        N: ndarray, shape (T, P), dtype=float
+            number of electrons per cell
+        """
+        kT = self.k_B * np.asarray(temperatures, dtype=float)[:, None, None]
+        potentials = np.asarray(potentials, dtype=float)
+
+        L = np.zeros((3, len(kT), len(potentials), 3))
+        N = np.zeros((len(kT), len(potentials)))
+        chunk = max(int(self.budget * 2**20 / (4 * 8 * len(kT) * len(self.energy))), 1)
+
+        for i in range(0, len(potentials), chunk):
+            delta = self.energy[None, None, :] - potentials[None, i:i + chunk, None]
+            x = delta / kT
+
+            # -df/dE and f without overflow for large |x|
+            g = np.exp(-np.abs(x))
+            window = g / ((1 + g)**2 * kT)
+            N[:, i:i + chunk] = (0.5 * (1 - np.tanh(0.5 * x))) @ self.DOS
+
+            for n in range(3):
+                L[n, :, i:i + chunk] = (window * delta**n) @ self.distribution
+
+        return L, N
+
+
+    def compute(self, temperatures, potentials):
+        """
+        Transport coefficients on the grid of temperatures and chemical potentials with one broadcast evaluation per chunk
+        Input:
+        --------------------------
+        temperatures: ndarray, shape (T), dtype=float
+            temperatures in K
+        potentials: ndarray, shape (P), dtype=float
+            chemical potentials in eV relative to the valence band maximum
+        Output:
+        --------------------------
+        results: dictionary
+            T / K, mu / eV, carriers / cm^-3 (positive for holes) with shape (T, P), and sigma/tau / (Ohm m s)^-1,
+            Seebeck / (muV/K), kappa/tau / (W/(m K s)), power factor/tau / (W/(m K^2 s)) with shape (T, P, 3) for x, y, z
+        """
+        temperatures = np.asarray(temperatures, dtype=float)
+        potentials = np.asarray(potentials, dtype=float)
+        L, N = self.integrals(temperatures, potentials)
+        T = temperatures[:, None, None]
+
+        ratio = np.divide(L[1], L[0], out=np.zeros_like(L[1]), where=L[0] > 0)
+        sigma = self.e * L[0]
+        seebeck = -ratio / T
+        kappa = self.e * (L[2] - ratio * L[1]) / T
+
+        return {
+            'T': temperatures, 'mu': potentials,
+            'carriers': (self.electrons - N) / (self.volume * 1e-24),
+            'sigma': sigma, 'seebeck': 1e6 * seebeck, 'kappa': kappa, 'power factor': seebeck**2 * sigma,
+        }
+
+
+class FermiLevel:
+    """
+    Chemical potential and carrier concentrations from the DOS for arrays of temperatures and dopings at once
+    """
+
+    k_B = 8.617333262e-5     # eV/K
+
+    def __init__(self, energy, DOS, electrons, volume, midgap, budget=64.):
+        """
+        Input:
+        --------------------------
+        energy: ndarray, shape (S), dtype=float
+            center of each energy step in eV
+        DOS: ndarray, shape (S), dtype=float
+            states of each energy step per cell
+        electrons: float
+            number of electrons in the energy range per cell without doping
+        volume: float
+            volume of the cell in Ang^3
+        midgap: float
+            energy in eV which separates valence and conduction states
+        budget: float
+            memory budget of one chunk in MB
+        """
+        self.energy = np.asarray(energy, dtype=float)
+        self.DOS = np.asarray(DOS, dtype=float)
+        self.electrons = electrons
+        self.volume = volume
+        self.midgap = midgap
+        self.budget = budget
+
+        # empty energy steps do not contribute
+        self.valence = (self.energy < midgap) & (self.DOS > 0)
+        self.conduction = (self.energy >= midgap) & (self.DOS > 0)
+
+
+    def occupation(self, potentials, temperatures):
+        """
+        Electrons in the conduction states and holes in the valence states per cell
+        Input:
+        --------------------------
+        potentials, temperatures: ndarray, same shape (...)
+            chemical potentials in eV and temperatures in K
+        Output:
+        --------------------------
+        electrons, holes: ndarray, shape (...)
+        """
+        mu = np.ravel(potentials); kT = self.k_B * np.ravel(temperatures)
+        electrons = np.empty(len(mu)); holes = np.empty(len(mu))
+        chunk = max(int(self.budget * 2**20 / (3 * 8 * len(self.energy))), 1)
+
+        for i in range(0, len(mu), chunk):
+            x = (self.energy[None, :] - mu[i:i + chunk, None]) / kT[i:i + chunk, None]
+
+            # f = 1 / (1 + exp(x)) and 1 - f = 1 / (1 + exp(-x)) keep the small occupations deep in the gap
+            with np.errstate(over='ignore'):
+                electrons[i:i + chunk] = (1 / (1 + np.exp(x[:, self.conduction]))) @ self.DOS[self.conduction]
+                holes[i:i + chunk] = (1 / (1 + np.exp(-x[:, self.valence]))) @ self.DOS[self.valence]
+
+        return electrons.reshape(np.shape(potentials)), holes.reshape(np.shape(potentials))
+
+
+    def solve(self, temperatures, doping, tolerance=1e-6):
+        """
+        Chemical potential for all temperatures and dopings by vectorized bisection; the number of electrons
+        increases monotonically with the chemical potential, so every grid point converges
+        Input:
+        --------------------------
+        temperatures: ndarray, shape (T), dtype=float
+            temperatures in K
+        doping: ndarray, shape (D), dtype=float
+            net donor concentration in cm^-3 (negative for acceptors); 0 is the intrinsic case
+        tolerance: float
+            accuracy of the chemical potential in eV
+        Output:
+        --------------------------
+        mu: ndarray, shape (T, D), dtype=float
+            chemical potential in eV relative to the valence band maximum
+        n, p: ndarray, shape (T, D), dtype=float
+            concentration of electrons and holes in cm^-3
+        """
+        T, D = np.meshgrid(np.asarray(temperatures, dtype=float), np.asarray(doping, dtype=float), indexing='ij')
+
+        # extra electrons per cell from the net donors; the valence states of an insulator hold all electrons
+        target = D * self.volume * 1e-24
+        offset = self.DOS[self.valence].sum() - self.electrons
+        offset = 0. if abs(offset) < 1e-6 else offset
+        lower = np.full(T.shape, self.energy[0]); upper = np.full(T.shape, self.energy[-1])
+
+        for iteration in range(int(np.ceil(np.log2((upper[0, 0] - lower[0, 0]) / tolerance)))):
+            mu = 0.5 * (lower + upper)
+            n, p = self.occupation(mu, T)
+            above = n - p + offset > target
+            upper = np.where(above, mu, upper); lower = np.where(above, lower, mu)
+
+        mu = 0.5 * (lower + upper)
+        n, p = self.occupation(mu, T)
+
+        return mu, n / (self.volume * 1e-24), p / (self.volume * 1e-24)
+
+
+class MeshSlice:
+    """
+    Constant-energy lines on a plane through the Brillouin zone from the energies on the full kpoint mesh of PROCAR_DOS
+    """
+
+    def __init__(self, coord, energy, weight, rotations, projections=None, refine=4):
+        """
+        The kpoints are unfolded with the rotations onto the regular mesh; kpoints which reach the same point of the
+        mesh are averaged with their weights
+        Input:
+        --------------------------
+        coord: ndarray, shape (N, 3), dtype=float
+            kpoints in fractional coordinates of the reciprocal lattice
+        energy: ndarray, shape (M, N), dtype=float
+            energies of M bands
+        weight: ndarray, shape (N), dtype=float
+            weight of each kpoint
+        rotations: ndarray, shape (G, 3, 3), dtype=int
+            point group from StarInterpolation including time reversal
+        projections: ndarray, shape (M, N, C), dtype=float
+            elemental or orbital DOS of each state (optional)
+        refine: int
+            the energies are Fourier interpolated onto a mesh which is finer by this factor (at most 128 points per axis)
+        """
+        self.refine = refine
+        coord = np.asarray(coord, dtype=float)
+        images = np.einsum('gji,kj->gki', rotations, coord)
+        self.mesh, self.shift = self.mesh_size(images.reshape(-1, 3))
+
+        index = np.round(images * self.mesh - self.shift).astype(int) % self.mesh
+        flat = np.ravel_multi_index(index.reshape(-1, 3).T, self.mesh)
+
+        # every kpoint counts once for each distinct point of the mesh in its star
+        flat = np.sort(flat.reshape(len(rotations), len(coord)), axis=0)
+        first = np.concatenate((np.ones((1, len(coord)), dtype=bool), np.diff(flat, axis=0) > 0))
+        kpoint = np.broadcast_to(np.arange(len(coord)), flat.shape)[first]
+        flat = flat[first]
+
+        weight = np.asarray(weight, dtype=float)[kpoint]
+        total = np.bincount(flat, weights=weight, minlength=int(np.prod(self.mesh)))
+        if np.any(total == 0):
+            raise ValueError('The kpoints of PROCAR_DOS do not unfold to the full {}x{}x{} mesh'.format(*self.mesh))
+
+        self.energy = self.average(flat, weight, total, np.asarray(energy, dtype=float)[:, kpoint].T)
+        self.projections = None
+        if projections is not None:
+            projections = np.asarray(projections, dtype=float)[:, kpoint]
+            self.projections = self.average(flat, weight, total, projections.transpose(1, 0, 2).reshape(len(flat), -1))
+            self.projections = self.projections.reshape(tuple(self.mesh) + projections.shape[::2])
+
+
+    def mesh_size(self, coord):
+        """
+        Size and shift of the regular mesh which includes all kpoints
+        Output:
+        --------------------------
+        mesh: ndarray, shape (3), dtype=int
+        shift: ndarray, shape (3), dtype=float
+            offset of the mesh in units of the spacing (0 or 0.5 for Monkhorst-Pack meshes)
+        """
+        coord = coord - np.floor(coord)
+        mesh = np.ones(3, dtype=int); shift = np.zeros(3)
+
+        for i in range(3):
+            values = np.unique(np.round(coord[:, i], 6) % 1)
+            spacing = np.diff(np.concatenate((values, [values[0] + 1])))
+            mesh[i] = max(int(round(1 / spacing.min())), 1)
+            shift[i] = values[0] * mesh[i] - np.floor(values[0] * mesh[i] + 1e-6)
+
+        offset = coord * mesh - shift
+        if np.abs(offset - np.round(offset)).max() > 1e-3:
+            raise ValueError('The kpoints of PROCAR_DOS are not on a regular mesh')
+
+        return mesh, shift
+
+
+    def average(self, flat, weight, total, values):
+        """
+        Weighted average of the values of all kpoints at each point of the mesh
+        Output:
+        --------------------------
+        grid: ndarray, shape (n1, n2, n3, V), dtype=float
+        """
+        grid = np.zeros((len(total), values.shape[1]))
+        np.add.at(grid, flat, weight[:, None] * values)
+
+        return (grid / total[:, None]).reshape(tuple(self.mesh) + (values.shape[1],))
+
+
+    def upsample(self, grid, factor):
+        """
+        Trigonometric interpolation of a periodic grid onto a mesh which is finer by factor, done along one axis at a time
+        Input:
+        --------------------------
+        grid: ndarray, shape (n1, n2, n3, V), dtype=float
+        factor: int
+        Output:
+        --------------------------
+        fine: ndarray, shape (factor n1, factor n2, factor n3, V), dtype=float
+        """
+        for axis, n in enumerate(grid.shape[:3]):
+            x = np.arange(n * factor)[:, None] / factor - np.arange(n)[None, :]
+            kernel = 1 + 2 * np.cos(2 * np.pi * x[..., None] * np.arange(1, (n + 1) // 2) / n).sum(axis=-1)
+            if n % 2 == 0:
+                kernel += np.cos(np.pi * x)
+            grid = np.moveaxis(np.tensordot(kernel / n, grid, axes=(1, axis)), 0, axis)
+
+        return grid
+
+
+    def interpolate(self, coord, grid, factor=1):
+        """
+        Periodic trilinear interpolation of a grid at any kpoints
+        Input:
+        --------------------------
+        coord: ndarray, shape (..., 3), dtype=float
+            kpoints in fractional coordinates
+        grid: ndarray, shape (n1, n2, n3, ...), dtype=float
+        factor: int
+            the grid is finer than the mesh by this factor (output of upsample)
+        Output:
+        --------------------------
+        values: ndarray, shape (..., ...), dtype=float
+        """
+        mesh = self.mesh * factor
+        position = np.asarray(coord, dtype=float) * mesh - self.shift * factor
+        lower = np.floor(position).astype(int)
+        fraction = position - lower
+
+        values = 0.
+        for corner in np.ndindex(2, 2, 2):
+            index = (lower + corner) % mesh
+            share = np.prod(np.where(corner, fraction, 1 - fraction), axis=-1)
+            values = values + share.reshape(share.shape + (1,) * (grid.ndim - 3)) * grid[index[..., 0], index[..., 1], index[..., 2]]
+
+        return values
+
+
+    def plane(self, origin, axis1, axis2, resolution):
+        """
+        Regular grid of kpoints origin + s axis1 + t axis2 with s and t between -0.5 and 0.5
+        Output:
+        --------------------------
+        s, t: ndarray, shape (R), dtype=float
+        coord: ndarray, shape (R, R, 3), dtype=float
+            kpoints with the first axis along t and the second along s
+        """
+        s = np.linspace(-0.5, 0.5, resolution); t = np.linspace(-0.5, 0.5, resolution)
+        coord = np.asarray(origin, dtype=float) + s[None, :, None] * np.asarray(axis1, dtype=float) \
+            + t[:, None, None] * np.asarray(axis2, dtype=float)
+
+        return s, t, coord
+
+
+    def isolines(self, energies, origin, axis1, axis2, resolution=150):
+        """
+        Lines of constant energy of all bands on a plane
+        Input:
+        --------------------------
+        energies: ndarray, shape (L), dtype=float
+            energies of the lines in eV
+        origin, axis1, axis2: ndarray, shape (3), dtype=float
+            center and axes of the plane in fractional coordinates
+        resolution: int
+            number of points along each axis of the plane
+        Output:
+        --------------------------
+        lines: list
+            List of (energy, band, vertices) with vertices as ndarray, shape (V, 2) of s and t
+        surface: ndarray, shape (B, R, R), dtype=float
+            energies of the bands crossing any of the energies on the plane
+        bands: ndarray, shape (B), dtype=int
+            bands of the slice
+        """
+        if contour_generator is None:
+            raise ValueError('The constant energy lines need contourpy (installed with Matplotlib 3.6 or newer)')
+
+        energies = np.atleast_1d(np.asarray(energies, dtype=float))
+        bands = np.flatnonzero((self.energy.min(axis=(0, 1, 2)) <= energies.max()) & (self.energy.max(axis=(0, 1, 2)) >= energies.min()))
+
+        s, t, coord = self.plane(origin, axis1, axis2, resolution)
+        factor = max(min(self.refine, 128 // int(self.mesh.max())), 1)
+        fine = self.upsample(self.energy[..., bands], factor)
+        surface = np.moveaxis(self.interpolate(coord, fine, factor), -1, 0)
+
+        lines = []
+        for band, values in zip(bands, surface):
+            generator = contour_generator(x=s, y=t, z=values)
+            for energy in energies:
+                lines += [(energy, band, vertices) for vertices in generator.lines(energy) if len(vertices) > 1]
+
+        return lines, surface, bands
+
+
+    def character(self, vertices, band, origin, axis1, axis2):
+        """
+        Elemental or orbital DOS along a line of constant energy
+        Output:
+        --------------------------
+        projections: ndarray, shape (V, C), dtype=float
+        """
+        coord = np.asarray(origin, dtype=float) + vertices[:, :1] * np.asarray(axis1, dtype=float) \
+            + vertices[:, 1:] * np.asarray(axis2, dtype=float)
+
+        return self.interpolate(coord, self.projections[..., band, :])
+
+
+class DecimatedLineCollection(LineCollection):
+    """
+    Collection of all bands which is reduced to the pixel resolution of the axis before drawing
+    """
+
+    def __init__(self, kpoints, energy, colors=None, **kwargs):
+        """
+        Level of detail for the electronic band structure; on screen, every band is reduced to the minimum and
+        maximum energy per pixel column of the visible k-range, so extrema and band crossings are kept.
+        The full resolution is used when the figure is saved.
+        Input:
+        --------------------------
+        kpoints: ndarray, shape (N), dtype=float
+            Array of kpoints (increasing)
+        energy: ndarray, shape (M, N), dtype=float
+            Array of energies for M bands and N kpoints
+        colors: ndarray, shape (M, N, 4), dtype=float
+            RGBA color of each band and kpoint; if None, the color of the collection is used (default is None)
+        """
+        self.kpoints = np.asarray(kpoints, dtype=float)
+        self.energy = np.asarray(energy, dtype=float)
+        self.point_colors = colors
+        self.resolution = None
+
+        super().__init__([], **kwargs)
+
+
+    def full_segments(self):
+        """
+        Segments of all bands at full resolution
+        """
+        return self.polylines(self.kpoints, self.energy, self.point_colors is not None)
+
+
+    def polylines(self, k, e, split):
+        """
+        Combine kpoints and energies to one polyline per band or to single segments (if each segment has its own color)
+        Input:
+        --------------------------
+        k: ndarray, shape (M, N) or (N), dtype=float
+        e: ndarray, shape (M, N), dtype=float
+        split: Boolean
+            If True, return segments of two points
+        """
+        pts = np.stack(np.broadcast_arrays(k, e), axis=-1)
+
+        if split:
+            return np.stack([pts[:, :-1], pts[:, 1:]], axis=2).reshape(-1, 2, 2)
+
+        return list(pts)
+
+
+    def segment_colors(self, colors):
+        """
+        Color of each segment as the mean color of the two points
+        """
+        return (0.5 * (colors[:, :-1] + colors[:, 1:])).reshape(-1, 4)
+
+
+    def decimate(self, width):
+        """
+        Reduce the visible part of the bands to two points per pixel column
+        Input:
+        --------------------------
+        width: int
+            Number of pixel columns of the axis
+        """
+        x0, x1 = sorted(self.axes.get_xlim())
+        i0 = max(np.searchsorted(self.kpoints, x0, side='left') - 1, 0)
+        i1 = min(np.searchsorted(self.kpoints, x1, side='right') + 1, len(self.kpoints))
+        k = self.kpoints[i0:i1]; e = self.energy[:, i0:i1]
+
+        if len(k) <= 2 * width or x1 <= x0:
+            self.set_segments(self.polylines(k, e, self.point_colors is not None))
+            if self.point_colors is not None:
+                self.set_color(self.segment_colors(self.point_colors[:, i0:i1]))
+            return
+
+        column = np.clip(((k - x0) / (x1 - x0) * width).astype(int), -1, width)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(column)) + 1))
+        ends = np.append(starts[1:], len(k)) - 1
+
+        e_min = np.minimum.reduceat(e, starts, axis=1)
+        e_max = np.maximum.reduceat(e, starts, axis=1)
+        rising = e[:, starts] <= e[:, ends]
+
+        k_new = np.stack([k[starts], k[ends]], axis=-1).ravel()
+        e_new = np.stack([np.where(rising, e_min, e_max), np.where(rising, e_max, e_min)], axis=-1).reshape(len(e), -1)
+        self.set_segments(self.polylines(k_new, e_new, self.point_colors is not None))
+
+        if self.point_colors is not None:
+            counts = np.diff(np.append(starts, len(k)))
+            mean = np.add.reduceat(self.point_colors[:, i0:i1], starts, axis=1) / counts[None, :, None]
+            self.set_color(self.segment_colors(np.repeat(mean, 2, axis=1)))
+
+
+    def draw(self, renderer):
+        """
+        Decimate the bands for the screen and use full resolution for saved figures
+        """
+        if self.figure.canvas.is_saving():
+            if self.resolution != 'full':
+                self.set_segments(self.full_segments())
+                if self.point_colors is not None:
+                    self.set_color(self.segment_colors(self.point_colors))
+                self.resolution = 'full'
+
+        else:
+            view = (tuple(self.axes.get_xlim()), int(self.axes.bbox.width))
+            if view != self.resolution:
+                self.decimate(view[1])
+                self.resolution = view
+
+        super().draw(renderer)
+
+
+class BandInspector:
+    """
+    Show band index, wavevector, energy, and contributions of the band below the cursor
+    """
+
+    def __init__(self, canvas, ax, kpoints, energy, ticks, distance, projections=[], toolbar=None):
+        """
+        Hover readout of the electronic band structure; the bands are indexed by a sorted k-axis and
+        energies sorted per kpoint, so the lookup of the nearest band needs two binary searches.
+        The readout is drawn by blitting without redrawing the figure.
+        Input:
+        --------------------------
+        canvas: FigureCanvasTkAgg
+        ax: subplot of Matplotlib with the band structure
+        kpoints: ndarray, shape (N), dtype=float
+            Array of kpoints (increasing)
+        energy: ndarray, shape (M, N), dtype=float
+            Array of energies for M bands and N kpoints
+        ticks: List
+            List of labels of high-symmetry points
+        distance: List
+            List of positions of the high-symmetry points
+        projections: list, shape (P, 2)
+            List of (names, contribution) where contribution is an ndarray of shape (M, N, len(names))
+        toolbar: NavigationToolbar2Tk
+            No readout is shown while zooming or panning
+        """
+        self.canvas = canvas
+        self.ax = ax
+        self.kpoints = np.asarray(kpoints, dtype=float)
+        self.energy = np.asarray(energy, dtype=float)
+        self.ticks = ticks
+        self.distance = np.asarray(distance, dtype=float)
+        self.projections = projections
+        self.toolbar = toolbar
+        self.background = None
+
+        self.order = np.argsort(self.energy, axis=0)
+        self.sorted_energy = np.take_along_axis(self.energy, self.order, axis=0)
+        steps = np.diff(self.kpoints)
+        self.step = np.min(steps[steps > 0], initial=1.)
+
+        self.marker, = ax.plot([], [], 'o', color='k', markersize=6, animated=True)
+        self.annotation = ax.annotate('', xy=(0, 0), xytext=(12, 12), textcoords='offset points', fontsize=10,
+            bbox=dict(boxstyle='round', fc='white', alpha=0.9), animated=True, visible=False)
+
+        self.cids = [canvas.mpl_connect('draw_event', self.on_draw),
+            canvas.mpl_connect('motion_notify_event', self.on_move)]
+
+
+    def disconnect(self):
+        """
+        Remove the event handlers from the canvas
+        """
+        for cid in self.cids:
+            self.canvas.mpl_disconnect(cid)
+
+
+    def find(self, x, y):
+        """
+        Get the band and kpoint closest to a point of the plot
+        Input:
+        --------------------------
+        x: float
+            Position on the k-axis
+        y: float
+            Energy in eV
+        Output:
+        --------------------------
+        band: int
+            Index of the band
+        k: int
+            Index of the kpoint
+        """
+        k = np.clip(np.searchsorted(self.kpoints, x), 1, len(self.kpoints) - 1)
+        k -= x - self.kpoints[k - 1] < self.kpoints[k] - x
+
+        column = self.sorted_energy[:, k]
+        i = np.clip(np.searchsorted(column, y), 1, len(column) - 1)
+        i -= y - column[i - 1] < column[i] - y
+
+        return self.order[i, k], k
+
+
+    def k_label(self, x):
+        """
+        Label of the high-symmetry point at x or of the path between two high-symmetry points
+        """
+        if len(self.distance) == 0:
+            return ''
+
+        t = np.searchsorted(self.distance, x)
+        near = np.argmin(np.abs(self.distance - x))
+
+        if abs(self.distance[near] - x) < 0.5 * self.step:
+            return self.ticks[near]
+
+        if 0 < t < len(self.ticks):
+            return '{} - {}'.format(self.ticks[t - 1], self.ticks[t])
+
+        return ''
+
+
+    def text(self, band, k):
+        """
+        Text of the readout
+        """
+        lines = ['Band {}'.format(band + 1),
+            'k = {:.4f}  {}'.format(self.kpoints[k], self.k_label(self.kpoints[k])),
+            'E = {:.4f} eV'.format(self.energy[band, k])]
+
+        for names, contribution in self.projections:
+            lines.append('  '.join(['{} {:.2f}'.format(n, c) for n, c in zip(names, contribution[band, k])]))
+
+        return '\n'.join(lines)
+
+
+    def on_draw(self, event):
+        """
+        Store the background after the figure has been drawn
+        """
+        self.background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self.blit()
+
+
+    def on_move(self, event):
+        """
+        Update the readout when the cursor moves
+        """
+        if self.background is None:
+            return
+
+        active = event.inaxes is self.ax and (self.toolbar is None or not self.toolbar.mode)
+        if not active:
+            if self.annotation.get_visible():
+                self.annotation.set_visible(False); self.marker.set_data([], [])
+                self.blit()
+            return
+
+        band, k = self.find(event.xdata, event.ydata)
+        self.marker.set_data([self.kpoints[k]], [self.energy[band, k]])
+        self.annotation.xy = (self.kpoints[k], self.energy[band, k])
+        self.annotation.set_text(self.text(band, k))
+        self.annotation.set_visible(True)
+        self.blit()
+
+
+    def blit(self):
+        """
+        Draw marker and readout on top of the stored background
+        """
+        if self.background is None:
+            return
+
+        self.canvas.restore_region(self.background)
+        self.ax.draw_artist(self.marker)
+        self.ax.draw_artist(self.annotation)
+        self.canvas.blit(self.canvas.figure.bbox)
+
+
+class EntryItem:
+    """
+    Combine different tkinter items with Label items
+    """
+
+    def __init__(self, parent, name, row = 0, column = 1, padx = 10, pady = 6, width = 20, columnspan = 1, state = NORMAL, ipadx = 0, options = ['0']):
+        """
+        Combine Entry/Menu items with Label items
+        Input:
+        -------------------------------------
+        parent: class
+        name: str
+            Name of the Label
+        row: int
+            number of row
+        column: int
+            number of column
+        padx: int
+            space in x-direction of grid
+        pady: int
+            space in y-direction of grid
+        width: int
+            width of the Entry
+        columnspan: int
+            column span of Entry and Label
         state: NORMAL or DISABLED
         options: list
             List of options for OptionMenu
@@ -350,1256 +2959,2645 @@ class EntryItem:
         label: Label item
         menu: OptionMenu item
         """
-        self.parent = parent
-        self.name = name
-        self.row = row
-        self.column = column
-        self.padx = padx
-        self.pady = pady
-        self.width = width
-        self.columnspan = columnspan
-        self.state = state
-        self.ipadx = ipadx
-        self.options = options
-        self.initial_val = StringVar()
-        self.var = StringVar()
-        self.entry = Entry(self.parent, textvariable = self.var, state = self.state, width = self.width)
-        self.label = Label(self.parent, text = name, relief = RIDGE, anchor = 'w')
-        self.menu = OptionMenu(self.parent, self.initial_val, *self.options)
+        self.parent = parent
+        self.name = name
+        self.row = row
+        self.column = column
+        self.padx = padx
+        self.pady = pady
+        self.width = width
+        self.columnspan = columnspan
+        self.state = state
+        self.ipadx = ipadx
+        self.options = options
+        self.initial_val = StringVar()
+        self.var = StringVar()
+        self.entry = Entry(self.parent, textvariable = self.var, state = self.state, width = self.width)
+        self.label = Label(self.parent, text = name, relief = RIDGE, anchor = 'w')
+        self.menu = OptionMenu(self.parent, self.initial_val, *self.options)
+
+
+    def create_EntryItem(self, padx_label = 10, pady_label = 6, ipadx_label = 0):
+        """
+        Combine Label with Entry item next to each other
+        Input:
+        ------------------------------
+        padx_label: int
+            space in x-direction for the Label
+        pady_label: int
+            space in y-direction for the Label
+        ipadx_label: int
+            size of the Label
+        """
+        self.entry.grid(row = self.row, column = self. column, columnspan = self.columnspan, padx = self.padx, pady = self.pady, ipadx = self.ipadx)
+        self.label.grid(row = self.row, column = self.column - 1, columnspan = self.columnspan, padx = padx_label, pady = pady_label, ipadx = ipadx_label)
+
+
+    def set_name(self, new_name = 'NaN'):
+        """
+        Change the name of the Entry
+        Input:
+        ------------------
+        new_name: str
+            Name of the Label
+        """
+        self.var.set(new_name)
+
+
+    def get_name(self):
+        """
+        Get value of the Entry
+        """
+        return self.var.get()
+
+
+    def delete(self):
+        """
+        Delete an Entry
+        """
+        self.entry.delete(0, END)
+
+
+    def update(self, name):
+        """
+        Remove entry and insert a new entry with a new value
+        Input:
+        ----------------------
+        name: str
+            New value of Entry
+        """
+        self.delete()
+        self.entry.insert(0, name)
+        return
+
+
+class MainApplication:
+    """
+    Main window and functions to plot VASP data
+    """
+
+    def __init__(self, parent, *args, **kwargs):
+        self.parent = parent
+        self.parent.configure(bg = self._from_rgb((11, 165, 193)))
+        self.title = self.parent.title('VASP Electronic Band Structure App')
+        self.icon = self.parent.iconbitmap('icon_band.ico')
+        self.font_window = tkFont.Font(family='Helvetica', size= 10, weight='bold')
+
+        # Create Frame
+        self.input = Frame(self.parent, height = 308, width = 395, bg = self._from_rgb((11, 112, 141)))
+        self.input.grid(row = 0, column = 0, columnspan = 2, rowspan = 9, pady = (10, 5))
+        self.label_input = Label(self.parent, text = 'Input parameters')
+        self.label_input.grid(row = 0, column = 0, pady = (10, 5))
+        self.label_input['font'] = self.font_window
+        self.output = Frame(self.parent, height = 302, width = 395, bg = self._from_rgb((175, 188, 205)))
+        self.output.grid(row = 9, column = 0, columnspan = 2, rowspan = 9, pady = (0, 5))
+        self.label_pDOS = Label(self.parent, text = 'Partial Density of States')
+        self.label_pDOS.grid(row = 9, column = 0, pady = (0, 5))
+        self.label_pDOS['font'] = self.font_window
+
+        # Create MenuBar
+        my_Menu = Menu(self.parent)
+        self.parent.config(menu = my_Menu)
+
+        file_menu = Menu(my_Menu)
+        my_Menu.add_cascade(label = 'File', menu = file_menu)
+        file_menu.add_command(label = 'New', command = self.clear)
+        file_menu.add_command(label = 'Open File', command = self.open_file)
+        file_menu.add_command(label = 'Open Session', command = self.open_session)
+        file_menu.add_command(label = 'Save Session', command = self.save_session)
+        file_menu.add_command(label = 'Compare Calculations', command = self.compare_window)
+        file_menu.add_command(label = 'Export Figure', command = self.export_window)
+        file_menu.add_separator()
+        file_menu.add_command(label = 'Exit', command = self.close_program)
+
+        edit_menu = Menu(my_Menu)
+        my_Menu.add_cascade(label = 'Edit', menu = edit_menu)
+        edit_menu.add_command(label = 'Edit Graph', command = self.Edit_graph)
+        edit_menu.add_command(label = 'Projection Groups', command = self.groups_window)
+
+        kpoint_menu = Menu(my_Menu)
+        my_Menu.add_cascade(label = 'KPOINTS', menu = kpoint_menu)
+        kpoint_menu.add_command(label='Create KPOINTS', command=self.create_kpoint)
+
+        self.plot_menu = Menu(my_Menu)
+        my_Menu.add_cascade(label = 'Plot', menu = self.plot_menu)
+        self.plot_menu.add_command(label='Plot VASP', command=self.plot_electronic_structure)
+        self.plot_menu.add_command(label='Watch PROCAR_band', command=self.watch_band)
+        self.plot_menu.add_command(label='Interpolate Bands', command=self.interpolation_window)
+        self.plot_menu.add_command(label='Transport', command=self.transport_window)
+        self.plot_menu.add_command(label='Fermi Level', command=self.fermi_window)
+        self.plot_menu.add_command(label='Joint DOS', command=self.joint_window)
+        self.plot_menu.add_command(label='Effective Masses', command=self.masses_window)
+        self.masses_var = BooleanVar(); self.masses_var.set(False)
+        self.plot_menu.add_checkbutton(label='Effective Mass Fits', variable=self.masses_var, command=self.toggle_masses)
+        self.plot_menu.add_command(label='Constant Energy Surfaces', command=self.surface_window)
+
+        help_menu = Menu(my_Menu)
+        my_Menu.add_cascade(label = 'Help', menu = help_menu)
+        help_menu.add_command(label = 'Welcome', command = self.welcome)
+        help_menu.add_command(label = 'Documentations', command = self.documentary)
+        help_menu.add_command(label = 'Performance', command = self.performance)
+        help_menu.add_separator()
+        help_menu.add_command(label = 'About', command = self.about)
+
+        self.app = FullScreenApp(self.parent)
+
+        # Create Plot Data
+        self.font_size_band_x = DoubleVar(); self.font_size_band_y = DoubleVar()
+        self.font_size_band_ticks = DoubleVar(); self.font_size_band_energy = DoubleVar()
+        self.font_size_DOS_x = DoubleVar(); self.font_size_DOS_y = DoubleVar()
+        self.font_size_DOS_number = DoubleVar()
+        self.size_x = DoubleVar(); self.size_y = DoubleVar()
+        self.size_x_space = DoubleVar(); self.size_x_length = DoubleVar()
+        self.size_y_space = DoubleVar(); self.size_y_length = DoubleVar()
+
+        self.filename = EntryItem(self.parent, name = 'Filename', row = 1, state=DISABLED)
+        self.filename.create_EntryItem(ipadx_label = 45)
+        self.minE = EntryItem(self.parent, name = 'min. Energy / eV', row = 2)
+        self.minE.create_EntryItem(ipadx_label = 26); self.minE.initial_val = DoubleVar()
+        self.maxE = EntryItem(self.parent, name = 'max. Energy / eV', row = 3)
+        self.maxE.create_EntryItem(ipadx_label = 26); self.maxE.initial_val = DoubleVar()
+        self.Eres = EntryItem(self.parent, name = 'Energy resolution / eV', row = 4)
+        self.Eres.create_EntryItem(ipadx_label = 12); self.Eres.initial_val = DoubleVar()
+        self.ymax = EntryItem(self.parent, name = 'maximum DOS', row = 5)
+        self.ymax.create_EntryItem(ipadx_label = 29); self.ymax.set_name('2')
+        self.budget = EntryItem(self.parent, name = 'Memory budget / MB', row = 6)
+        self.budget.create_EntryItem(ipadx_label = 17); self.budget.set_name('1024')
+        self.stream_var = BooleanVar(); self.stream_var.set(False)
+        self.stream = Checkbutton(self.parent, text='Read PROCAR_DOS in chunks (dense k-meshes)', variable=self.stream_var)
+        self.stream.grid(row=7, column=0, columnspan=2, ipadx=10)
+
+        self.pDOS = IntVar(); self.pDOS.set(1); self.pDOS_E_var = BooleanVar(); self.pDOS_O_var = BooleanVar()
+        self.label_energy_var = BooleanVar(); self.label_ticks_var = BooleanVar()
+        self.label_DOS_var = BooleanVar(); self.label_energy_DOS_var = BooleanVar()
+        self.grid_energy_var = BooleanVar(); self.grid_DOS_var = BooleanVar()
+        self.ticks_energy_var = BooleanVar(); self.ticks_wavevector_var = BooleanVar()
+        self.ticks_energy_DOS_var = BooleanVar(); self.ticks_DOS_var = BooleanVar()
+        self.DOS_label = Label(self.parent, text='Choose DOS to plot')
+        self.DOS_label.grid(row=10, column=0, ipadx=30)
+        self.TotalDOS = Radiobutton(self.parent, text="Total DOS", variable=self.pDOS, value=1)
+        self.TotalDOS.grid(row = 10, column = 1, ipadx=25)
+        self.partialDOS = Radiobutton(self.parent, text="Elemental DOS", variable=self.pDOS, value=2)
+        self.partialDOS.grid(row = 11, column = 1, ipadx=12)
+        self.orbitalDOS = Radiobutton(self.parent, text="Orbital DOS", variable=self.pDOS, value=3)
+        self.orbitalDOS.grid(row = 12, column = 1, ipadx=20)
+        self.pDOS_E = Checkbutton(self.parent, text='Elemental DOS on Electronic Band Structure', variable=self.pDOS_E_var)
+        self.pDOS_E.grid(row=13, column=0, columnspan=2, ipadx=20)
+        self.pDOS_O = Checkbutton(self.parent, text='Orbital DOS on Electronic Band Structure', variable=self.pDOS_O_var)
+        self.pDOS_O.grid(row=14, column=0, columnspan=2, ipadx=28)
+        self.pDOS_E_var.trace('w', self.check_orbital); self.pDOS_O_var.trace('w', self.check_elemental)
+
+        self.load_button = Button(self.parent, text='Load', command=self.load_electronic_properties, state=DISABLED)
+        self.load_button.grid(row=15, column=0, pady=10, ipadx=20)
+        self.load_button['font'] = self.font_window
+        self.plot_button = Button(self.parent, text='Plot', command=self.plot_electronic_structure, state=DISABLED)
+        self.plot_button.grid(row=15, column=1,  pady=10, ipadx=20)
+        self.plot_button['font'] = self.font_window
+
+        self.set_dpi = EntryItem(self.parent, name = 'dpi', row = 14, column=8)
+        self.set_dpi.create_EntryItem(ipadx_label=40)
+        self.save_figure_button = Button(self.parent, text='Save', command=self.save_electronic_structure, state=DISABLED)
+        self.save_figure_button.grid(row=14, column=9, columnspan=2, pady=10, ipadx=28)
+        self.save_figure_button['font'] = self.font_window
+
+        self.save_fig_csv_button = Button(self.parent, text='Save as .csv', command=self.save_csv_file, state=DISABLED)
+        self.save_fig_csv_button.grid(row=15, column=9, columnspan=2, pady=10, ipadx=4)
+        self.save_fig_csv_button['font'] = self.font_window
+
+        self.font_options = [
+            'Times New Roman',
+            'Arial',
+            'Gabriola',
+            'Courier New',
+            'Cambria',
+            'Calibri',
+        ]
+        self.initial_font = StringVar()
+
+        self.color_2plot_options = [
+            'red-blue',
+            'red-green',
+            'green-blue'
+        ]
+        self.initial_color_2plot = StringVar()
+        self.foldername = ''
+        self.projection_groups = list()
+        self.watching = False
+        self.poll_interval = 1000
+        self.redraw_interval = 5.
+
+        self.initial_parameters()
+        self.create_empty_plot()
+
+
+    def check_orbital(self, *args):
+        """
+        If check elemental, turn off orbital
+        """
+        if self.pDOS_O_var.get() and self.pDOS_E_var.get():
+            self.pDOS_O_var.set(False)
+
+
+    def check_elemental(self, *args):
+        """
+        If check orbital, turn off elemental
+        """
+        if self.pDOS_E_var.get() and self.pDOS_O_var.get():
+            self.pDOS_E_var.set(False)
+
+
+    default_settings = {
+        'font' : 'Times New Roman', 'color_2plot' : 'red-blue',
+        'size_band_x' : 16, 'size_band_y' : 16, 'size_band_ticks' : 14, 'size_band_energy' : 16,
+        'size_DOS_x' : 16, 'size_DOS_y' : 16, 'size_DOS_ticks' : 16,
+        'figure_size_x' : 8.5, 'figure_size_y' : 5., 'figure_space_x' : 0.18, 'figure_length_x' : 0.78,
+        'figure_space_y' : 0.23, 'figure_length_y' : 0.68,
+        'label_energy' : True, 'label_DOS' : True, 'label_ticks' : True, 'label_energy_DOS' : False,
+        'grid_energy' : True, 'grid_DOS' : True,
+        'ticks_energy' : True, 'ticks_wavevector' : True, 'ticks_energy_DOS' : True, 'ticks_DOS' : True,
+        'color' : [0, 0, 0], 'color_hex' : '#000000',
+    }
+
+    # Tkinter variables and entries which apply_settings and draw_figure read; HeadlessFigure replaces them by stand-ins
+    figure_variables = ['font_size_band_x', 'font_size_band_y', 'font_size_band_ticks', 'font_size_band_energy', 'font_size_DOS_x',
+        'font_size_DOS_y', 'font_size_DOS_number', 'size_x', 'size_y', 'size_x_space', 'size_x_length', 'size_y_space',
+        'size_y_length', 'label_energy_var', 'label_energy_DOS_var', 'label_ticks_var', 'label_DOS_var', 'grid_energy_var',
+        'grid_DOS_var', 'ticks_energy_var', 'ticks_wavevector_var', 'ticks_energy_DOS_var', 'ticks_DOS_var', 'initial_font',
+        'initial_color_2plot', 'minE', 'maxE', 'Eres', 'ymax', 'pDOS', 'pDOS_E_var', 'pDOS_O_var', 'masses_var']
+
+    def initial_parameters(self):
+        """
+        Initial parameters for the plot, if '~default.json' exists parameters are taking from this file
+        """
+
+        if '~default.json' in os.listdir():
+            with open('~default.json') as d:
+                self.apply_settings(json.load(d))
+
+        else:
+            self.apply_settings(self.default_settings)
+
+        self.minE.set_name(-5); self.maxE.set_name(5)
+        self.Eres.set_name(0.05); self.pDOS_E_var.set(False)
+        self.pDOS_E.config(state=DISABLED); self.pDOS_O.config(state=DISABLED)
+        self.set_dpi.set_name('100')
+
+
+    def apply_settings(self, dic):
+        """
+        Use plot settings from '~default.json' or a session
+        Input:
+        --------------------------------
+        dic: dictionary
+            plot settings from plot_settings
+        """
+        self.font_size_band_x.set(dic['size_band_x']); self.font_size_band_y.set(dic['size_band_y'])
+        self.font_size_band_ticks.set(dic['size_band_ticks']); self.font_size_band_energy.set(dic['size_band_energy'])
+        self.font_size_DOS_x.set(dic['size_DOS_x']); self.font_size_DOS_y.set(dic['size_DOS_y'])
+        self.font_size_DOS_number.set(dic['size_DOS_ticks'])
+        self.size_x.set(dic['figure_size_x']); self.size_y.set(dic['figure_size_y'])
+        self.size_x_space.set(dic['figure_space_x']); self.size_x_length.set(dic['figure_length_x'])
+        self.size_y_space.set(dic['figure_space_y']); self.size_y_length.set(dic['figure_length_y'])
+        self.label_energy_var.set(dic['label_energy']); self.label_energy_DOS_var.set(dic['label_energy_DOS'])
+        self.label_ticks_var.set(dic['label_ticks']); self.label_DOS_var.set(dic['label_DOS'])
+        self.grid_energy_var.set(dic['grid_energy']); self.grid_DOS_var.set(dic['grid_DOS'])
+        self.ticks_energy_var.set(dic['ticks_energy']); self.ticks_wavevector_var.set(dic['ticks_wavevector'])
+        self.ticks_energy_DOS_var.set(dic['ticks_energy_DOS']); self.ticks_DOS_var.set(dic['ticks_DOS'])
+        self.color = np.array(dic['color']); self.hx = dic['color_hex']
+        for i in range(len(self.font_options)):
+            if dic['font'] == self.font_options[i]:
+                self.initial_font.set(self.font_options[i])
+        for i in range(len(self.color_2plot_options)):
+            if dic['color_2plot'] == self.color_2plot_options[i]:
+                self.initial_color_2plot.set(self.color_2plot_options[i])
+
+
+    def create_empty_plot(self):
+        """
+        Create an empty plot using default values
+        """
+
+        plt.rcParams["font.family"] = self.initial_font.get()
+        plt.rcParams.update({'font.size': self.font_size_band_energy.get()})
+
+        self.fig = Figure(figsize= (self.size_x.get(), self.size_y.get()), dpi = 100)
+        self.canvas = FigureCanvasTkAgg(self.fig, master = self.parent)
+        self.canvas.draw()
+        self.plot_widget = self.canvas.get_tk_widget()
+        self.plot_widget.grid(row = 1, column = 3, columnspan=11, rowspan = 13)
+
+        gs = self.fig.add_gridspec(1, 2, width_ratios=[2, 1,])
+        gs.update(left=0.1, right=0.95, wspace=0.15)
+        self.ax1 = self.fig.add_subplot(gs[0])
+        self.ax2 = self.fig.add_subplot(gs[1])
+
+        gs2 = self.fig.add_gridspec(2, 2, width_ratios=[1, 10,], height_ratios=[1, 8,])
+        gs2.update(bottom=0.3, top =0.95)
+        self.ax3 = self.fig.add_subplot(gs2[0])
+        self.ax3.axis('off')
+        if self.label_ticks_var.get():
+            self.ax1.set_xlabel('Wavevector $k$', fontsize=self.font_size_band_x.get(), family=self.initial_font.get())
+        if self.label_energy_var.get():
+            self.ax1.set_ylabel('Energy / eV', fontsize=self.font_size_band_y.get(), family=self.initial_font.get())
+        if self.grid_energy_var.get():
+            self.ax1.grid()
+        self.ax1.set_ylim(float(self.minE.get_name()), float(self.maxE.get_name()))
+        self.ax1.set_xlim(0, 1)
+        self.ax1.hlines(y=0, xmin=0, xmax=1, color="k", lw=1.5)
+        self.ax1.tick_params(axis='x', which='major', labelsize=self.font_size_band_ticks.get())
+        self.ax2.set_ylim(float(self.minE.get_name()), float(self.maxE.get_name()))
+        self.ax2.set_xlim(0, 1)
+        if self.label_DOS_var.get():
+            self.ax2.set_xlabel('Density of States', fontsize=self.font_size_DOS_x.get(), family=self.initial_font.get())
+        if self.label_energy_DOS_var.get():
+            self.ax2.set_ylabel('Energy / eV', fontsize=self.font_size_DOS_number.get(), family=self.initial_font.get())
+        if self.grid_DOS_var.get():
+            self.ax2.grid()
+        self.ax2.hlines(y=0, xmin=0, xmax=1, color='k', lw=1.5)
+        self.ax2.tick_params(axis='x', which='major', labelsize=self.font_size_DOS_number.get())
+        if not self.ticks_energy_var.get():
+            self.ax1.set_yticklabels([])
+        if not self.ticks_wavevector_var.get():
+            self.ax1.set_xticklabels([])
+        if not self.ticks_energy_DOS_var.get():
+            self.ax2.set_yticklabels([])
+        if not self.ticks_DOS_var.get():
+            self.ax2.set_xticklabels([])
+
+        toolbar_frame = Frame(self.parent) 
+        toolbar_frame.grid(row=16,column=2,columnspan=4) 
+        toolbar = NavigationToolbar2Tk(self.canvas, toolbar_frame)
+        toolbar.update()
+
+
+    def _from_rgb(self, rgb):
+        """
+        translates an rgb tuple of int to a tkinter friendly color code
+        """
+        return "#%02x%02x%02x" % rgb
+
+
+    def clear(self):
+        """
+        Default values to start new project
+        """
+        self.stop_watch()
+        self.initial_parameters()
+        self.projection_groups = list()
+        self.calculations = None
+        self.plot_widget.grid_forget()
+        self.create_empty_plot()
+        self.pDOS_E_var.set(False); self.pDOS_O_var.set(False)
+        self.pDOS_E.config(state=DISABLED); self.pDOS_O.config(state=DISABLED)
+        self.load_button.config(state=DISABLED); self.plot_button.config(state=DISABLED)
+
+
+    def create_kpoint(self):
+        """
+        Create KPOINTS file
+        """
+
+        self.KPoints = Toplevel()
+        self.KPoints.configure(bg = self._from_rgb((11, 165, 193)))
+        self.KPoints.geometry("700x650")
+        self.KPoints.iconbitmap('icon_band.ico')
+        self.KPoints.grab_set()
+
+        self.crystal_options = [
+            'Triclinic, primitive, aP',
+            'Monoclinic, primitive, mP',
+            'Monoclinic, C-centered, mS',
+            'Orthorhombic, primitive, oP',
+            'Orthorhombic, face-centered, oF',
+            'Orthorhombic, body-centered, oI',
+            'Orthorhombic, C-centered, oS',
+            'Tetragonal, primitive, tP',
+            'Tetragonal, body-centered, tI',
+            'Hexagonal, primitive, hP',
+            'Rhombohedral, primitive, hR',
+            'Cubic, primitive, cP',
+            'Cubic, face-centered, cF',
+            'Cubic, body-centered, cI'
+        ]
+        self.initial_crystal = StringVar(); self.initial_crystal.set(self.crystal_options[0])
+        self.crystal_menu = OptionMenu(self.KPoints, self.initial_crystal, *self.crystal_options)
+        self.crystal_menu.grid(row = 0, column = 1, padx = 10, pady = 10)
+        self.crystal_label = Label(self.KPoints, text = 'Crystal System', relief = RIDGE, anchor = 'w')
+        self.crystal_label.grid(row = 0, column = 0, padx = 10, pady = 10, ipadx = 32)
+        self.lattice_a = EntryItem(self.KPoints, name = 'Lattice parameter a / Ang', row = 1)
+        self.lattice_a.create_EntryItem(ipadx_label = 5); self.lattice_a.initial_val = DoubleVar(); self.lattice_a.set_name(1)
+        self.lattice_b = EntryItem(self.KPoints, name = 'Lattice parameter b / Ang', row = 2)
+        self.lattice_b.create_EntryItem(ipadx_label = 5); self.lattice_b.initial_val = DoubleVar(); self.lattice_b.set_name(1)
+        self.lattice_c = EntryItem(self.KPoints, name = 'Lattice parameter c / Ang', row = 3)
+        self.lattice_c.create_EntryItem(ipadx_label = 5); self.lattice_c.initial_val = DoubleVar(); self.lattice_c.set_name(1)
+        self.lattice_alpha = EntryItem(self.KPoints, name = 'Alpha / deg', row = 4)
+        self.lattice_alpha.create_EntryItem(ipadx_label = 41); self.lattice_alpha.initial_val = DoubleVar(); self.lattice_alpha.set_name(90)
+        self.lattice_beta = EntryItem(self.KPoints, name = 'Beta / deg', row = 5)
+        self.lattice_beta.create_EntryItem(ipadx_label = 45); self.lattice_beta.initial_val = DoubleVar(); self.lattice_beta.set_name(90)
+        self.lattice_gamma = EntryItem(self.KPoints, name = 'Gamma / deg', row = 6)
+        self.lattice_gamma.create_EntryItem(ipadx_label = 36); self.lattice_gamma.initial_val = DoubleVar(); self.lattice_gamma.set_name(90)
+
+        self.minimum_d = EntryItem(self.KPoints, name = 'Minimum # of points', row = 7)
+        self.minimum_d.create_EntryItem(ipadx_label = 17); self.minimum_d.initial_val = DoubleVar(); self.minimum_d.set_name(10)
+
+        self.create_list_button = Button(self.KPoints, text='Create List of High-Symmetry Points', command=self.create_list)
+        self.create_list_button.grid(row=8, column=0, columnspan=2, pady=10, ipadx=4)
+        self.create_list_button['font'] = self.font_window
+
+        self.create_kpoints_button = Button(self.KPoints, text='Create KPOINTS file', command=self.create_kpoints, state=DISABLED)
+        self.create_kpoints_button.grid(row=9, column=0, columnspan=2, pady=10, ipadx=4)
+        self.create_kpoints_button['font'] = self.font_window
+
+        self.close_kpoints_button = Button(self.KPoints, text='Close', command=self.close_kpoints)
+        self.close_kpoints_button.grid(row=10, column=0, columnspan=2, pady=10, ipadx=4)
+        self.close_kpoints_button['font'] = self.font_window
+
+        self.Check_path_button = list(); self.path_var = list()
+        self.kpt_nmb = EntryItem(self.KPoints, 'Number of Kpts', column=4, state=DISABLED)
+
+
+    path_cache = {}
+
+    def create_list(self):
+        """
+        Create paths between high-symmetry points to choose from
+        """
+
+        for c in self.Check_path_button:
+            c.destroy()
+        self.Check_path_button = list(); self.path_var = list()
+
+        self.create_kpoints_button.config(state=NORMAL)
+
+        self.path_key = (self.initial_crystal.get(), float(self.lattice_a.get_name()), float(self.lattice_b.get_name()),
+            float(self.lattice_c.get_name()), float(self.lattice_alpha.get_name()), float(self.lattice_beta.get_name()),
+            float(self.lattice_gamma.get_name()), int(self.minimum_d.get_name()))
+
+        self.label_Path = Label(self.KPoints, text = 'KPoint_Path')
+        self.label_Path.grid(row = 0, column = 3, columnspan=2, pady = (10, 5))
+        self.label_Path['font'] = self.font_window
+
+        Points, Path, self.List_data = self.path_segments(self.path_key)
+
+        nmb = 1
+        for p, n in zip(Path, self.List_data):
+            self.path_var.append(BooleanVar())
+            self.Check_path_button.append(Checkbutton(self.KPoints, text='{} --> {}  ({})'.format(p[0], p[1], n), variable=self.path_var[-1]))
+            self.Check_path_button[-1].grid(row=nmb, column=3, columnspan=2, ipadx = 20, pady=10); self.path_var[-1].set(True)
+            nmb += 1
+
+        self.kpt_nmb.row = nmb
+        self.kpt_nmb.create_EntryItem(ipadx_label=10)
+
+        if hasattr(self, 'path_preview'):
+            self.path_preview.destroy()
+        self.path_preview = Label(self.KPoints, text = '', anchor = 'w')
+        self.path_preview.grid(row = nmb + 1, column = 3, columnspan = 2, pady = 10)
+
+        self.click_path()
+
+        for var in self.path_var:
+            var.trace('w', self.click_path)
+
+
+    def path_segments(self, key):
+        """
+        High-symmetry points, paths, and number of kpoints of each path; the results are cached for each lattice
+        Input:
+        --------------------------
+        key: tuple
+            crystal system, lattice parameters a, b, c in Ang, angles alpha, beta, gamma in deg, and minimum number of points
+        Output:
+        --------------------------
+        Points: dictionary
+            Dictionary of high-symmetries point in the Brillouin zone
+        Path: list, shape (N, 2)
+            List of all paths between high-symmetry points
+        data: list, shape (N)
+            number of kpoints of each path
+        """
+        if key not in self.path_cache:
+            crystal, a, b, c, alpha, beta, gamma, factor = key
+            kpts = K_points(ibrav=crystal, lattice_a=a, lattice_b=b, lattice_c=c, alpha=alpha, beta=beta, gamma=gamma, factor=factor)
+            Points, Path = kpts.Kpoint_path()
+
+            reciprocal = self.reciprocal_lattice(crystal, a, b, c, alpha, beta, gamma)
+            self.path_cache[key] = (Points, Path, self.point_counts(Path, Points, reciprocal, factor))
+
+        return self.path_cache[key]
+
+
+    def get_new_path(self):
+        """
+        Create a new path from chosen high-symmetry points
+        Output:
+        --------------------------
+        Points: dictionary
+            Dictionary of high-symmetries point in the Brillouin zone
+        New_path: list, shape (N, 2)
+            List of chosen paths
+        data: list, shape (N)
+            number of kpoints of each chosen path
+        """
+        Points, Path, data = self.path_segments(self.path_key)
+        chosen = [i for i in range(len(self.path_var)) if self.path_var[i].get()]
+
+        return Points, [Path[i] for i in chosen], [data[i] for i in chosen]
+
+
+    def click_path(self, *args):
+        """
+        Update the number of kpoints and the preview of the chosen path from the cached paths
+        """
+        Points, New_path, data = self.get_new_path()
+
+        self.kpt_nmb.set_name(sum(data))
+
+        preview = ''
+        for p in New_path:
+            if preview == '':
+                preview = p[0]
+            elif preview.split('-')[-1] != p[0]:
+                preview += ' | ' + p[0]
+            preview += '-' + p[1]
+
+        self.path_preview.config(text = preview.replace('\\', ''))
+
+
+    # primitive vectors (rows) in units of the conventional vectors of the centred lattices (Setyawan and Curtarolo)
+    centring = {
+        'mS': [[0.5, 0.5, 0], [-0.5, 0.5, 0], [0, 0, 1]],
+        'oS': [[0.5, -0.5, 0], [0.5, 0.5, 0], [0, 0, 1]],
+        'oF': [[0, 0.5, 0.5], [0.5, 0, 0.5], [0.5, 0.5, 0]],
+        'cF': [[0, 0.5, 0.5], [0.5, 0, 0.5], [0.5, 0.5, 0]],
+        'oI': [[-0.5, 0.5, 0.5], [0.5, -0.5, 0.5], [0.5, 0.5, -0.5]],
+        'tI': [[-0.5, 0.5, 0.5], [0.5, -0.5, 0.5], [0.5, 0.5, -0.5]],
+        'cI': [[-0.5, 0.5, 0.5], [0.5, -0.5, 0.5], [0.5, 0.5, -0.5]],
+    }
+
+    def reciprocal_lattice(self, crystal, a, b, c, alpha, beta, gamma):
+        """
+        Reciprocal lattice vectors of the primitive cell, the basis of the coordinates of the high-symmetry points
+        Input:
+        --------------------------
+        crystal: str
+            one of crystal_options, the Bravais lattice is given by the last two letters
+        a, b, c: float
+            lattice parameters of the conventional cell in Ang (hR: a of the rhombohedral cell)
+        alpha, beta, gamma: float
+            angles in deg (hR: alpha of the rhombohedral cell)
+        Output:
+        --------------------------
+        reciprocal: ndarray, shape (3, 3), dtype=float
+            reciprocal lattice vectors b1, b2, b3 (rows) in 1/Ang including 2 pi
+        """
+        bravais = crystal.split(',')[-1].strip()
+        if bravais == 'hR':
+            b = c = a; beta = gamma = alpha
+
+        alpha, beta, gamma = np.radians([alpha, beta, gamma])
+        cx = np.cos(beta)
+        cy = (np.cos(alpha) - np.cos(beta) * np.cos(gamma)) / np.sin(gamma)
+
+        lattice = np.array([
+            [a, 0, 0],
+            [b * np.cos(gamma), b * np.sin(gamma), 0],
+            [c * cx, c * cy, c * np.sqrt(1 - cx**2 - cy**2)]])
+        lattice = np.asarray(self.centring.get(bravais, np.eye(3))) @ lattice
+
+        return 2 * np.pi * np.linalg.inv(lattice).T
+
+
+    def point_counts(self, Path, Points, reciprocal, factor):
+        """
+        Number of kpoints of each path from the distances in reciprocal space;
+        the shortest path gets the minimum number of points and all other paths the same density
+        Input:
+        --------------------------
+        Path: list, shape (N, 2)
+            List of paths between high-symmetry points, N is the number of paths
+        Points: dictionary; keys: 'point' (Point of high-symmetry point), 'Sym' (Symbol of the high-symmetry point)
+            Dictionary of high-symmetries point in the Brillouin zone
+        reciprocal: ndarray, shape (3, 3), dtype=float
+            reciprocal lattice vectors from reciprocal_lattice
+        factor: int
+            minimum number of points
+        Output:
+        --------------------------
+        data: list, shape (N)
+            number of kpoints of each path including both high-symmetry points
+        """
+        if len(Path) == 0:
+            return []
+
+        start = np.array([Points[p[0]]['point'] for p in Path], dtype=float)
+        end = np.array([Points[p[1]]['point'] for p in Path], dtype=float)
+        length = np.linalg.norm((end - start) @ reciprocal, axis=1)
+
+        shortest = length[length > 0].min() if np.any(length > 0) else 1.
+        counts = np.rint(factor * length / shortest)
+
+        return [int(x) for x in np.maximum(counts, 2)]
+
+
+    def create_list_points(self, New_Path, Points, data):
+        """
+        Write list of kpoints for KPOINTS file; the kpoints of all paths are computed and formatted at once
+        Input:
+        --------------------------
+        New_path: list, shape (N, 2)
+            List of chosen path between high-symmetry points, N is the number of paths
+        Points: dictionary; keys: 'point' (Point of high-symmetry point), 'Sym' (Symbol of the high-symmetry point)
+            Dictionary of high-symmetries point in the Brillouin zone
+        data: List, shape (N)
+            number of kpoints of each path
+        Output:
+        --------------------------
+        list_kpts: str
+            lines of the kpoints, paths are separated by an empty line
+        """
+        data = np.asarray(data, dtype=int)
+        start = np.array([Points[p[0]]['point'] for p in New_Path], dtype=float)
+        end = np.array([Points[p[1]]['point'] for p in New_Path], dtype=float)
+
+        first = np.concatenate(([0], np.cumsum(data)[:-1]))
+        last = first + data - 1
+        path = np.repeat(np.arange(len(data)), data)
+        step = (np.arange(data.sum()) - first[path]) / (data[path] - 1)
+
+        kpts = start[path] + (end - start)[path] * step[:, None]
+
+        label = np.full(data.sum(), '', dtype=object)
+        label[first] = ['  {} '.format(Points[p[0]]['Sym']) for p in New_Path]
+        label[last] = ['  {} \n'.format(Points[p[1]]['Sym']) for p in New_Path]
+
+        rows = np.empty((data.sum(), 4), dtype=object)
+        rows[:, :3] = kpts; rows[:, 3] = label
+
+        return ('%.8f %.8f %.8f     1 %s\n' * len(rows)) % tuple(rows.ravel())
+
+
+    def create_kpoints(self):
+        """
+        Create KPOINTS file which is used to calculate the electronic band structure
+        """
+        foldername_kpts = filedialog.askdirectory()
+        Points, New_path, List_data = self.get_new_path()
+
+        with open(foldername_kpts + '//KPOINTS', 'w') as fil:
+            fil.write('Electronic band structure of {} \n{} \nReciprocal \n'.format(self.initial_crystal.get(), sum(List_data)) +
+                self.create_list_points(New_path, Points, List_data))
+
+
+    def close_kpoints(self):
+        """
+        Close the kpoint window
+        """
+        answer = messagebox.askokcancel('Exit?', 'Are you sure you want to exit?', icon='warning')
+
+        if answer:
+            self.KPoints.destroy()
+        else:
+            return
+
+
+    def open_file(self):
+        """
+        Open folder which needs to include CONTCAR, KPOINTS, PROCAR_band, and (optional) PROCAR_DOS files
+        """
+        self.clear()
+        self.foldername = filedialog.askdirectory()
+
+        if self.foldername == '':
+            return
+
+        if set(Calculation.required_files).issubset(set(os.listdir(self.foldername))):
+            self.filename.set_name(self.foldername.split('/')[-1])
+            self.create_empty_plot()
+
+        else:
+            messagebox.showerror(message = 'Folder needs to include CONTCAR, KPOINTS, PROCAR_band, and (optional) PROCAR_DOS from VASP! ' +
+            'Please label them as stated.')
+            return
+
+        with open(self.foldername + '/CONTCAR') as con:
+            contcar = con.readlines()
+
+        self.cmp = contcar[5].split()
+
+        self.load_button.config(state=NORMAL)
+
+
+    def save_session(self):
+        """
+        Save the loaded data, the energy range, the projections, and all plot settings into a session folder
+        """
+        if self.plot_button['state'] == DISABLED:
+            messagebox.showerror(message = 'Please load the data first!')
+            return
+
+        session = filedialog.asksaveasfilename(defaultextension='.session', filetypes=[('Session', '*.session')])
+
+        if session == '':
+            return
+
+        settings = {
+            'plot': self.plot_settings(),
+            'energy': [self.minE.get_name(), self.maxE.get_name(), self.Eres.get_name()],
+            'pDOS_elements': self.pDOS_E_var.get(), 'pDOS_orbitals': self.pDOS_O_var.get(),
+            'dpi': self.set_dpi.get_name(), 'pDOS': self.pDOS.get(), 'ymax': self.ymax.get_name(), 'masses': self.masses_var.get(),
+        }
+
+        self.save_fig_csv_button.config(state=DISABLED)
+        self.run_in_background(self.write_session, (self.calc, session, settings), self.export_finished)
+
+
+    def write_session(self, calc, session, settings):
+        """
+        Write the arrays and the settings of a session (runs in a worker thread); everything is written into a
+        temporary folder first which then replaces the session, so no stale arrays are left and the files
+        memory-mapped by an open session are never overwritten
+        """
+        session = os.path.abspath(session)
+        temporary = tempfile.mkdtemp(prefix='.session_', dir=os.path.dirname(session))
+
+        try:
+            settings['calculation'] = calc.save(temporary)
+            with open(temporary + '/session.json', 'w') as fil:
+                json.dump(settings, fil, indent=1)
+        except:
+            shutil.rmtree(temporary, ignore_errors=True)
+            raise
+
+        if os.path.exists(session):
+            os.replace(session, temporary + '.old')
+        os.replace(temporary, session)
+        shutil.rmtree(temporary + '.old', ignore_errors=True)
+
+
+    def open_session(self):
+        """
+        Open a session folder and show the figure without reading the PROCAR files
+        """
+        session = filedialog.askdirectory()
+
+        if session == '':
+            return
+
+        if not os.path.isfile(session + '/session.json'):
+            messagebox.showerror(message = 'Folder is not a session!')
+            return
+
+        try:
+            calc, settings = load_session(session)
+            missing = [key for key in ['plot', 'energy', 'pDOS_elements', 'pDOS_orbitals', 'dpi'] if key not in settings]
+            if len(missing) > 0:
+                raise KeyError(', '.join(missing))
+
+        except (OSError, KeyError, ValueError, TypeError) as error:
+            messagebox.showerror(message = 'Session could not be opened: {}'.format(error))
+            return
+
+        self.clear()
+        self.calc = calc
+
+        self.foldername = self.calc.foldername
+        self.filename.set_name(self.calc.name)
+        self.projection_groups = self.calc.projection_groups
+        self.stream_var.set(self.calc.stream); self.budget.set_name(self.calc.budget)
+
+        self.apply_settings(settings['plot'])
+        self.minE.set_name(settings['energy'][0]); self.maxE.set_name(settings['energy'][1]); self.Eres.set_name(settings['energy'][2])
+        self.list_energy = list(self.calc.list_energy)
+        self.set_dpi.set_name(settings['dpi'])
+
+        self.use_calculation(self.calc)
+
+        self.load_button.config(state=NORMAL); self.plot_button.config(state=NORMAL)
+        if len(self.cmp) > 1:
+            self.pDOS_E.config(state=NORMAL)
+        if len(self.orbital_DOS) > 1:
+            self.pDOS_O.config(state=NORMAL)
+        self.pDOS_E_var.set(settings['pDOS_elements']); self.pDOS_O_var.set(settings['pDOS_orbitals'])
+        self.pDOS.set(settings.get('pDOS', 1)); self.ymax.set_name(settings.get('ymax', '2'))
+        self.masses_var.set(settings.get('masses', False))
+
+        self.plot_electronic_structure()
+
+
+    def close_program(self):
+        """
+        Close the VASP program
+        """
+        self.parent.quit()
+        self.parent.destroy()
+
+
+    def plot_electronic_structure(self):
+        """
+        Plot the electronic band structure, connected to the Plot button
+        """
+        if self.foldername == '':
+            return
+
+        self.save_figure_button.config(state=NORMAL)
+        self.save_fig_csv_button.config(state=NORMAL)
+        self.plot_widget.grid_forget()
+        self.plot()
+
+
+    def Edit_graph(self):
+        """
+        Edit plot by changing fonts, font size, labels, or grids
+        """
+
+        self.Top = Toplevel()
+        self.Top.configure(bg = self._from_rgb((11, 165, 193)))
+        self.Top.geometry("800x650")
+        self.Top.iconbitmap('icon_band.ico')
+        self.Top.grab_set()
+
+        self.label_input = Label(self.Top, text = 'Labels/Ticks')
+        self.label_input.grid(row = 0, column = 0, pady = (10, 5))
+        self.label_input['font'] = self.font_window
+
+        self.label_input = Label(self.Top, text = 'Figure')
+        self.label_input.grid(row = 0, column = 2, pady = (10, 5))
+        self.label_input['font'] = self.font_window
+
+        self.font_size_band_x_entry = Entry(self.Top, textvariable = self.font_size_band_x, width = 24)
+        self.font_size_band_x_entry.grid(row = 1, column = 1, padx = 10, pady=10)
+        self.font_size_band_x_label = Label(self.Top, text = 'Font Size Bandstructure x', relief = RIDGE, anchor = 'w')
+        self.font_size_band_x_label.grid(row = 1, column = 0, padx = 10, pady=10, ipadx = 14)
+
+        self.font_size_band_y_entry = Entry(self.Top, textvariable = self.font_size_band_y, width = 24)
+        self.font_size_band_y_entry.grid(row = 2, column = 1, padx = 10)
+        self.font_size_band_y_label = Label(self.Top, text = 'Font Size Bandstructure y', relief = RIDGE, anchor = 'w')
+        self.font_size_band_y_label.grid(row = 2, column = 0, padx = 10, ipadx = 14)
+
+        self.font_size_band_ticks_entry = Entry(self.Top, textvariable = self.font_size_band_ticks, width = 24)
+        self.font_size_band_ticks_entry.grid(row = 3, column = 1, padx = 10, pady=10)
+        self.font_size_band_ticks_label = Label(self.Top, text = 'Font Size Bandstructure ticks x', relief = RIDGE, anchor = 'w')
+        self.font_size_band_ticks_label.grid(row = 3, column = 0, padx = 10, pady=10, ipadx = 0)
+
+        self.font_size_band_energy_entry = Entry(self.Top, textvariable = self.font_size_band_energy, width = 24)
+        self.font_size_band_energy_entry.grid(row = 4, column = 1, padx = 10, pady=10)
+        self.font_size_band_energy_label = Label(self.Top, text = 'Font Size Bandstructure ticks y', relief = RIDGE, anchor = 'w')
+        self.font_size_band_energy_label.grid(row = 4, column = 0, padx = 10, pady=10, ipadx = 0)
+
+        self.font_size_DOS_x_entry = Entry(self.Top, textvariable = self.font_size_DOS_x, width = 24)
+        self.font_size_DOS_x_entry.grid(row = 5, column = 1, padx = 10, pady=10)
+        self.font_size_DOS_x_label = Label(self.Top, text = 'Font Size DOS x', relief = RIDGE, anchor = 'w')
+        self.font_size_DOS_x_label.grid(row = 5, column = 0, padx = 10, pady=10, ipadx = 39)
+
+        self.font_size_DOS_y_entry = Entry(self.Top, textvariable = self.font_size_DOS_y, width = 24)
+        self.font_size_DOS_y_entry.grid(row = 6, column = 1, padx = 10, pady=10)
+        self.font_size_DOS_y_label = Label(self.Top, text = 'Font Size DOS y', relief = RIDGE, anchor = 'w')
+        self.font_size_DOS_y_label.grid(row = 6, column = 0, padx = 10, pady=10, ipadx = 39)
+
+        self.font_size_DOS_ticks_entry = Entry(self.Top, textvariable = self.font_size_DOS_number, width = 24)
+        self.font_size_DOS_ticks_entry.grid(row = 7, column = 1, padx = 10, pady=10)
+        self.font_size_DOS_ticks_label = Label(self.Top, text = 'Font Size DOS ticks', relief = RIDGE, anchor = 'w')
+        self.font_size_DOS_ticks_label.grid(row = 7, column = 0, padx = 10, pady=10, ipadx = 31)
+
+        self.size_x_entry = Entry(self.Top, textvariable = self.size_x, width = 24)
+        self.size_x_entry.grid(row = 1, column = 3, padx = 10, pady=10)
+        self.size_x_label = Label(self.Top, text = 'Figure Width', relief = RIDGE, anchor = 'w')
+        self.size_x_label.grid(row = 1, column = 2, padx = 10, pady=10, ipadx = 37)
+
+        self.size_y_entry = Entry(self.Top, textvariable = self.size_y, width = 24)
+        self.size_y_entry.grid(row = 2, column = 3, padx = 10, pady=10)
+        self.size_y_label = Label(self.Top, text = 'Figure Height', relief = RIDGE, anchor = 'w')
+        self.size_y_label.grid(row = 2, column = 2, padx = 10, pady=10, ipadx = 35)
+
+        self.size_x_space_entry = Entry(self.Top, textvariable = self.size_x_space, width = 24)
+        self.size_x_space_entry.grid(row = 3, column = 3, padx = 10, pady=10)
+        self.size_x_space_label = Label(self.Top, text = 'Figure Move Horizontal', relief = RIDGE, anchor = 'w')
+        self.size_x_space_label.grid(row = 3, column = 2, padx = 10, pady=10, ipadx=8)
+
+        self.size_y_space_entry = Entry(self.Top, textvariable = self.size_y_space, width = 24)
+        self.size_y_space_entry.grid(row = 4, column = 3, padx = 10, pady=10)
+        self.size_y_space_label = Label(self.Top, text = 'Figure Move Vertical', relief = RIDGE, anchor = 'w')
+        self.size_y_space_label.grid(row = 4, column = 2, padx = 10, pady=10, ipadx=17)
+
+        self.size_x_length_entry = Entry(self.Top, textvariable = self.size_x_length, width = 24)
+        self.size_x_length_entry.grid(row = 5, column = 3, padx = 10, pady=10)
+        self.size_x_length_label = Label(self.Top, text = 'Figure Length Horizontal', relief = RIDGE, anchor = 'w')
+        self.size_x_length_label.grid(row = 5, column = 2, padx = 10, pady=10, ipadx=5)
+
+        self.size_y_length_entry = Entry(self.Top, textvariable = self.size_y_length, width = 24)
+        self.size_y_length_entry.grid(row = 6, column = 3, padx = 10, pady=10)
+        self.size_y_length_label = Label(self.Top, text = 'Figure Length Vertical', relief = RIDGE, anchor = 'w')
+        self.size_y_length_label.grid(row = 6, column = 2, padx = 10, pady=10, ipadx=14)
+
+        self.font_menu = OptionMenu(self.Top, self.initial_font, *self.font_options)
+        self.font_menu.grid(row = 8, column = 1, padx = 10, pady = 10)
+        self.font_label = Label(self.Top, text = 'Font', relief = RIDGE, anchor = 'w')
+        self.font_label.grid(row = 8, column = 0, padx = 10, pady = 10, ipadx = 32)
+
+        self.color_2plot_menu = OptionMenu(self.Top, self.initial_color_2plot, *self.color_2plot_options)
+        self.color_2plot_menu.grid(row = 8, column = 3, padx = 10, pady = 10)
+        self.color_2plot_label = Label(self.Top, text = 'Color for 2 Elements', relief = RIDGE, anchor = 'w')
+        self.color_2plot_label.grid(row = 8, column = 2, padx = 10, pady = 10, ipadx = 2)
+
+        self.label_energy = Checkbutton(self.Top, text='Energy Label Band Structure', variable=self.label_energy_var)
+        self.label_energy.grid(row=9, column=0, columnspan=2, pady=10, ipadx=5)
+
+        self.label_ticks = Checkbutton(self.Top, text='Wavevector Label', variable=self.label_ticks_var)
+        self.label_ticks.grid(row=9, column=2, pady=10, ipadx=18)
+
+        self.label_energy_DOS = Checkbutton(self.Top, text='Energy Label DOS', variable=self.label_energy_DOS_var)
+        self.label_energy_DOS.grid(row=10, column=0, columnspan=2, pady=10, ipadx=33)
+
+        self.label_DOS = Checkbutton(self.Top, text='DOS Label', variable=self.label_DOS_var)
+        self.label_DOS.grid(row=10, column=2, pady=10, ipadx=37)
+
+        self.grid_energy = Checkbutton(self.Top, text='Grid Band Structure', variable=self.grid_energy_var)
+        self.grid_energy.grid(row=11, column=0, columnspan=2, pady=10, ipadx=29)
+
+        self.grid_DOS = Checkbutton(self.Top, text='Grid DOS', variable=self.grid_DOS_var)
+        self.grid_DOS.grid(row=11, column=2, pady=10, ipadx=40)
+
+        self.ticks_energy = Checkbutton(self.Top, text='Ticks Energy Band', variable=self.ticks_energy_var)
+        self.ticks_energy.grid(row=9, column=3, pady=10, ipadx=20)
+
+        self.ticks_wavevector = Checkbutton(self.Top, text='Ticks Wavevector', variable=self.ticks_wavevector_var)
+        self.ticks_wavevector.grid(row=10, column=3, pady=10, ipadx=22)
+
+        self.ticks_energy_DOS = Checkbutton(self.Top, text='Ticks Energy DOS', variable=self.ticks_energy_DOS_var)
+        self.ticks_energy_DOS.grid(row=11, column=3, pady=10, ipadx=22)
+
+        self.ticks_DOS = Checkbutton(self.Top, text='Ticks DOS', variable=self.ticks_DOS_var)
+        self.ticks_DOS.grid(row=12, column=3, pady=10, ipadx=42)
+
+        btn_color = Button(self.Top, text = 'Color Band Structure', command = self.choose_color)
+        btn_color.grid(row = 7, column = 2, padx =10, pady = 10, ipadx = 13)
+
+        self.frame = Frame(self.Top, border=1, relief=SUNKEN, width=60, height=30)
+        self.frame.grid(row=7, column=3, padx=10, pady=10, ipadx=10)
+        self.frame.config(bg=self.hx)
+
+        btn_close = Button(self.Top, text = 'Save/Close', command = self.close_update_graph)
+        btn_close.grid(row = 13, column = 3, padx =10, pady = 10, ipadx = 35)
+
+        btn_default = Button(self.Top, text = 'Save as Default', command = self.default)
+        btn_default.grid(row = 12, column = 0, padx =10, pady = 10, ipadx = 35)
+
+
+    def choose_color(self):
+        """
+        Choose a color for the electronic band structure
+        """
+        (color_new, self.hx) = colorchooser.askcolor()
+        if color_new != None:
+            self.color = np.array(color_new) / 256.
+        self.frame.config(bg=self.hx)
+
+
+    def close_update_graph(self):
+        """
+        Close Edit window and update the plot
+        """
+
+        self.plot_widget.grid_forget()
+
+        if self.plot_button['state'] == NORMAL:
+            self.plot()
+
+        else:
+            self.create_empty_plot()
+        self.Top.destroy()
+
+
+    def plot_settings(self):
+        """
+        All settings of the Edit Graph window
+        """
+
+        return {
+            'font' : self.initial_font.get(),
+            'color_2plot' : self.initial_color_2plot.get(),
+            'size_band_x' : self.font_size_band_x.get(),
+            'size_band_y' : self.font_size_band_y.get(),
+            'size_band_ticks' : self.font_size_band_ticks.get(),
+            'size_band_energy' : self.font_size_band_energy.get(),
+            'size_DOS_x' : self.font_size_DOS_x.get(),
+            'size_DOS_y' : self.font_size_DOS_y.get(),
+            'size_DOS_ticks' : self.font_size_DOS_number.get(),
+            'figure_size_x' : self.size_x.get(),
+            'figure_size_y' : self.size_y.get(),
+            'figure_space_x' : self.size_x_space.get(),
+            'figure_space_y' : self.size_y_space.get(),
+            'figure_length_x' : self.size_x_length.get(),
+            'figure_length_y' : self.size_y_length.get(),
+            'label_energy' : self.label_energy_var.get(),
+            'label_energy_DOS' : self.label_energy_DOS_var.get(),
+            'label_ticks' : self.label_ticks_var.get(),
+            'label_DOS' : self.label_DOS_var.get(),
+            'grid_energy' : self.grid_energy_var.get(),
+            'grid_DOS' : self.grid_DOS_var.get(),
+            'ticks_energy' : self.ticks_energy_var.get(),
+            'ticks_wavevector' : self.ticks_wavevector_var.get(),
+            'ticks_energy_DOS' : self.ticks_energy_DOS_var.get(),
+            'ticks_DOS' : self.ticks_DOS_var.get(),
+            'color' : np.asarray(self.color).tolist(),
+            'color_hex' : self.hx,
+        }
+
+
+    def default(self):
+        """
+        Produce a default file which is used for the program
+        """
 
+        dic = self.plot_settings()
 
-    def create_EntryItem(self, padx_label = 10, pady_label = 6, ipadx_label = 0):
+        with open('~default.json', 'w') as d:
+            json.dump(dic, d)
+
+
+    def groups_window(self):
         """
-        Combine Label with Entry item next to each other
-        Input:
-        ------------------------------
-        padx_label: int
-            space in x-direction for the Label
-        pady_label: int
-            space in y-direction for the Label
-        ipadx_label: int
-            size of the Label
+        Window to define projection groups of ions (e.g. surface and bulk layers, dopants, or Wyckoff sites)
         """
-        self.entry.grid(row = self.row, column = self. column, columnspan = self.columnspan, padx = self.padx, pady = self.pady, ipadx = self.ipadx)
-        self.label.grid(row = self.row, column = self.column - 1, columnspan = self.columnspan, padx = padx_label, pady = pady_label, ipadx = ipadx_label)
+        if self.plot_button['state'] == DISABLED:
+            messagebox.showerror(message = 'Please load the data first!')
+            return
 
+        self.Groups = Toplevel()
+        self.Groups.configure(bg = self._from_rgb((11, 165, 193)))
+        self.Groups.geometry("600x450")
+        self.Groups.iconbitmap('icon_band.ico')
+        self.Groups.grab_set()
 
-    def set_name(self, new_name = 'NaN'):
+        label = Label(self.Groups, text = 'One group per line, e.g.  Surface: 1-8, 17  or  Dopant: Li', anchor = 'w')
+        label.grid(row = 0, column = 0, columnspan = 2, padx = 10, pady = 10)
+
+        self.groups_text = Text(self.Groups, height = 15, width = 60)
+        self.groups_text.grid(row = 1, column = 0, columnspan = 2, padx = 10, pady = 10)
+        for name, ions in self.projection_groups:
+            self.groups_text.insert(END, '{}: {}\n'.format(name, ' '.join([str(i + 1) for i in ions])))
+
+        btn_apply = Button(self.Groups, text = 'Apply', command = self.apply_groups)
+        btn_apply.grid(row = 2, column = 0, padx = 10, pady = 10, ipadx = 35)
+        btn_reset = Button(self.Groups, text = 'Elements', command = self.reset_groups)
+        btn_reset.grid(row = 2, column = 1, padx = 10, pady = 10, ipadx = 35)
+
+
+    def apply_groups(self):
         """
-        Change the name of the Entry
-        Input:
-        ------------------
-        new_name: str
-            Name of the Label
+        Use the projection groups of the window for the projected band structure and DOS
         """
-        self.var.set(new_name)
+        try:
+            self.projection_groups = self.calc.parse_groups(self.groups_text.get('1.0', END))
+        except ValueError as err:
+            messagebox.showerror(message = str(err))
+            return
 
+        self.update_groups()
+        self.Groups.destroy()
 
-    def get_name(self):
+
+    def reset_groups(self):
         """
-        Get value of the Entry
+        Use the elements for the projected band structure and DOS
         """
-        return self.var.get()
+        self.projection_groups = list()
+        self.update_groups()
+        self.Groups.destroy()
 
 
-    def delete(self):
+    def update_groups(self):
         """
-        Delete an Entry
+        Update the projections and the plot after the projection groups have changed
         """
-        self.entry.delete(0, END)
+        self.calc.projection_groups = self.projection_groups
+        self.calc.project_groups(self.projection_groups or list(zip(self.calc.species, self.calc.species_ions)))
+        self.calc.sum_DOS()
+        self.calc.contrib = self.calc.get_contribution(self.calc.Band.energy, self.calc.Band.DOS_element_new)
+        self.use_calculation(self.calc)
+
+        self.pDOS_E.config(state=NORMAL if len(self.cmp) > 1 else DISABLED)
+        if len(self.cmp) < 2:
+            self.pDOS_E_var.set(False)
+
+        if self.save_figure_button['state'] == NORMAL:
+            self.plot_widget.grid_forget()
+            self.plot()
 
 
-    def update(self, name):
+    def fat_bands(self, ax, k, e, contrib, colors, alpha=1., linewidth=2):
         """
-        Remove entry and insert a new entry with a new value
+        Draw all bands in one collection colored by the contributions of any number of channels
         Input:
-        ----------------------
-        name: str
-            New value of Entry
+        -------------------------
+        ax: Matplotlib subplot
+        k: ndarray, shape (N), dtype=float
+            Array of kpoints
+        e: ndarray, shape (M, N), dtype=float
+            Array of energies for M bands and N kpoints
+        contrib: ndarray, shape (M, N, C), dtype=float
+            Array of contributions of C channels (elements or orbitals)
+        colors: list, shape (C)
+            List of Matplotlib colors of the channels
+        alpha: float
+            Shading of the bands
+        linewidth: float
+            Width of the bands
         """
-        self.delete()
-        self.entry.insert(0, name)
-        return
+        rgba = np.empty(np.shape(e) + (4,))
+        rgba[..., :3] = self.mix_colors(np.asarray(contrib, dtype=float), colors)
+        rgba[..., 3] = alpha
 
+        lc = DecimatedLineCollection(k, e, colors=rgba, linewidth=linewidth)
+        ax.add_collection(lc)
 
-class MainApplication:
-    """
-    Main window and functions to plot VASP data
-    """
+        return lc
 
-    def __init__(self, parent, *args, **kwargs):
-        self.parent = parent
-        self.parent.configure(bg = self._from_rgb((11, 165, 193)))
-        self.title = self.parent.title('VASP Electronic Band Structure App')
-        self.icon = self.parent.iconbitmap('icon_band.ico')
-        self.font_window = tkFont.Font(family='Helvetica', size= 10, weight='bold')
 
-        # Create Frame
-        self.input = Frame(self.parent, height = 308, width = 395, bg = self._from_rgb((11, 112, 141)))
-        self.input.grid(row = 0, column = 0, columnspan = 2, rowspan = 9, pady = (10, 5))
-        self.label_input = Label(self.parent, text = 'Input parameters')
-        self.label_input.grid(row = 0, column = 0, pady = (10, 5))
-        self.label_input['font'] = self.font_window
-        self.output = Frame(self.parent, height = 302, width = 395, bg = self._from_rgb((175, 188, 205)))
-        self.output.grid(row = 9, column = 0, columnspan = 2, rowspan = 9, pady = (0, 5))
-        self.label_pDOS = Label(self.parent, text = 'Partial Density of States')
-        self.label_pDOS.grid(row = 9, column = 0, pady = (0, 5))
-        self.label_pDOS['font'] = self.font_window
+    legend_cache = {}
 
-        # Create MenuBar
-        my_Menu = Menu(self.parent)
-        self.parent.config(menu = my_Menu)
+    def mix_colors(self, weights, colors):
+        """
+        Mix the colors of the channels with the normalized weights of the channels; up to three channels
+        are added (red, green, blue), more channels are averaged with the squared weights
+        Input:
+        -------------------------
+        weights: ndarray, shape (..., C), dtype=float
+            Weights of C channels
+        colors: list, shape (C)
+            List of Matplotlib colors of the channels
+        Output:
+        -------------------------
+        rgb: ndarray, shape (..., 3), dtype=float
+        """
+        norm = np.linalg.norm(weights, axis=-1, keepdims=True)
+        weights = np.divide(weights, norm, out=np.zeros_like(weights, dtype=float), where=norm > 0)
+        if len(colors) > 3:
+            weights = weights**2
 
-        file_menu = Menu(my_Menu)
-        my_Menu.add_cascade(label = 'File', menu = file_menu)
-        file_menu.add_command(label = 'New', command = self.clear)
-        file_menu.add_command(label = 'Open File', command = self.open_file)
-        file_menu.add_separator()
-        file_menu.add_command(label = 'Exit', command = self.close_program)
+        return np.clip(weights @ to_rgba_array(colors)[:, :3], 0, 1)
 
-        edit_menu = Menu(my_Menu)
-        my_Menu.add_cascade(label = 'Edit', menu = edit_menu)
-        edit_menu.add_command(label = 'Edit Graph', command = self.Edit_graph)
 
-        kpoint_menu = Menu(my_Menu)
-        my_Menu.add_cascade(label = 'KPOINTS', menu = kpoint_menu)
-        kpoint_menu.add_command(label='Create KPOINTS', command=self.create_kpoint)
+    def legend_image(self, colors, size=200):
+        """
+        Image of the color legend: a triangle for three channels, otherwise a gradient bar through all channels;
+        the image is computed once per session for each list of colors
+        Input:
+        -------------------------
+        colors: list, shape (C)
+            List of Matplotlib colors of the channels
+        size: int
+            Width of the image in pixel
+        Output:
+        -------------------------
+        image: ndarray, shape (H, W, 4), dtype=float
+            RGBA image, the first row is the bottom of the legend
+        """
+        key = (tuple(to_rgba_array(colors)[:, :3].ravel()), size)
+        if key in self.legend_cache:
+            return self.legend_cache[key]
+
+        if len(colors) == 3:
+            height = int(size * np.sqrt(3) / 2)
+            x, y = np.meshgrid((np.arange(size) + 0.5) / size, (np.arange(height) + 0.5) / size)
+            top = y / (np.sqrt(3) / 2)
+            right = x - 0.5 * top
+            left = 1 - top - right
+            weights = np.stack([top, right, left], axis=-1)
+            inside = np.all(weights >= 0, axis=-1)
 
-        plot_menu = Menu(my_Menu)
-        my_Menu.add_cascade(label = 'Plot', menu = plot_menu)
-        plot_menu.add_command(label='Plot VASP', command=self.plot_electronic_structure)
+        else:
+            t = np.linspace(0, len(colors) - 1, size)
+            lower = np.minimum(t.astype(int), len(colors) - 2)
+            weights = np.zeros((1, size, len(colors)))
+            weights[0, np.arange(size), lower] = 1 - (t - lower)
+            weights[0, np.arange(size), lower + 1] = t - lower
+            inside = np.ones((1, size), dtype=bool)
 
-        help_menu = Menu(my_Menu)
-        my_Menu.add_cascade(label = 'Help', menu = help_menu)
-        help_menu.add_command(label = 'Welcome', command = self.welcome)
-        help_menu.add_command(label = 'Documentations', command = self.documentary)
-        help_menu.add_separator()
-        help_menu.add_command(label = 'About', command = self.about)
+        image = np.concatenate([self.mix_colors(weights, colors), inside[..., None].astype(float)], axis=-1)
+        self.legend_cache[key] = image
 
-        self.app = FullScreenApp(self.parent)
+        return image
 
-        # Create Plot Data
-        self.font_size_band_x = DoubleVar(); self.font_size_band_y = DoubleVar()
-        self.font_size_band_ticks = DoubleVar(); self.font_size_band_energy = DoubleVar()
-        self.font_size_DOS_x = DoubleVar(); self.font_size_DOS_y = DoubleVar()
-        self.font_size_DOS_number = DoubleVar()
-        self.size_x = DoubleVar(); self.size_y = DoubleVar()
-        self.size_x_space = DoubleVar(); self.size_x_length = DoubleVar()
-        self.size_y_space = DoubleVar(); self.size_y_length = DoubleVar()
 
-        self.filename = EntryItem(self.parent, name = 'Filename', row = 1, state=DISABLED)
-        self.filename.create_EntryItem(ipadx_label = 45)
-        self.minE = EntryItem(self.parent, name = 'min. Energy / eV', row = 2)
-        self.minE.create_EntryItem(ipadx_label = 26); self.minE.initial_val = DoubleVar()
-        self.maxE = EntryItem(self.parent, name = 'max. Energy / eV', row = 3)
-        self.maxE.create_EntryItem(ipadx_label = 26); self.maxE.initial_val = DoubleVar()
-        self.Eres = EntryItem(self.parent, name = 'Energy resolution / eV', row = 4)
-        self.Eres.create_EntryItem(ipadx_label = 12); self.Eres.initial_val = DoubleVar()
-        self.ymax = EntryItem(self.parent, name = 'maximum DOS', row = 5)
-        self.ymax.create_EntryItem(ipadx_label = 29); self.ymax.set_name('2')
+    def draw_legend(self, ax, names, colors):
+        """
+        Draw the color legend of the projected band structure
+        Input:
+        -------------------------
+        ax: Matplotlib subplot
+        names: list, shape (C)
+            Names of the channels
+        colors: list, shape (C)
+            List of Matplotlib colors of the channels
+        """
+        image = self.legend_image(colors)
 
-        self.pDOS = IntVar(); self.pDOS.set(1); self.pDOS_E_var = BooleanVar(); self.pDOS_O_var = BooleanVar()
-        self.label_energy_var = BooleanVar(); self.label_ticks_var = BooleanVar()
-        self.label_DOS_var = BooleanVar(); self.label_energy_DOS_var = BooleanVar()
-        self.grid_energy_var = BooleanVar(); self.grid_DOS_var = BooleanVar()
-        self.ticks_energy_var = BooleanVar(); self.ticks_wavevector_var = BooleanVar()
-        self.ticks_energy_DOS_var = BooleanVar(); self.ticks_DOS_var = BooleanVar()
-        self.DOS_label = Label(self.parent, text='Choose DOS to plot')
-        self.DOS_label.grid(row=10, column=0, ipadx=30)
-        self.TotalDOS = Radiobutton(self.parent, text="Total DOS", variable=self.pDOS, value=1)
-        self.TotalDOS.grid(row = 10, column = 1, ipadx=25)
-        self.partialDOS = Radiobutton(self.parent, text="Elemental DOS", variable=self.pDOS, value=2)
-        self.partialDOS.grid(row = 11, column = 1, ipadx=12)
-        self.orbitalDOS = Radiobutton(self.parent, text="Orbital DOS", variable=self.pDOS, value=3)
-        self.orbitalDOS.grid(row = 12, column = 1, ipadx=20)
-        self.pDOS_E = Checkbutton(self.parent, text='Elemental DOS on Electronic Band Structure', variable=self.pDOS_E_var)
-        self.pDOS_E.grid(row=13, column=0, columnspan=2, ipadx=20)
-        self.pDOS_O = Checkbutton(self.parent, text='Orbital DOS on Electronic Band Structure', variable=self.pDOS_O_var)
-        self.pDOS_O.grid(row=14, column=0, columnspan=2, ipadx=28)
-        self.pDOS_E_var.trace('w', self.check_orbital); self.pDOS_O_var.trace('w', self.check_elemental)
+        if len(colors) == 3:
+            ax.imshow(image, origin='lower', extent=(0, 1, 0, np.sqrt(3) / 2))
+            ax.text(0.5, np.sqrt(3) / 2, names[0], color=colors[0], ha='center', va='bottom', clip_on=False)
+            ax.text(1, 0, names[1], color=colors[1], ha='left', va='top', clip_on=False)
+            ax.text(0, 0, names[2], color=colors[2], ha='right', va='top', clip_on=False)
 
-        self.load_button = Button(self.parent, text='Load', command=self.load_electronic_properties, state=DISABLED)
-        self.load_button.grid(row=15, column=0, pady=10, ipadx=20)
-        self.load_button['font'] = self.font_window
-        self.plot_button = Button(self.parent, text='Plot', command=self.plot_electronic_structure, state=DISABLED)
-        self.plot_button.grid(row=15, column=1,  pady=10, ipadx=20)
-        self.plot_button['font'] = self.font_window
+        else:
+            ax.imshow(image, origin='lower', extent=(0, 1, 0.1, 0.4), aspect='auto')
+            ax.set_xlim(0, 1); ax.set_ylim(-0.5, 0.5)
+            for c in range(len(colors)):
+                ax.text(c / (len(colors) - 1), 0.05, names[c], color=colors[c], ha='center', va='top', clip_on=False)
 
-        self.set_dpi = EntryItem(self.parent, name = 'dpi', row = 14, column=8)
-        self.set_dpi.create_EntryItem(ipadx_label=40)
-        self.save_figure_button = Button(self.parent, text='Save', command=self.save_electronic_structure, state=DISABLED)
-        self.save_figure_button.grid(row=14, column=9, columnspan=2, pady=10, ipadx=28)
-        self.save_figure_button['font'] = self.font_window
 
-        self.save_fig_csv_button = Button(self.parent, text='Save as .csv', command=self.save_csv_file, state=DISABLED)
-        self.save_fig_csv_button.grid(row=15, column=9, columnspan=2, pady=10, ipadx=4)
-        self.save_fig_csv_button['font'] = self.font_window
+    def channel_colors(self, number):
+        """
+        Colors of the elements or orbitals for the projected band structure and DOS
+        Input:
+        ---------------------------------
+        number: int
+            Number of channels
+        """
+        if number == 2:
+            return self.initial_color_2plot.get().split('-')
 
-        self.font_options = [
-            'Times New Roman',
-            'Arial',
-            'Gabriola',
-            'Courier New',
-            'Cambria',
-            'Calibri',
-        ]
-        self.initial_font = StringVar()
+        colormap = self.colors()
+        if number > len(colormap):
+            colormap += [cm.tab20(i % 20) for i in range(number - len(colormap))]
 
-        self.color_2plot_options = [
-            'red-blue',
-            'red-green',
-            'green-blue'
+        return colormap[:number]
+
+
+    def colors(self):
+        """
+        List of potential colors [in this order]
+        """
+        return  ['red',
+            'green',
+            'blue',
+            'orange',
+            'cyan',
+            'yellow',
+            'lawngreen',
+            'pink',
+            'magenta',
+            'navy',
+            'springgreen'
         ]
-        self.initial_color_2plot = StringVar()
-        self.foldername = ''
 
-        self.initial_parameters()
-        self.create_empty_plot()
+
+    def plot_pDOS(self, ax):
+        """
+        Plot the elemental projected DOS
+        Input:
+        ---------------------------------
+        ax: subplot of Matplotlib
+        """
+        colormap = self.channel_colors(len(self.partial_DOS))
+
+        for cmpd in range(len(self.partial_DOS)):
+            ax.plot(self.Energy_DOS, -self.partial_DOS[cmpd],
+
+                    color=colormap[cmpd], label=self.cmp[cmpd], lw=2)
+        if self.label_DOS_var.get():
+            ax.set_xlabel('Projected DOS', fontsize=self.font_size_DOS_x.get(), family=self.initial_font.get())
+
+
+    def plot_oDOS(self, ax):
+        """
+        Plot the orbital projected DOS
+        Input:
+        -------------------------------
+        ax: subplot of Matplotlib
+        """
+
+        colormap = self.channel_colors(len(self.orbital_DOS))
+
+        for k in range(len(self.orbital_DOS)):
+            ax.plot(self.Energy_DOS, -self.orbital_DOS[k],
+
+                    color=colormap[k], label=self.DOS.orbitals[k], lw=2)
+
+        if self.label_DOS_var.get():
+            ax.set_xlabel('Projected DOS', fontsize=self.font_size_DOS_x.get(), family=self.initial_font.get())
 
 
-    def check_orbital(self, *args):
+    def load_electronic_properties(self):
         """
-        If check elemental, turn off orbital
+        Load the electronic properties from PROCAR_band and PROCAR_DOS and compute the DOS over the entire Brillouin zone
+        Connected to the Load button
         """
-        if self.pDOS_O_var.get() and self.pDOS_E_var.get():
-            self.pDOS_O_var.set(False)
+        self.list_energy = [self.minE.get_name(), self.maxE.get_name(), self.Eres.get_name()]
 
+        self.calc = Calculation(self.foldername, self.list_energy, stream=self.stream_var.get(),
+            budget=float(self.budget.get_name()), projection_groups=self.projection_groups, watch=self.watching)
 
-    def check_elemental(self, *args):
-        """
-        If check orbital, turn off elemental
-        """
-        if self.pDOS_E_var.get() and self.pDOS_O_var.get():
-            self.pDOS_E_var.set(False)
+        try:
+            self.use_calculation(self.calc.load())
+        except ValueError as error:
+            messagebox.showerror(message = str(error))
+            return False
 
+        self.plot_button.config(state=NORMAL)
 
-    def initial_parameters(self):
+        if len(self.cmp) > 1:
+            self.pDOS_E.config(state=NORMAL)
+
+        if len(self.orbital_DOS) > 1:
+            self.pDOS_O.config(state=NORMAL)
+
+
+    def watch_band(self):
         """
-        Initial parameters for the plot, if '~default.json' exists parameters are taking from this file
+        Start (or stop) following PROCAR_band while VASP is still running; the plot is extended as new kpoints are written
         """
+        if self.watching:
+            self.stop_watch()
+            return
 
-        if '~default.json' in os.listdir():
-            with open('~default.json') as d:
-                dic = json.load(d)
-
-            self.font_size_band_x.set(dic['size_band_x']); self.font_size_band_y.set(dic['size_band_y'])
-            self.font_size_band_ticks.set(dic['size_band_ticks']); self.font_size_band_energy.set(dic['size_band_energy'])
-            self.font_size_DOS_x.set(dic['size_DOS_x']); self.font_size_DOS_y.set(dic['size_DOS_y'])
-            self.font_size_DOS_number.set(dic['size_DOS_ticks'])
-            self.size_x.set(dic['figure_size_x']); self.size_y.set(dic['figure_size_y'])
-            self.size_x_space.set(dic['figure_space_x']); self.size_x_length.set(dic['figure_length_x'])
-            self.size_y_space.set(dic['figure_space_y']); self.size_y_length.set(dic['figure_length_y'])
-            self.label_energy_var.set(dic['label_energy']); self.label_energy_DOS_var.set(dic['label_energy_DOS'])
-            self.label_ticks_var.set(dic['label_ticks']); self.label_DOS_var.set(dic['label_DOS'])
-            self.grid_energy_var.set(dic['grid_energy']); self.grid_DOS_var.set(dic['grid_DOS'])
-            self.ticks_energy_var.set(dic['ticks_energy']); self.ticks_wavevector_var.set(dic['ticks_wavevector'])
-            self.ticks_energy_DOS_var.set(dic['ticks_energy_DOS']); self.ticks_DOS_var.set(dic['ticks_DOS'])
-            self.color = dic['color']; self.hx = dic['color_hex']
-            for i in range(len(self.font_options)):
-                if dic['font'] == self.font_options[i]:
-                    self.initial_font.set(self.font_options[i])
-            for i in range(len(self.color_2plot_options)):
-                if dic['color_2plot'] == self.color_2plot_options[i]:
-                    self.initial_color_2plot.set(self.color_2plot_options[i])
+        if self.foldername == '' or self.load_button['state'] == DISABLED:
+            return
 
-        else:
-            self.font_size_band_x.set(16); self.font_size_band_y.set(16)
-            self.font_size_band_ticks.set(14); self.font_size_band_energy.set(16)
-            self.font_size_DOS_x.set(16); self.font_size_DOS_y.set(16)
-            self.font_size_DOS_number.set(16)
-            self.size_x.set(8.5); self.size_y.set(5.)
-            self.size_x_space.set(0.18); self.size_x_length.set(0.78)
-            self.size_y_space.set(0.23); self.size_y_length.set(0.68)
-            self.initial_font.set(self.font_options[0]); self.initial_color_2plot.set(self.color_2plot_options[0])
-            self.label_energy_var.set(True); self.label_DOS_var.set(True)
-            self.label_ticks_var.set(True); self.label_energy_DOS_var.set(False)
-            self.grid_energy_var.set(True); self.grid_DOS_var.set(True)
-            self.ticks_energy_var.set(True); self.ticks_wavevector_var.set(True)
-            self.ticks_energy_DOS_var.set(True); self.ticks_DOS_var.set(True)
-            self.color= np.array([0, 0, 0]); self.hx = '#000000'
+        self.watching = True
 
-        self.minE.set_name(-5); self.maxE.set_name(5)
-        self.Eres.set_name(0.05); self.pDOS_E_var.set(False)
-        self.pDOS_E.config(state=DISABLED); self.pDOS_O.config(state=DISABLED)
-        self.set_dpi.set_name('100')
+        if self.load_electronic_properties() is False:
+            self.watching = False
+            return
 
+        self.plot_menu.entryconfig('Watch PROCAR_band', label='Stop Watching')
+        self.plot_electronic_structure()
+        self.last_draw = time.time()
+        self.show_progress()
+        self.parent.after(self.poll_interval, self.poll_band)
 
-    def create_empty_plot(self):
+
+    def poll_band(self):
         """
-        Create an empty plot using default values
+        Check the size of PROCAR_band, parse the new kpoints, and redraw not more often than redraw_interval
         """
+        if not self.watching:
+            return
 
-        plt.rcParams["font.family"] = self.initial_font.get()
-        plt.rcParams.update({'font.size': self.font_size_band_energy.get()})
-
-        self.fig = Figure(figsize= (self.size_x.get(), self.size_y.get()), dpi = 100)
-        self.canvas = FigureCanvasTkAgg(self.fig, master = self.parent)
-        self.canvas.draw()
-        self.plot_widget = self.canvas.get_tk_widget()
-        self.plot_widget.grid(row = 1, column = 3, columnspan=11, rowspan = 13)
+        if self.calc.watcher.changed() and self.calc.update_band():
+            self.use_calculation(self.calc)
+            self.show_progress()
+            self.redraw = True
 
-        gs = self.fig.add_gridspec(1, 2, width_ratios=[2, 1,])
-        gs.update(left=0.1, right=0.95, wspace=0.15)
-        self.ax1 = self.fig.add_subplot(gs[0])
-        self.ax2 = self.fig.add_subplot(gs[1])
+        complete = self.calc.watcher.complete()
 
-        gs2 = self.fig.add_gridspec(2, 2, width_ratios=[1, 10,], height_ratios=[1, 8,])
-        gs2.update(bottom=0.3, top =0.95)
-        self.ax3 = self.fig.add_subplot(gs2[0])
-        self.ax3.axis('off')
-        if self.label_ticks_var.get():
-            self.ax1.set_xlabel('Wavevector $k$', fontsize=self.font_size_band_x.get(), family=self.initial_font.get())
-        if self.label_energy_var.get():
-            self.ax1.set_ylabel('Energy / eV', fontsize=self.font_size_band_y.get(), family=self.initial_font.get())
-        if self.grid_energy_var.get():
-            self.ax1.grid()
-        self.ax1.set_ylim(float(self.minE.get_name()), float(self.maxE.get_name()))
-        self.ax1.set_xlim(0, 1)
-        self.ax1.hlines(y=0, xmin=0, xmax=1, color="k", lw=1.5)
-        self.ax1.tick_params(axis='x', which='major', labelsize=self.font_size_band_ticks.get())
-        self.ax2.set_ylim(float(self.minE.get_name()), float(self.maxE.get_name()))
-        self.ax2.set_xlim(0, 1)
-        if self.label_DOS_var.get():
-            self.ax2.set_xlabel('Density of States', fontsize=self.font_size_DOS_x.get(), family=self.initial_font.get())
-        if self.label_energy_DOS_var.get():
-            self.ax2.set_ylabel('Energy / eV', fontsize=self.font_size_DOS_number.get(), family=self.initial_font.get())
-        if self.grid_DOS_var.get():
-            self.ax2.grid()
-        self.ax2.hlines(y=0, xmin=0, xmax=1, color='k', lw=1.5)
-        self.ax2.tick_params(axis='x', which='major', labelsize=self.font_size_DOS_number.get())
-        if not self.ticks_energy_var.get():
-            self.ax1.set_yticklabels([])
-        if not self.ticks_wavevector_var.get():
-            self.ax1.set_xticklabels([])
-        if not self.ticks_energy_DOS_var.get():
-            self.ax2.set_yticklabels([])
-        if not self.ticks_DOS_var.get():
-            self.ax2.set_xticklabels([])
+        if getattr(self, 'redraw', False) and (complete or time.time() - self.last_draw >= self.redraw_interval):
+            self.plot_widget.grid_forget()
+            self.plot()
+            self.last_draw = time.time()
+            self.redraw = False
 
-        toolbar_frame = Frame(self.parent) 
-        toolbar_frame.grid(row=16,column=2,columnspan=4) 
-        toolbar = NavigationToolbar2Tk(self.canvas, toolbar_frame)
-        toolbar.update()
+        if complete:
+            self.stop_watch()
+        else:
+            self.parent.after(self.poll_interval, self.poll_band)
 
 
-    def _from_rgb(self, rgb):
+    def show_progress(self):
         """
-        translates an rgb tuple of int to a tkinter friendly color code
+        Show the number of parsed kpoints in the title of the window
         """
-        return "#%02x%02x%02x" % rgb
+        self.parent.title('VASP Electronic Band Structure App - %i of %i kpoints' %
+            (self.calc.watcher.Nmb_read, self.calc.watcher.header[0]))
 
 
-    def clear(self):
+    def stop_watch(self):
         """
-        Default values to start new project
+        Stop following PROCAR_band
         """
-        self.initial_parameters()
-        self.plot_widget.grid_forget()
-        self.create_empty_plot()
-        self.pDOS_E_var.set(False); self.pDOS_O_var.set(False)
-        self.pDOS_E.config(state=DISABLED); self.pDOS_O.config(state=DISABLED)
-        self.load_button.config(state=DISABLED); self.plot_button.config(state=DISABLED)
+        if not self.watching:
+            return
 
+        self.watching = False
+        self.redraw = False
+        self.plot_menu.entryconfig('Stop Watching', label='Watch PROCAR_band')
+        self.parent.title('VASP Electronic Band Structure App')
 
-    def create_kpoint(self):
+
+    def use_calculation(self, calc):
         """
-        Create KPOINTS file
+        Use the loaded data of a calculation for the plots and exports
+        Input:
+        --------------------------------
+        calc: Calculation
         """
+        for key in ['Band', 'DOS', 'VBM', 'ticks', 'distance', 'cmp', 'species', 'Energy_DOS', 'partial_DOS', 'orbital_DOS',
+            'contrib', 'contrib_orbital', 'masses']:
+            setattr(self, key, getattr(calc, key))
 
-        self.KPoints = Toplevel()
-        self.KPoints.configure(bg = self._from_rgb((11, 165, 193)))
-        self.KPoints.geometry("700x650")
-        self.KPoints.iconbitmap('icon_band.ico')
-        self.KPoints.grab_set()
 
-        self.crystal_options = [
-            'Triclinic, primitive, aP',
-            'Monoclinic, primitive, mP',
-            'Monoclinic, C-centered, mS',
-            'Orthorhombic, primitive, oP',
-            'Orthorhombic, face-centered, oF',
-            'Orthorhombic, body-centered, oI',
-            'Orthorhombic, C-centered, oS',
-            'Tetragonal, primitive, tP',
-            'Tetragonal, body-centered, tI',
-            'Hexagonal, primitive, hP',
-            'Rhombohedral, primitive, hR',
-            'Cubic, primitive, cP',
-            'Cubic, face-centered, cF',
-            'Cubic, body-centered, cI'
-        ]
-        self.initial_crystal = StringVar(); self.initial_crystal.set(self.crystal_options[0])
-        self.crystal_menu = OptionMenu(self.KPoints, self.initial_crystal, *self.crystal_options)
-        self.crystal_menu.grid(row = 0, column = 1, padx = 10, pady = 10)
-        self.crystal_label = Label(self.KPoints, text = 'Crystal System', relief = RIDGE, anchor = 'w')
-        self.crystal_label.grid(row = 0, column = 0, padx = 10, pady = 10, ipadx = 32)
-        self.lattice_a = EntryItem(self.KPoints, name = 'Lattice parameter a / Ang', row = 1)
-        self.lattice_a.create_EntryItem(ipadx_label = 5); self.lattice_a.initial_val = DoubleVar(); self.lattice_a.set_name(1)
-        self.lattice_b = EntryItem(self.KPoints, name = 'Lattice parameter b / Ang', row = 2)
-        self.lattice_b.create_EntryItem(ipadx_label = 5); self.lattice_b.initial_val = DoubleVar(); self.lattice_b.set_name(1)
-        self.lattice_c = EntryItem(self.KPoints, name = 'Lattice parameter c / Ang', row = 3)
-        self.lattice_c.create_EntryItem(ipadx_label = 5); self.lattice_c.initial_val = DoubleVar(); self.lattice_c.set_name(1)
-        self.lattice_alpha = EntryItem(self.KPoints, name = 'Alpha / deg', row = 4)
-        self.lattice_alpha.create_EntryItem(ipadx_label = 41); self.lattice_alpha.initial_val = DoubleVar(); self.lattice_alpha.set_name(90)
-        self.lattice_beta = EntryItem(self.KPoints, name = 'Beta / deg', row = 5)
-        self.lattice_beta.create_EntryItem(ipadx_label = 45); self.lattice_beta.initial_val = DoubleVar(); self.lattice_beta.set_name(90)
-        self.lattice_gamma = EntryItem(self.KPoints, name = 'Gamma / deg', row = 6)
-        self.lattice_gamma.create_EntryItem(ipadx_label = 36); self.lattice_gamma.initial_val = DoubleVar(); self.lattice_gamma.set_name(90)
+    def plot(self, save=False, filename=''):
+        """
+        Plot electronic band structure and DOS
+        Input:
+        --------------------------------
+        save: Boolean
+            If save is True, the figure will be saved (default is False)
+        filename: str
+            Filename from Save button
+        """
 
-        self.minimum_d = EntryItem(self.KPoints, name = 'Minimum # of points', row = 7)
-        self.minimum_d.create_EntryItem(ipadx_label = 17); self.minimum_d.initial_val = DoubleVar(); self.minimum_d.set_name(10)
+        if self.list_energy != [self.minE.get_name(), self.maxE.get_name(), self.Eres.get_name()]:
+            load_new = messagebox.askyesno('New energy range!',
+             'You have changed minimum energy, maximum energy, or the resolution. You need to load first the new data. Do you want to load the data?')
 
-        self.create_list_button = Button(self.KPoints, text='Create List of High-Symmetry Points', command=self.create_list)
-        self.create_list_button.grid(row=8, column=0, columnspan=2, pady=10, ipadx=4)
-        self.create_list_button['font'] = self.font_window
+            if load_new:
+                self.load_electronic_properties()
 
-        self.create_kpoints_button = Button(self.KPoints, text='Create KPOINTS file', command=self.create_kpoints, state=DISABLED)
-        self.create_kpoints_button.grid(row=9, column=0, columnspan=2, pady=10, ipadx=4)
-        self.create_kpoints_button['font'] = self.font_window
+        if save:
+            self.export_figure([filename], dpis=[int(self.set_dpi.get_name())], sizes=[(12, 8)])
+            return
 
-        self.close_kpoints_button = Button(self.KPoints, text='Close', command=self.close_kpoints)
-        self.close_kpoints_button.grid(row=10, column=0, columnspan=2, pady=10, ipadx=4)
-        self.close_kpoints_button['font'] = self.font_window
+        self.calculations = None
 
-        self.Check_path_button = list(); self.path_var = list()
-        self.kpt_nmb = EntryItem(self.KPoints, 'Number of Kpts', column=4, state=DISABLED)
+        with profiler.stage('plot'):
+            with profiler.stage('draw_figure'):
+                fig = self.draw_figure()
+            with profiler.stage('render'):
+                toolbar = self.show_figure(fig)
 
+        self.inspector = BandInspector(self.canvas, self.ax1, self.Band.kpts, self.Band.energy, self.ticks, self.distance,
+            projections=[(self.cmp, self.contrib), (self.Band.orbitals, self.contrib_orbital)],
+            toolbar=toolbar)
 
-    def create_list(self):
+
+    def show_figure(self, fig):
         """
-        Create paths between high-symmetry points to choose from
+        Show a figure in the main window
+        Input:
+        --------------------------------
+        fig: Matplotlib Figure
+            Figure with the band structure (first axis) and the DOS (second axis)
+        Output:
+        --------------------------------
+        toolbar: NavigationToolbar2Tk
         """
+        self.fig = fig
+        self.ax1, self.ax2 = self.fig.axes[:2]
 
-        for c in self.Check_path_button:
-            c.destroy()
-        self.path_var = list()
+        self.canvas = FigureCanvasTkAgg(self.fig, master = self.parent)
+        self.canvas.draw()
+        self.plot_widget = self.canvas.get_tk_widget()
+        self.plot_widget.grid(row = 1, column = 3, columnspan = 11, rowspan = 13)
 
-        self.create_kpoints_button.config(state=NORMAL)
+        toolbar_frame = Frame(self.parent) 
+        toolbar_frame.grid(row=16,column=2,columnspan=4) 
+        toolbar = NavigationToolbar2Tk(self.canvas, toolbar_frame)
+        toolbar.update()
 
-        self.kpts = K_points(
-            ibrav=self.initial_crystal.get(),
-            lattice_a=float(self.lattice_a.get_name()),
-            lattice_b=float(self.lattice_b.get_name()),
-            lattice_c=float(self.lattice_c.get_name()),
-            alpha=float(self.lattice_alpha.get_name()),
-            beta=float(self.lattice_beta.get_name()),
-            gamma=float(self.lattice_gamma.get_name()),
-            factor=int(self.minimum_d.get_name())
-            )
+        return toolbar
 
-        self.label_Path = Label(self.KPoints, text = 'KPoint_Path')
-        self.label_Path.grid(row = 0, column = 3, columnspan=2, pady = (10, 5))
-        self.label_Path['font'] = self.font_window
 
-        Points, Path = self.kpts.Kpoint_path()
+    def compare_window(self):
+        """
+        Window to choose several calculations (subfolders of one folder) which are plotted on top of each other
+        """
+        parent_folder = filedialog.askdirectory()
+        if parent_folder == '':
+            return
 
-        nmb = 1
-        for p in Path:
-            self.path_var.append(BooleanVar())
-            self.Check_path_button.append(Checkbutton(self.KPoints, text='{} --> {}'.format(p[0], p[1]), variable=self.path_var[-1]))
-            self.Check_path_button[-1].grid(row=nmb, column=3, columnspan=2, ipadx = 20, pady=10); self.path_var[-1].set(True)
-            nmb += 1
+        folders = [parent_folder] + sorted([os.path.join(parent_folder, f) for f in os.listdir(parent_folder)])
+        self.compare_folders = [f for f in folders if os.path.isdir(f) and set(Calculation.required_files).issubset(set(os.listdir(f)))]
 
-        self.List_data = self.kpts.min_distance(Path, Points)
+        if len(self.compare_folders) == 0:
+            messagebox.showerror(message = 'No folder includes CONTCAR, KPOINTS, and PROCAR_band!')
+            return
 
-        self.kpt_nmb.row = nmb
-        self.kpt_nmb.create_EntryItem(ipadx_label=10); self.kpt_nmb.set_name(sum(self.List_data))
+        self.Compare = Toplevel()
+        self.Compare.configure(bg = self._from_rgb((11, 165, 193)))
+        self.Compare.geometry("500x500")
+        self.Compare.iconbitmap('icon_band.ico')
+        self.Compare.grab_set()
 
-        for var in self.path_var:
-            var.trace('w', self.click_path)
+        self.compare_var = list()
+        for i in range(len(self.compare_folders)):
+            self.compare_var.append(BooleanVar()); self.compare_var[-1].set(True)
+            Checkbutton(self.Compare, text=os.path.basename(self.compare_folders[i]), variable=self.compare_var[-1]).grid(row=i, column=0, padx=10, sticky='w')
 
+        self.compare_button = Button(self.Compare, text = 'Compare', command = self.compare)
+        self.compare_button.grid(row = len(self.compare_folders), column = 0, padx = 10, pady = 10, ipadx = 35)
+        self.compare_button['font'] = self.font_window
 
-    def get_new_path(self):
+
+    def compare(self):
         """
-        Create a new path from chosen high-symmetry points
+        Load the chosen calculations in worker processes
         """
-        Points, Path = self.kpts.Kpoint_path()
-        New_path = []
-        for i in range(len(self.path_var)):
-            if self.path_var[i].get() == True:
-                New_path.append(Path[i])
+        folders = [self.compare_folders[i] for i in range(len(self.compare_folders)) if self.compare_var[i].get()]
+        if len(folders) == 0:
+            return
 
-        return Points, New_path
+        self.compare_button.config(state=DISABLED, text='Loading...')
+        list_energy = [self.minE.get_name(), self.maxE.get_name(), self.Eres.get_name()]
+        self.run_in_background(self.load_calculations, (folders, list_energy), self.show_comparison)
 
 
-    def click_path(self, *args):
+    def load_calculations(self, folders, list_energy):
         """
-        Update the number of kpoints depending on the chosen path
+        Load several calculations in parallel; the worker processes are spawned, since forking the Tk process
+        (which runs several threads) can deadlock
+        Input:
+        --------------------------------
+        folders: list
+            List of calculation folders
+        list_energy: list, shape (3)
+            minimum energy, maximum energy, and resolution in eV
+        Output:
+        --------------------------------
+        calculations: list
+            List of Calculation without the projections
         """
-        Points, New_path = self.get_new_path()
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(len(folders), os.cpu_count() or 1), mp_context=context) as pool:
+            calculations = list(pool.map(load_calculation, folders, [list_energy] * len(folders)))
 
-        self.kpt_nmb.set_name(sum(self.kpts.min_distance(New_path, Points)))
+        # the calculations share one energy axis of the DOS if it is the same
+        for calc in calculations[1:]:
+            if np.array_equal(calc.DOS.energy_DOS, calculations[0].DOS.energy_DOS):
+                calc.DOS.energy_DOS = calculations[0].DOS.energy_DOS
 
+        return calculations
 
-    def create_list_points(self, New_Path, Points, data):
+
+    def show_comparison(self, calculations, error):
         """
-        Write list of kpoints for KPOINTS file
-        Input:
-        --------------------------
-        New_path: list, shape (N, 2)
-            List of chosen path between high-symmetry points, N is the number of paths
-        Points: dictionary; keys: 'point' (Point of high-symmetry point), 'Sym' (Symbol of the high-symmetry point)
-            Dictionary of high-symmetries point in the Brillouin zone
-        data: List, shape (N)
-            list of length between high-symmetry path
+        Plot the loaded calculations on top of each other in the main window
         """
+        if self.Compare.winfo_exists():
+            self.Compare.destroy()
 
-        list_kpts = list()
-        for p in range(len(data)):
-            pt1 = np.array(Points[New_Path[p][0]]['point'])
-            pt2 = np.array(Points[New_Path[p][1]]['point'])
-
-            list_kpts.append('{:.4f} {:.4f} {:.4f}     1   {} \n'.format(*tuple(pt1), Points[New_Path[p][0]]['Sym']))
-            for i in range(1, data[p] - 1):
-                kpt_point = (pt2 - pt1) / (data[p] - 1) * i
-                list_kpts.append('{:.4f} {:.4f} {:.4f}     1 \n'.format(*tuple(kpt_point)))
-
-            list_kpts.append('{:.4f} {:.4f} {:.4f}     1   {} \n'.format(*tuple(pt2), Points[New_Path[p][1]]['Sym']))
-            list_kpts.append('\n')
+        if error is not None:
+            messagebox.showerror(message = 'Loading failed: {}'.format(error))
+            return
 
-        return list_kpts
+        # Save and Export use the comparison until the next plot of a single calculation
+        self.calculations = calculations
+        self.save_figure_button.config(state=NORMAL)
+        self.plot_widget.grid_forget()
+        self.show_figure(self.draw_comparison(calculations))
 
 
-    def create_kpoints(self):
+    def draw_comparison(self, calculations):
         """
-        Create KPOINTS and POINTS.json file which is used to plot the electronic band structure
+        Draw bands and total DOS of several calculations into a new figure; the energies are relative to the valence
+        band maximum of each calculation and the kpoints are aligned to the high-symmetry points of the first calculation
+        Input:
+        --------------------------------
+        calculations: list
+            List of Calculation
+        Output:
+        --------------------------------
+        fig: Matplotlib Figure
         """
-        foldername_kpts = filedialog.askdirectory()
-        Points, New_path = self.get_new_path()
-        List_data = self.kpts.min_distance(New_path, Points)
+        plt.rcParams["font.family"] = self.initial_font.get()
+        plt.rcParams.update({'font.size': self.font_size_band_energy.get()})
+
+        fig = Figure(figsize= (self.size_x.get(), self.size_y.get()), dpi = 100)
+        gs = fig.add_gridspec(1, 2, width_ratios=[2, 1,])
+        gs.update(left=0.1, right=0.95, wspace=0.15)
+        ax1 = fig.add_subplot(gs[0])
+        ax2 = fig.add_subplot(gs[1], sharey=ax1)
+        self.band_artists = []
 
-        with open(foldername_kpts + '//POINTS.json', 'w') as fil:
-            json.dump(List_data, fil)
+        reference = calculations[0]
+        colormap = self.channel_colors(max(len(calculations), 3))
 
-        list_kpts = self.create_list_points(New_path, Points, List_data)
-        with open(foldername_kpts + '//KPOINTS', 'w') as fil:
-            fil.write('Electronic band structure of {} \n'.format(self.initial_crystal.get()))
-            fil.write('{} \n'.format(sum(List_data)))
-            fil.write('Reciprocal \n')
-            for x in range(len(list_kpts)):
-                fil.write(list_kpts[x])
+        for p in reference.distance:
+            ax1.axvline(p, color='grey')
 
+        for i in range(len(calculations)):
+            calc = calculations[i]
+            kpts = np.asarray(calc.Band.kpts, dtype=float)
+            if len(calc.distance) == len(reference.distance):
+                kpts = np.interp(kpts, calc.distance, reference.distance)
 
-    def close_kpoints(self):
+            bands = DecimatedLineCollection(kpts, calc.Band.energy, color=colormap[i], linewidth=1.5, label=calc.name)
+            ax1.add_collection(bands)
+            self.band_artists.append(bands)
+            ax2.plot(calc.DOS.totDOS_DOS, calc.DOS.energy_DOS, color=colormap[i], label=calc.name)
+
+        self.style_band_axes(ax1, ax2, reference.distance, reference.ticks)
+
+        return fig
+
+
+    def style_band_axes(self, ax1, ax2, distance, ticks):
         """
-        Close the kpoint window
+        Energy range, high-symmetry ticks, labels, grids, and legend of the band and DOS axes of the comparison and
+        the interpolation figures, taken from the Edit Graph settings
+        Input:
+        --------------------------------
+        ax1, ax2: Matplotlib Axes
+            axes of the bands and of the DOS
+        distance: list
+            positions of the high-symmetry points
+        ticks: list
+            labels of the high-symmetry points
         """
-        answer = messagebox.askokcancel('Exit?', 'Are you sure you want to exit?', icon='warning')
+        minE = float(self.minE.get_name()); maxE = float(self.maxE.get_name())
 
-        if answer:
-            self.KPoints.destroy()
-        else:
-            return
+        ax1.set_xlim(0, 1); ax1.set_ylim(minE, maxE)
+        ax1.set_xticks(distance); ax1.set_xticklabels(ticks)
+        ax1.tick_params(axis='x', which='major', labelsize=self.font_size_band_ticks.get())
+        ax1.axhline(0, color='k', lw=2)
+        ax2.set_xlim(-0.0005, float(self.ymax.get_name()))
+        ax2.axhline(0, color='k', lw=2)
+        ax2.tick_params(axis='x', which='major', labelsize=self.font_size_DOS_number.get())
+        ax2.tick_params(axis='y', labelleft=self.label_energy_DOS_var.get())
+
+        if self.label_ticks_var.get():
+            ax1.set_xlabel('Wavevector $k$', fontsize=self.font_size_band_x.get(), family=self.initial_font.get())
+        if self.label_energy_var.get():
+            ax1.set_ylabel('$E-E_F$ / eV', fontsize=self.font_size_band_y.get(), family=self.initial_font.get())
+        if self.label_DOS_var.get():
+            ax2.set_xlabel('Density of States', fontsize=self.font_size_DOS_y.get(), family=self.initial_font.get())
+        if self.grid_energy_var.get():
+            ax1.grid()
+        if self.grid_DOS_var.get():
+            ax2.grid()
 
+        ax2.legend(fancybox=True, shadow=True, prop={'size': 12})
 
-    def open_file(self):
+
+    def interpolation_window(self):
         """
-        Open folder which needs to include CONTCAR, KPOINTS, PROCAR_band, PROCAR_DOS, and POINTS.json files
+        Window to interpolate the bands and the DOS from the kpoints of PROCAR_DOS with star functions
         """
-        self.clear()
-        self.foldername = filedialog.askdirectory()
-
-        if self.foldername == '':
+        if self.plot_button['state'] == DISABLED:
+            messagebox.showerror(message = 'Please load the data first!')
             return
 
-        if set(['CONTCAR', 'KPOINTS', 'PROCAR_band', 'PROCAR_DOS', 'POINTS.json']).issubset(set(os.listdir(self.foldername))):
-            self.filename.set_name(self.foldername.split('/')[-1])
-            self.create_empty_plot()
-
-        else:
-            messagebox.showerror(message = 'Folder needs to include CONTCAR, KPOINTS, PROCAR_band, PROCAR_DOS from VASP and POINTS.json calculated from this app! ' +
-            'Please label them as stated.')
-            return
+        self.Interpolation = Toplevel()
+        self.Interpolation.configure(bg = self._from_rgb((11, 165, 193)))
+        self.Interpolation.geometry("720x420")
+        self.Interpolation.iconbitmap('icon_band.ico')
 
-        with open(self.foldername + '/CONTCAR') as con:
-            contcar = con.readlines()
+        self.star_ratio = EntryItem(self.Interpolation, name = 'Star functions per kpoint', row = 0)
+        self.star_ratio.create_EntryItem(); self.star_ratio.set_name('5')
+        self.path_density = EntryItem(self.Interpolation, name = 'Steps between two band kpoints', row = 1)
+        self.path_density.create_EntryItem(); self.path_density.set_name('8')
+        self.dos_mesh = EntryItem(self.Interpolation, name = 'DOS mesh (e.g. 24 or 24x24x12)', row = 2)
+        self.dos_mesh.create_EntryItem(); self.dos_mesh.set_name('24')
 
-        self.cmp = contcar[5].split()
+        self.interpolate_button = Button(self.Interpolation, text = 'Interpolate', command = self.interpolate)
+        self.interpolate_button.grid(row = 3, column = 0, columnspan = 2, padx = 10, pady = 10, ipadx = 35)
+        self.interpolate_button['font'] = self.font_window
 
-        self.load_button.config(state=NORMAL)
+        self.interpolation_text = Text(self.Interpolation, height = 8, width = 95)
+        self.interpolation_text.grid(row = 4, column = 0, columnspan = 2, padx = 10, pady = 10)
 
 
-    def close_program(self):
+    def interpolate(self):
         """
-        Close the VASP program
+        Interpolate the loaded calculation in a worker thread
         """
-        self.parent.quit()
-        self.parent.destroy()
+        try:
+            ratio = float(self.star_ratio.get_name())
+            density = int(self.path_density.get_name())
+            mesh = [int(x) for x in self.dos_mesh.get_name().lower().split('x')]
+        except ValueError:
+            messagebox.showerror(message = 'Please enter a number of star functions, an integer number of steps, and the mesh as integers!')
+            return
 
+        if ratio < 1 or density < 1 or len(mesh) not in [1, 3] or min(mesh) < 1:
+            messagebox.showerror(message = 'The number of star functions and steps must be at least 1 and the mesh needs 1 or 3 numbers!')
+            return
 
-    def plot_electronic_structure(self):
+        self.interpolate_button.config(state=DISABLED, text='Interpolating...')
+        self.run_in_background(self.calc.interpolate, (ratio, density, mesh), self.show_interpolation)
+
+
+    def show_interpolation(self, interpolation, error):
         """
-        Plot the electronic band structure, connected to the Plot button
+        Show the report and plot the interpolated bands and DOS in the main window
         """
-        if self.foldername == '':
+        if not self.Interpolation.winfo_exists():
             return
+        self.interpolate_button.config(state=NORMAL, text='Interpolate')
+
+        if error is not None:
+            messagebox.showerror(message = 'Interpolation failed: {}'.format(error))
+            return
+
+        self.interpolation_text.delete('1.0', END)
+        self.interpolation_text.insert(INSERT, interpolation['report'])
 
-        self.save_figure_button.config(state=NORMAL)
-        self.save_fig_csv_button.config(state=NORMAL)
         self.plot_widget.grid_forget()
-        self.plot()
+        self.show_figure(self.draw_interpolation(interpolation))
 
 
-    def get_energies(self):
+    def draw_interpolation(self, interpolation):
         """
-        Get information from PROCAR_DOS and PROCAR_band files; remove the valence band maximum from the energies
+        Draw the interpolated bands with the kpoints of PROCAR_band and the DOS of the fine mesh with the DOS of the
+        kpoints of PROCAR_DOS into a new figure
+        Input:
+        --------------------------------
+        interpolation: dictionary
+            Output of Calculation.interpolate
+        Output:
+        --------------------------------
+        fig: Matplotlib Figure
         """
+        plt.rcParams["font.family"] = self.initial_font.get()
+        plt.rcParams.update({'font.size': self.font_size_band_energy.get()})
 
-        with open(self.foldername +"/PROCAR_DOS") as pro_DOS:
-            procar_DOS = pro_DOS.readlines()
+        fig = Figure(figsize= (self.size_x.get(), self.size_y.get()), dpi = 100)
+        gs = fig.add_gridspec(1, 2, width_ratios=[2, 1,])
+        gs.update(left=0.1, right=0.95, wspace=0.15)
+        ax1 = fig.add_subplot(gs[0])
+        ax2 = fig.add_subplot(gs[1], sharey=ax1)
 
-        self.DOS = Energy(procar_DOS)
-        self.DOS.get_energies()
+        for p in self.distance:
+            ax1.axvline(p, color='grey')
 
-        with open(self.foldername +"/PROCAR_band") as pro_band:
-            procar_band = pro_band.readlines()
+        bands = DecimatedLineCollection(interpolation['kpts'], interpolation['energy'], color=self.color, linewidth=1.5,
+            label='Interpolation')
+        ax1.add_collection(bands)
+        k, e = np.broadcast_arrays(self.Band.kpts, self.Band.energy[:len(interpolation['energy'])])
+        ax1.plot(k.ravel(), e.ravel(), 'o', color=(0.6, 0.6, 0.6), markersize=3, label='PROCAR_band')
 
-        self.Band = Energy(procar_band)
-        self.Band.get_energies()
+        ax2.plot(interpolation['DOS_kpoints'], interpolation['Energy_DOS'], color=(0.6, 0.6, 0.6), label='PROCAR_DOS')
+        ax2.plot(interpolation['DOS'], interpolation['Energy_DOS'], color=self.color, label='Interpolation')
 
-        Eg, VBM = self.DOS.get_band_gap()
+        self.style_band_axes(ax1, ax2, self.distance, self.ticks)
 
-        self.Band.energy -= VBM
-        self.DOS.energy -= VBM
+        return fig
 
 
-    def get_contribution(self, energy, DOS_elements_new):
+    def transport_window(self):
         """
-        Get the contributions for each band and kpoint
-        Input:
-        ----------------------
-        energy: ndarray, shape (M, N), dtype=float
-            Array of energies for M bands and N kpoints
-        DOS_element_new: ndarray, shape (M, N, X), dtype=float
-            Array of DOS for each band and kpoint as well as element (orbital)
+        Window to compute Seebeck coefficient, conductivity, and electronic thermal conductivity over temperatures and
+        chemical potentials in the constant relaxation time approximation
         """
+        if self.plot_button['state'] == DISABLED:
+            messagebox.showerror(message = 'Please load the data first!')
+            return
 
-        contrib = np.zeros((len(energy), len(energy[0]), len(DOS_elements_new[0][0])))
-        for i in range(len(energy)):
-
-            for j in range(len(energy[0])):
-                sume = 0
-                for c in range(len(DOS_elements_new[i][j])):
-                    sume += DOS_elements_new[i][j][c]**2
-                total_DOS = np.sqrt(sume)
-                for k in range(len(DOS_elements_new[0][0])):
-                    contrib[i, j, k] = DOS_elements_new[i][j][k] / total_DOS
+        self.Transport = Toplevel()
+        self.Transport.configure(bg = self._from_rgb((11, 165, 193)))
+        self.Transport.geometry("1100x850")
+        self.Transport.iconbitmap('icon_band.ico')
+
+        self.transport_T = EntryItem(self.Transport, name = 'Temperatures / K (e.g. 300, 500 or 300:900:100)', row = 0)
+        self.transport_T.create_EntryItem(); self.transport_T.set_name('300:900:200')
+        self.transport_mu = EntryItem(self.Transport, name = 'Chemical potential / eV (min:max:step)', row = 1)
+        self.transport_mu.create_EntryItem(); self.transport_mu.set_name('-1:2:0.005')
+        self.transport_ratio = EntryItem(self.Transport, name = 'Star functions per kpoint', row = 2)
+        self.transport_ratio.create_EntryItem(); self.transport_ratio.set_name('5')
+        self.transport_mesh = EntryItem(self.Transport, name = 'Mesh (e.g. 24 or 24x24x12)', row = 3)
+        self.transport_mesh.create_EntryItem(); self.transport_mesh.set_name('24')
+
+        self.transport_button = Button(self.Transport, text = 'Compute', command = self.compute_transport)
+        self.transport_button.grid(row = 4, column = 0, padx = 10, pady = 10, ipadx = 35)
+        self.transport_button['font'] = self.font_window
+        self.transport_export = Button(self.Transport, text = 'Export CSV', command = self.export_transport, state = DISABLED)
+        self.transport_export.grid(row = 4, column = 1, padx = 10, pady = 10, ipadx = 35)
+        self.transport_export['font'] = self.font_window
+
+
+    def parse_values(self, text):
+        """
+        Values of an entry as comma separated list or as range min:max:step (including max)
+        """
+        if ':' in text:
+            start, stop, step = [float(x) for x in text.split(':')]
+            if step <= 0 or stop < start:
+                raise ValueError('Range needs min <= max and a positive step')
+            return start + step * np.arange(int(np.floor((stop - start) / step + 1e-9)) + 1)
 
-        return contrib
+        return np.array([float(x) for x in text.split(',')])
 
 
-    def get_kpoints(self):
+    def compute_transport(self):
         """
-        Get ticks and number of kpoints between high-symmetry points
+        Compute the transport coefficients of the loaded calculation in a worker thread
         """
+        try:
+            temperatures = self.parse_values(self.transport_T.get_name())
+            potentials = self.parse_values(self.transport_mu.get_name())
+            ratio = float(self.transport_ratio.get_name())
+            mesh = [int(x) for x in self.transport_mesh.get_name().lower().split('x')]
+        except ValueError:
+            messagebox.showerror(message = 'Please enter temperatures, chemical potentials, star functions, and mesh as numbers!')
+            return
 
-        with open(self.foldername + "/Points.json") as json_file:
-            Kpoint_mesh = json.load(json_file)
-
-        with open(self.foldername + "/KPOINTS") as k:
-            kpoints = k.readlines()
+        if np.min(temperatures) <= 0 or ratio < 1 or len(mesh) not in [1, 3] or min(mesh) < 1:
+            messagebox.showerror(message = 'Temperatures must be positive, at least 1 star function is needed, and the mesh needs 1 or 3 numbers!')
+            return
 
-        self.ticks, self.distance = self.Band.get_distance(Kpoint_mesh, kpoints)
+        self.transport_button.config(state=DISABLED, text='Computing...')
+        self.run_in_background(self.run_transport, (ratio, mesh, temperatures, potentials), self.show_transport)
 
 
-    def Edit_graph(self):
+    def run_transport(self, ratio, mesh, temperatures, potentials):
         """
-        Edit plot by changing fonts, font size, labels, or grids
+        Transport distribution and coefficients (runs in the worker thread)
         """
+        transport = self.calc.transport(ratio=ratio, mesh=mesh)
 
-        self.Top = Toplevel()
-        self.Top.configure(bg = self._from_rgb((11, 165, 193)))
-        self.Top.geometry("800x650")
-        self.Top.iconbitmap('icon_band.ico')
-        self.Top.grab_set()
+        with profiler.stage('transport coefficients'):
+            return transport.compute(temperatures, potentials)
 
-        self.label_input = Label(self.Top, text = 'Labels/Ticks')
-        self.label_input.grid(row = 0, column = 0, pady = (10, 5))
-        self.label_input['font'] = self.font_window
 
-        self.label_input = Label(self.Top, text = 'Figure')
-        self.label_input.grid(row = 0, column = 2, pady = (10, 5))
-        self.label_input['font'] = self.font_window
+    def show_transport(self, results, error):
+        """
+        Plot the transport coefficients into the Transport window
+        """
+        if not self.Transport.winfo_exists():
+            return
+        self.transport_button.config(state=NORMAL, text='Compute')
 
-        self.font_size_band_x_entry = Entry(self.Top, textvariable = self.font_size_band_x, width = 24)
-        self.font_size_band_x_entry.grid(row = 1, column = 1, padx = 10, pady=10)
-        self.font_size_band_x_label = Label(self.Top, text = 'Font Size Bandstructure x', relief = RIDGE, anchor = 'w')
-        self.font_size_band_x_label.grid(row = 1, column = 0, padx = 10, pady=10, ipadx = 14)
+        if error is not None:
+            messagebox.showerror(message = 'Transport failed: {}'.format(error))
+            return
 
-        self.font_size_band_y_entry = Entry(self.Top, textvariable = self.font_size_band_y, width = 24)
-        self.font_size_band_y_entry.grid(row = 2, column = 1, padx = 10)
-        self.font_size_band_y_label = Label(self.Top, text = 'Font Size Bandstructure y', relief = RIDGE, anchor = 'w')
-        self.font_size_band_y_label.grid(row = 2, column = 0, padx = 10, ipadx = 14)
+        self.transport_results = results
+        self.transport_export.config(state=NORMAL)
 
-        self.font_size_band_ticks_entry = Entry(self.Top, textvariable = self.font_size_band_ticks, width = 24)
-        self.font_size_band_ticks_entry.grid(row = 3, column = 1, padx = 10, pady=10)
-        self.font_size_band_ticks_label = Label(self.Top, text = 'Font Size Bandstructure ticks x', relief = RIDGE, anchor = 'w')
-        self.font_size_band_ticks_label.grid(row = 3, column = 0, padx = 10, pady=10, ipadx = 0)
+        if getattr(self, 'transport_canvas', None) is not None and self.transport_canvas.get_tk_widget().winfo_exists():
+            self.transport_canvas.get_tk_widget().destroy()
 
-        self.font_size_band_energy_entry = Entry(self.Top, textvariable = self.font_size_band_energy, width = 24)
-        self.font_size_band_energy_entry.grid(row = 4, column = 1, padx = 10, pady=10)
-        self.font_size_band_energy_label = Label(self.Top, text = 'Font Size Bandstructure ticks y', relief = RIDGE, anchor = 'w')
-        self.font_size_band_energy_label.grid(row = 4, column = 0, padx = 10, pady=10, ipadx = 0)
+        self.transport_canvas = FigureCanvasTkAgg(self.draw_transport(results), master = self.Transport)
+        self.transport_canvas.draw()
+        self.transport_canvas.get_tk_widget().grid(row = 5, column = 0, columnspan = 2, padx = 10, pady = 10)
 
-        self.font_size_DOS_x_entry = Entry(self.Top, textvariable = self.font_size_DOS_x, width = 24)
-        self.font_size_DOS_x_entry.grid(row = 5, column = 1, padx = 10, pady=10)
-        self.font_size_DOS_x_label = Label(self.Top, text = 'Font Size DOS x', relief = RIDGE, anchor = 'w')
-        self.font_size_DOS_x_label.grid(row = 5, column = 0, padx = 10, pady=10, ipadx = 39)
 
-        self.font_size_DOS_y_entry = Entry(self.Top, textvariable = self.font_size_DOS_y, width = 24)
-        self.font_size_DOS_y_entry.grid(row = 6, column = 1, padx = 10, pady=10)
-        self.font_size_DOS_y_label = Label(self.Top, text = 'Font Size DOS y', relief = RIDGE, anchor = 'w')
-        self.font_size_DOS_y_label.grid(row = 6, column = 0, padx = 10, pady=10, ipadx = 39)
+    def draw_transport(self, results):
+        """
+        Draw the averages of the diagonal components over the chemical potential, one line per temperature
+        Input:
+        --------------------------------
+        results: dictionary
+            Output of Transport.compute
+        Output:
+        --------------------------------
+        fig: Matplotlib Figure
+        """
+        plt.rcParams["font.family"] = self.initial_font.get()
+        fig = Figure(figsize = (10, 6), dpi = 100)
+        axes = fig.subplots(2, 2, sharex = True)
+        colormap = self.channel_colors(max(len(results['T']), 3))
+
+        quantities = [
+            (axes[0, 0], 'seebeck', '$S$ / $\\mu$V K$^{-1}$'),
+            (axes[0, 1], 'sigma', '$\\sigma/\\tau$ / $\\Omega^{-1}$m$^{-1}$s$^{-1}$'),
+            (axes[1, 0], 'power factor', '$S^2\\sigma/\\tau$ / W m$^{-1}$K$^{-2}$s$^{-1}$'),
+            (axes[1, 1], 'kappa', '$\\kappa_e/\\tau$ / W m$^{-1}$K$^{-1}$s$^{-1}$'),
+        ]
 
-        self.font_size_DOS_ticks_entry = Entry(self.Top, textvariable = self.font_size_DOS_number, width = 24)
-        self.font_size_DOS_ticks_entry.grid(row = 7, column = 1, padx = 10, pady=10)
-        self.font_size_DOS_ticks_label = Label(self.Top, text = 'Font Size DOS ticks', relief = RIDGE, anchor = 'w')
-        self.font_size_DOS_ticks_label.grid(row = 7, column = 0, padx = 10, pady=10, ipadx = 31)
+        for ax, key, label in quantities:
+            for i in range(len(results['T'])):
+                ax.plot(results['mu'], results[key][i].mean(axis=-1), color=colormap[i], label='{:g} K'.format(results['T'][i]))
+            ax.set_ylabel(label, fontsize=10)
+            ax.axvline(0, color='grey', lw=1)
+            ax.grid()
 
-        self.size_x_entry = Entry(self.Top, textvariable = self.size_x, width = 24)
-        self.size_x_entry.grid(row = 1, column = 3, padx = 10, pady=10)
-        self.size_x_label = Label(self.Top, text = 'Figure Width', relief = RIDGE, anchor = 'w')
-        self.size_x_label.grid(row = 1, column = 2, padx = 10, pady=10, ipadx = 37)
+        for ax in axes[0, 1], axes[1, 0], axes[1, 1]:
+            ax.set_yscale('log')
+        for ax in axes[1]:
+            ax.set_xlabel('$\\mu-E_{VBM}$ / eV', fontsize=10)
 
-        self.size_y_entry = Entry(self.Top, textvariable = self.size_y, width = 24)
-        self.size_y_entry.grid(row = 2, column = 3, padx = 10, pady=10)
-        self.size_y_label = Label(self.Top, text = 'Figure Height', relief = RIDGE, anchor = 'w')
-        self.size_y_label.grid(row = 2, column = 2, padx = 10, pady=10, ipadx = 35)
+        axes[0, 0].legend(fancybox=True, shadow=True, prop={'size': 9})
+        fig.tight_layout()
 
-        self.size_x_space_entry = Entry(self.Top, textvariable = self.size_x_space, width = 24)
-        self.size_x_space_entry.grid(row = 3, column = 3, padx = 10, pady=10)
-        self.size_x_space_label = Label(self.Top, text = 'Figure Move Horizontal', relief = RIDGE, anchor = 'w')
-        self.size_x_space_label.grid(row = 3, column = 2, padx = 10, pady=10, ipadx=8)
+        return fig
 
-        self.size_y_space_entry = Entry(self.Top, textvariable = self.size_y_space, width = 24)
-        self.size_y_space_entry.grid(row = 4, column = 3, padx = 10, pady=10)
-        self.size_y_space_label = Label(self.Top, text = 'Figure Move Vertical', relief = RIDGE, anchor = 'w')
-        self.size_y_space_label.grid(row = 4, column = 2, padx = 10, pady=10, ipadx=17)
 
-        self.size_x_length_entry = Entry(self.Top, textvariable = self.size_x_length, width = 24)
-        self.size_x_length_entry.grid(row = 5, column = 3, padx = 10, pady=10)
-        self.size_x_length_label = Label(self.Top, text = 'Figure Length Horizontal', relief = RIDGE, anchor = 'w')
-        self.size_x_length_label.grid(row = 5, column = 2, padx = 10, pady=10, ipadx=5)
+    def export_transport(self):
+        """
+        Save the transport coefficients as .csv file
+        """
+        filename = filedialog.asksaveasfilename(title = 'Save transport', defaultextension = '.csv', filetypes = [('CSV (Comma delimited)', '*.csv')])
+        if filename == '':
+            return
 
-        self.size_y_length_entry = Entry(self.Top, textvariable = self.size_y_length, width = 24)
-        self.size_y_length_entry.grid(row = 6, column = 3, padx = 10, pady=10)
-        self.size_y_length_label = Label(self.Top, text = 'Figure Length Vertical', relief = RIDGE, anchor = 'w')
-        self.size_y_length_label.grid(row = 6, column = 2, padx = 10, pady=10, ipadx=14)
+        self.transport_export.config(state=DISABLED)
+        self.run_in_background(self.write_transport, (filename, self.transport_results), self.transport_written)
 
-        self.font_menu = OptionMenu(self.Top, self.initial_font, *self.font_options)
-        self.font_menu.grid(row = 8, column = 1, padx = 10, pady = 10)
-        self.font_label = Label(self.Top, text = 'Font', relief = RIDGE, anchor = 'w')
-        self.font_label.grid(row = 8, column = 0, padx = 10, pady = 10, ipadx = 32)
 
-        self.color_2plot_menu = OptionMenu(self.Top, self.initial_color_2plot, *self.color_2plot_options)
-        self.color_2plot_menu.grid(row = 8, column = 3, padx = 10, pady = 10)
-        self.color_2plot_label = Label(self.Top, text = 'Color for 2 Elements', relief = RIDGE, anchor = 'w')
-        self.color_2plot_label.grid(row = 8, column = 2, padx = 10, pady = 10, ipadx = 2)
+    def write_transport(self, filename, results):
+        """
+        Write one line per temperature and chemical potential
+        Input:
+        --------------------------
+        filename: str
+        results: dictionary from Transport.compute
+        """
+        T, mu = [x.ravel() for x in np.meshgrid(results['T'], results['mu'], indexing='ij')]
+        columns = [T, mu, results['carriers'].ravel()]
+        header = ['T / K', 'mu - E_VBM / eV', 'carriers / cm^-3 (holes > 0)']
 
-        self.label_energy = Checkbutton(self.Top, text='Energy Label Band Structure', variable=self.label_energy_var)
-        self.label_energy.grid(row=9, column=0, columnspan=2, pady=10, ipadx=5)
+        for key, name in [('sigma', 'sigma/tau / (Ohm m s)^-1'), ('seebeck', 'S / muV/K'), ('kappa', 'kappa_e/tau / W/(m K s)'),
+            ('power factor', 'S^2 sigma/tau / W/(m K^2 s)')]:
+            columns += [results[key][..., axis].ravel() for axis in range(3)]
+            header += ['{} {}'.format(name, axis) for axis in ['xx', 'yy', 'zz']]
 
-        self.label_ticks = Checkbutton(self.Top, text='Wavevector Label', variable=self.label_ticks_var)
-        self.label_ticks.grid(row=9, column=2, pady=10, ipadx=18)
+        with open(filename, 'w') as fil:
+            fil.write(', '.join(header) + '\n')
+            np.savetxt(fil, np.column_stack(columns), fmt='%.6e', delimiter=', ')
 
-        self.label_energy_DOS = Checkbutton(self.Top, text='Energy Label DOS', variable=self.label_energy_DOS_var)
-        self.label_energy_DOS.grid(row=10, column=0, columnspan=2, pady=10, ipadx=33)
 
-        self.label_DOS = Checkbutton(self.Top, text='DOS Label', variable=self.label_DOS_var)
-        self.label_DOS.grid(row=10, column=2, pady=10, ipadx=37)
+    def transport_written(self, result, error):
+        """
+        Called in the main thread after the transport coefficients have been written
+        """
+        if self.Transport.winfo_exists():
+            self.transport_export.config(state=NORMAL)
 
-        self.grid_energy = Checkbutton(self.Top, text='Grid Band Structure', variable=self.grid_energy_var)
-        self.grid_energy.grid(row=11, column=0, columnspan=2, pady=10, ipadx=29)
+        if error is not None:
+            messagebox.showerror(message = 'Export failed: {}'.format(error))
 
-        self.grid_DOS = Checkbutton(self.Top, text='Grid DOS', variable=self.grid_DOS_var)
-        self.grid_DOS.grid(row=11, column=2, pady=10, ipadx=40)
 
-        self.ticks_energy = Checkbutton(self.Top, text='Ticks Energy Band', variable=self.ticks_energy_var)
-        self.ticks_energy.grid(row=9, column=3, pady=10, ipadx=20)
+    def fermi_window(self):
+        """
+        Window with the chemical potential and the carrier concentrations over the temperature for several dopings;
+        the curves are updated while the temperatures or dopings are typed
+        """
+        if self.plot_button['state'] == DISABLED:
+            messagebox.showerror(message = 'Please load the data first!')
+            return
 
-        self.ticks_wavevector = Checkbutton(self.Top, text='Ticks Wavevector', variable=self.ticks_wavevector_var)
-        self.ticks_wavevector.grid(row=10, column=3, pady=10, ipadx=22)
+        try:
+            self.fermi_solver = self.calc.fermi_level()
+        except ValueError as err:
+            messagebox.showerror(message = str(err))
+            return
 
-        self.ticks_energy_DOS = Checkbutton(self.Top, text='Ticks Energy DOS', variable=self.ticks_energy_DOS_var)
-        self.ticks_energy_DOS.grid(row=11, column=3, pady=10, ipadx=22)
+        self.Fermi = Toplevel()
+        self.Fermi.configure(bg = self._from_rgb((11, 165, 193)))
+        self.Fermi.geometry("1000x720")
+        self.Fermi.iconbitmap('icon_band.ico')
 
-        self.ticks_DOS = Checkbutton(self.Top, text='Ticks DOS', variable=self.ticks_DOS_var)
-        self.ticks_DOS.grid(row=12, column=3, pady=10, ipadx=42)
+        self.fermi_T = EntryItem(self.Fermi, name = 'Temperatures / K (e.g. 300, 500 or 50:1000:10)', row = 0)
+        self.fermi_T.create_EntryItem(); self.fermi_T.set_name('50:1000:10')
+        self.fermi_doping = EntryItem(self.Fermi, name = 'Doping / cm^-3 (donors > 0, acceptors < 0)', row = 1)
+        self.fermi_doping.create_EntryItem(); self.fermi_doping.set_name('1e17, -1e17, 1e19')
+        self.fermi_status = Label(self.Fermi, text = '', anchor = 'w')
+        self.fermi_status.grid(row = 2, column = 0, columnspan = 2, padx = 10, pady = 6)
 
-        btn_color = Button(self.Top, text = 'Color Band Structure', command = self.choose_color)
-        btn_color.grid(row = 7, column = 2, padx =10, pady = 10, ipadx = 13)
+        for item in [self.fermi_T, self.fermi_doping]:
+            item.entry.bind('<KeyRelease>', self.schedule_fermi)
 
-        self.frame = Frame(self.Top, border=1, relief=SUNKEN, width=60, height=30)
-        self.frame.grid(row=7, column=3, padx=10, pady=10, ipadx=10)
-        self.frame.config(bg=self.hx)
+        self.fermi_figure = Figure(figsize = (9.5, 5.5), dpi = 100)
+        self.fermi_canvas = FigureCanvasTkAgg(self.fermi_figure, master = self.Fermi)
+        self.fermi_canvas.get_tk_widget().grid(row = 3, column = 0, columnspan = 2, padx = 10, pady = 10)
+        self.fermi_job = None
 
-        btn_close = Button(self.Top, text = 'Save/Close', command = self.close_update_graph)
-        btn_close.grid(row = 13, column = 3, padx =10, pady = 10, ipadx = 35)
+        self.update_fermi()
 
-        btn_default = Button(self.Top, text = 'Save as Default', command = self.default)
-        btn_default.grid(row = 12, column = 0, padx =10, pady = 10, ipadx = 35)
+
+    def schedule_fermi(self, *args):
+        """
+        Update the curves shortly after the last key press
+        """
+        if self.fermi_job is not None:
+            self.Fermi.after_cancel(self.fermi_job)
+        self.fermi_job = self.Fermi.after(300, self.update_fermi)
 
 
-    def choose_color(self):
+    def update_fermi(self):
         """
-        Choose a color for the electronic band structure
+        Solve the chemical potential for the temperatures and dopings of the window and redraw the curves
         """
-        (color_new, self.hx) = colorchooser.askcolor()
-        if color_new != None:
-            self.color = np.array(color_new) / 256.
-        self.frame.config(bg=self.hx)
+        self.fermi_job = None
 
+        try:
+            temperatures = self.parse_values(self.fermi_T.get_name())
+            doping = self.parse_values(self.fermi_doping.get_name()) if self.fermi_doping.get_name().strip() else np.zeros(0)
+        except ValueError:
+            self.fermi_status.config(text = 'Please enter the temperatures and the dopings as numbers')
+            return
 
-    def close_update_graph(self):
+        if len(temperatures) == 0 or np.min(temperatures) <= 0:
+            self.fermi_status.config(text = 'Temperatures must be positive')
+            return
+
+        start = time.perf_counter()
+        doping = np.concatenate(([0.], doping[doping != 0]))
+        with profiler.stage('Fermi level'):
+            mu, n, p = self.fermi_solver.solve(temperatures, doping)
+
+        self.fermi_status.config(text = '{} temperatures x {} dopings solved in {:.0f} ms'.format(len(temperatures), len(doping),
+            1000 * (time.perf_counter() - start)))
+        self.draw_fermi(self.fermi_figure, temperatures, doping, mu, n, p)
+        self.fermi_canvas.draw_idle()
+
+
+    def draw_fermi(self, fig, temperatures, doping, mu, n, p):
         """
-        Close Edit window and update the plot
+        Draw chemical potential and carrier concentrations over the temperature
+        Input:
+        --------------------------------
+        fig: Matplotlib Figure
+        temperatures: ndarray, shape (T)
+        doping: ndarray, shape (D)
+            net donor concentration in cm^-3, the first one is 0 (intrinsic)
+        mu, n, p: ndarray, shape (T, D)
+            output of FermiLevel.solve
+        """
+        fig.clear()
+        ax1, ax2 = fig.subplots(1, 2)
+        colormap = self.channel_colors(max(len(doping), 3))
+
+        for j in range(len(doping)):
+            label = 'intrinsic' if doping[j] == 0 else '{:.1e} cm$^{{-3}}$'.format(doping[j])
+            color = 'k' if doping[j] == 0 else colormap[j]
+            ax1.plot(temperatures, mu[:, j], color=color, label=label)
+            ax2.plot(temperatures, n[:, j], color=color, label=label)
+            ax2.plot(temperatures, p[:, j], '--', color=color)
+
+        ax1.axhline(0, color='grey', lw=1)
+        if self.fermi_solver.midgap > 0:
+            ax1.axhline(2 * self.fermi_solver.midgap, color='grey', lw=1)
+
+        ax1.set_ylabel('$\\mu-E_{VBM}$ / eV', fontsize=11)
+        ax2.set_ylabel('$n$ (solid), $p$ (dashed) / cm$^{-3}$', fontsize=11)
+        ax2.set_yscale('log')
+        ax2.set_ylim(bottom=1e8)
+        for ax in ax1, ax2:
+            ax.set_xlabel('$T$ / K', fontsize=11)
+            ax.grid()
+
+        ax1.legend(fancybox=True, shadow=True, prop={'size': 9})
+        fig.tight_layout()
+
+
+    def joint_window(self):
+        """
+        Window with the joint DOS, the distribution of the direct gaps, and the lowest transitions
         """
+        if self.plot_button['state'] == DISABLED:
+            messagebox.showerror(message = 'Please load the data first!')
+            return
 
-        self.plot_widget.grid_forget()
+        self.Joint = Toplevel()
+        self.Joint.configure(bg = self._from_rgb((11, 165, 193)))
+        self.Joint.geometry("1000x900")
+        self.Joint.iconbitmap('icon_band.ico')
 
-        if self.plot_button['state'] == NORMAL:
-            self.plot()
+        self.joint_maxE = EntryItem(self.Joint, name = 'Maximum transition energy / eV', row = 0)
+        self.joint_maxE.create_EntryItem(); self.joint_maxE.set_name('6')
+        self.joint_Eres = EntryItem(self.Joint, name = 'Resolution / eV', row = 1)
+        self.joint_Eres.create_EntryItem(); self.joint_Eres.set_name('0.02')
 
-        else:
-            self.create_empty_plot()
-        self.Top.destroy()
+        self.joint_weighting = StringVar(); self.joint_weighting.set('none')
+        frame = Frame(self.Joint)
+        frame.grid(row = 2, column = 0, columnspan = 2, padx = 10, pady = 6)
+        Label(frame, text = 'Weight by the overlap of').grid(row = 0, column = 0, padx = 6)
+        for i, (text, value) in enumerate([('nothing', 'none'), ('elements', 'elements'), ('orbitals', 'orbitals')]):
+            Radiobutton(frame, text = text, variable = self.joint_weighting, value = value).grid(row = 0, column = i + 1, padx = 6)
 
+        self.joint_button = Button(self.Joint, text = 'Compute', command = self.compute_joint)
+        self.joint_button.grid(row = 3, column = 0, columnspan = 2, padx = 10, pady = 10, ipadx = 35)
+        self.joint_button['font'] = self.font_window
 
-    def default(self):
+        self.joint_text = Text(self.Joint, height = 8, width = 110)
+        self.joint_text.grid(row = 5, column = 0, columnspan = 2, padx = 10, pady = 10)
+
+
+    def compute_joint(self):
         """
-        Produce a default file which is used for the program
+        Compute the joint DOS of the loaded calculation in a worker thread
         """
+        try:
+            maxE = float(self.joint_maxE.get_name()); Eres = float(self.joint_Eres.get_name())
+        except ValueError:
+            messagebox.showerror(message = 'Please enter the maximum energy and the resolution as numbers!')
+            return
 
-        dic = {
-            'font' : self.initial_font.get(),
-            'color_2plot' : self.initial_color_2plot.get(),
-            'size_band_x' : self.font_size_band_x.get(),
-            'size_band_y' : self.font_size_band_y.get(),
-            'size_band_ticks' : self.font_size_band_ticks.get(),
-            'size_band_energy' : self.font_size_band_energy.get(),
-            'size_DOS_x' : self.font_size_DOS_x.get(),
-            'size_DOS_y' : self.font_size_DOS_y.get(),
-            'size_DOS_ticks' : self.font_size_DOS_number.get(),
-            'figure_size_x' : self.size_x.get(),
-            'figure_size_y' : self.size_y.get(),
-            'figure_space_x' : self.size_x_space.get(),
-            'figure_space_y' : self.size_y_space.get(),
-            'figure_length_x' : self.size_x_length.get(),
-            'figure_length_y' : self.size_y_length.get(),
-            'label_energy' : self.label_energy_var.get(),
-            'label_energy_DOS' : self.label_energy_DOS_var.get(),
-            'label_ticks' : self.label_ticks_var.get(),
-            'label_DOS' : self.label_DOS_var.get(),
-            'grid_energy' : self.grid_energy_var.get(),
-            'grid_DOS' : self.grid_DOS_var.get(),
-            'ticks_energy' : self.ticks_energy_var.get(),
-            'ticks_wavevector' : self.ticks_wavevector_var.get(),
-            'ticks_energy_DOS' : self.ticks_energy_DOS_var.get(),
-            'ticks_DOS' : self.ticks_DOS_var.get(),
-            'color' : self.color.tolist(),
-            'color_hex' : self.hx,
-        }
+        if maxE <= 0 or Eres <= 0 or maxE / Eres > 1e6:
+            messagebox.showerror(message = 'Maximum energy and resolution must be positive!')
+            return
+
+        self.joint_button.config(state=DISABLED, text='Computing...')
+        self.run_in_background(self.calc.joint_DOS, (maxE, Eres, self.joint_weighting.get()), self.show_joint)
+
+
+    def show_joint(self, result, error):
+        """
+        Plot the joint DOS into the window and list the lowest transitions
+        """
+        if not self.Joint.winfo_exists():
+            return
+        self.joint_button.config(state=NORMAL, text='Compute')
 
-        with open('~default.json', 'w') as d:
-            json.dump(dic, d)
+        if error is not None:
+            messagebox.showerror(message = 'Joint DOS failed: {}'.format(error))
+            return
 
+        if getattr(self, 'joint_canvas', None) is not None and self.joint_canvas.get_tk_widget().winfo_exists():
+            self.joint_canvas.get_tk_widget().destroy()
 
-    def sum_DOS_elements(self):
+        self.joint_canvas = FigureCanvasTkAgg(self.draw_joint(result), master = self.Joint)
+        self.joint_canvas.draw()
+        self.joint_canvas.get_tk_widget().grid(row = 4, column = 0, columnspan = 2, padx = 10, pady = 10)
+
+        self.joint_text.delete('1.0', END)
+        self.joint_text.insert(INSERT, self.joint_report(result))
+
+
+    def joint_report(self, result):
         """
-        Sum over the ions to get DOS for one element
+        Smallest direct gap and table of the lowest (allowed) transitions
         """
+        gaps = result['direct_gap'][np.isfinite(result['direct_gap'])]
+        lines = []
+        if len(gaps):
+            k = int(np.argmin(np.where(np.isfinite(result['direct_gap']), result['direct_gap'], np.inf)))
+            lines.append('Smallest direct gap: {:.4f} eV at kpoint {} ({:.4f} {:.4f} {:.4f})'.format(gaps.min(), k + 1, *result['coord'][k]))
 
-        with open(self.foldername + '/CONTCAR') as con:
-            contcar = con.readlines()
+        lines.append('Lowest {}transitions:'.format('' if result['weighting'] == 'none' else 'allowed '))
+        lines.append('{:>12} {:>8} {:>28} {:>10} {:>12} {:>8}'.format('Energy / eV', 'kpoint', 'coordinates', 'occupied', 'unoccupied', 'overlap'))
+        for e, k, v, c, overlap in result['lowest']:
+            lines.append('{:12.4f} {:8d} {:>28} {:10d} {:12d} {:8.3f}'.format(e, k, '{:.4f} {:.4f} {:.4f}'.format(*result['coord'][k - 1]),
+                v, c, overlap))
 
-        self.Band.element_DOS(contcar)
-        self.DOS.element_DOS(contcar)
+        return '\n'.join(lines)
 
 
-    def rgbline(self, ax, k, e, red, green, blue, alpha=1.):
+    def draw_joint(self, result):
         """
-        Produce segments for rgb values
+        Draw the joint DOS and the distribution of the direct gaps over the transition energy
         Input:
-        -------------------------
-        ax: Matplotlib subplot
-        k: ndarray, shape (N), dtype=float
-            Array of kpoints
-        e: ndarray, shape (M, N), dtype=float
-            Array of energies for M bands and N kpoints
-        red: ndarray, shape (N)
-            Array of red contribution
-        green: ndarray, shape (N)
-            Array of green contribution
-        blue: ndarray, shape (N)
-            Array of blue contribution
-        alpha: ndarray, shape (N)
-            Array of shading
-        http://nbviewer.ipython.org/urls/raw.github.com/dpsanders/matplotlib-examples/master/colorline.ipynb
-        """
-
-        pts = np.array([k, e]).T.reshape(-1, 1, 2)
-
-        seg = np.concatenate([pts[:-1], pts[1:]], axis=1)
-        nseg = len(k) - 1
-        if len(red) == 0:
-            r = [0 for i in range(nseg)]
-        else:
-            r = [0.5 * (red[i] + red[i + 1]) for i in range(nseg)]
+        --------------------------------
+        result: dictionary
+            Output of Calculation.joint_DOS
+        Output:
+        --------------------------------
+        fig: Matplotlib Figure
+        """
+        plt.rcParams["font.family"] = self.initial_font.get()
+        fig = Figure(figsize = (9.5, 5), dpi = 100)
+        ax1, ax2 = fig.subplots(2, 1, sharex = True)
 
-        if len(green) == 0:
-            g = [0 for i in range(nseg)]
-        else:
-            g = [0.5 * (green[i] + green[i + 1]) for i in range(nseg)]
+        label = 'JDOS' if result['weighting'] == 'none' else 'JDOS weighted by {} overlap'.format(result['weighting'][:-1])
+        ax1.fill_between(result['energy'], result['JDOS'], 0, color=(0.7, 0.7, 0.7))
+        ax1.plot(result['energy'], result['JDOS'], color=self.color, label=label)
+        ax2.step(result['energy'], result['gap_distribution'], where='mid', color=self.color, label='Direct gaps')
 
-        if len(blue) == 0:
-            b = [0 for i in range(nseg)]
-        else:
-            b = [0.5 * (blue[i] + blue[i + 1]) for i in range(nseg)]
+        if len(result['lowest']):
+            for ax in ax1, ax2:
+                ax.axvline(result['lowest'][0][0], color='grey', ls='--', lw=1)
 
-        a = np.ones(nseg, np.float64) * alpha
-        lc = LineCollection(seg, colors=list(zip(r, g, b, a)), linewidth=2)
-        ax.add_collection(lc)
+        ax1.set_ylabel('JDOS / eV$^{-1}$', fontsize=11)
+        ax2.set_ylabel('Kpoints / eV$^{-1}$', fontsize=11)
+        ax2.set_xlabel('Transition energy / eV', fontsize=11)
+        ax2.set_xlim(0, result['energy'][-1])
+        for ax in ax1, ax2:
+            ax.set_ylim(bottom=0)
+            ax.grid()
+            ax.legend(fancybox=True, shadow=True, prop={'size': 9})
 
+        fig.tight_layout()
 
-    def colors(self):
+        return fig
+
+
+    def masses_window(self):
         """
-        List of potential colors [in this order]
+        Window with the effective masses of the extrema near the band edges along the band path
         """
-        return  ['red',
-            'green',
-            'blue',
-            'orange',
-            'cyan',
-            'yellow',
-            'lawngreen',
-            'pink',
-            'magenta',
-            'navy',
-            'springgreen'
-        ]
+        if self.plot_button['state'] == DISABLED:
+            messagebox.showerror(message = 'Please load the data first!')
+            return
 
+        self.Masses = Toplevel()
+        self.Masses.configure(bg = self._from_rgb((11, 165, 193)))
+        self.Masses.iconbitmap('icon_band.ico')
 
-    def plot_pDOS(self, ax):
+        self.masses_window_E = EntryItem(self.Masses, name = 'Distance from the band edge / eV', row = 0)
+        self.masses_window_E.create_EntryItem(); self.masses_window_E.set_name('0.3')
+        self.masses_points = EntryItem(self.Masses, name = 'Kpoints on each side', row = 1)
+        self.masses_points.create_EntryItem(); self.masses_points.set_name('4')
+        self.masses_range = EntryItem(self.Masses, name = 'Energy range of the fit / eV', row = 2)
+        self.masses_range.create_EntryItem(); self.masses_range.set_name('0.1')
+
+        self.masses_button = Button(self.Masses, text = 'Fit', command = self.fit_masses)
+        self.masses_button.grid(row = 3, column = 0, columnspan = 2, padx = 10, pady = 10, ipadx = 35)
+        self.masses_button['font'] = self.font_window
+
+        self.masses_text = Text(self.Masses, height = 25, width = 90)
+        self.masses_text.grid(row = 4, column = 0, columnspan = 2, padx = 10, pady = 10)
+        self.masses_text.insert(INSERT, self.masses_report(self.masses))
+
+
+    def fit_masses(self):
         """
-        Plot the elemental projected DOS
-        Input:
-        ---------------------------------
-        ax: subplot of Matplotlib
+        Fit the effective masses again with the parameters of the window
         """
-        colormap = self.colors()
-        if self.pDOS_E_var.get():
+        try:
+            window = float(self.masses_window_E.get_name()); points = int(self.masses_points.get_name())
+            energy_range = float(self.masses_range.get_name())
+        except ValueError:
+            messagebox.showerror(message = 'Please enter the energies as numbers and the kpoints as integer!')
+            return
 
-            if len(self.cmp) == 2:
+        if window < 0 or points < 1 or energy_range <= 0:
+            messagebox.showerror(message = 'Energies and kpoints must be positive!')
+            return
 
-                if self.initial_color_2plot.get() == 'red-blue':
-                    colormap = ['red', 'blue']
+        self.calc.masses = self.calc.effective_masses(window, points, energy_range)
+        self.masses = self.calc.masses
 
-                elif self.initial_color_2plot.get() == 'green-blue':
-                    colormap = ['green', 'blue']
+        self.masses_text.delete('1.0', END)
+        self.masses_text.insert(INSERT, self.masses_report(self.masses))
 
-        for cmpd in range(len(self.partial_DOS)):
-            ax.plot(self.Energy_DOS, -self.partial_DOS[cmpd],
+        if self.masses_var.get():
+            self.plot()
 
-                    color=colormap[cmpd], label=self.cmp[cmpd], lw=2)
-        if self.label_DOS_var.get():
-            ax.set_xlabel('Projected DOS', fontsize=self.font_size_DOS_x.get(), family=self.initial_font.get())
+
+    def toggle_masses(self):
+        """
+        Show or hide the fitted parabolas in the band structure
+        """
+        if self.plot_button['state'] != DISABLED:
+            self.plot()
 
 
-    def plot_oDOS(self, ax):
+    def masses_report(self, masses):
         """
-        Plot the orbital projected DOS
-        Input:
-        -------------------------------
-        ax: subplot of Matplotlib
+        Table of the effective masses sorted by the distance from the band edges
         """
+        lines = ['{:>6} {:>9} {:>12} {:>12} {:>12} {:>8}'.format('band', 'carrier', 'direction', 'E / eV', 'm*/m_e', 'points')]
+        edge = np.where(masses['carrier'] < 0, -masses['energy'], masses['energy'])
+        for i in np.lexsort((edge, masses['carrier'])):
+            lines.append('{:6d} {:>9} {:>12} {:12.4f} {:12.4f} {:8d}'.format(int(masses['band'][i]) + 1, 'hole' if masses['carrier'][i] < 0 else 'electron', masses['direction'][i],
+                masses['energy'][i], masses['mass'][i], int(masses['Nmb_points'][i])))
 
-        colormap = self.colors()
-        orbital_map = ['s', 'p', 'd', 'f', 'g']
+        if len(lines) == 1:
+            lines.append('No extrema near the band edges')
 
-        for k in range(len(self.orbital_DOS)):
-            ax.plot(self.Energy_DOS, -self.orbital_DOS[k],
+        return '\n'.join(lines)
 
-                    color=colormap[k], label=orbital_map[k], lw=2)
 
-        if self.label_DOS_var.get():
-            ax.set_xlabel('Projected DOS', fontsize=self.font_size_DOS_x.get(), family=self.initial_font.get())
+    def plot_masses(self, ax):
+        """
+        Draw the fitted parabolas and the extrema into the band structure
+        Input:
+        --------------------------------
+        ax: Matplotlib Axis
+        """
+        masses = self.masses
+        if len(masses['band']) == 0:
+            return
 
+        kpath = np.asarray(self.Band.kpath)
+        total = kpath[-1] if kpath[-1] > 0 else 1.
+        x = masses['lower'][:, None] + np.linspace(0, 1, 25)[None, :] * (masses['upper'] - masses['lower'])[:, None]
+        dx = x - kpath[masses['kpoint']][:, None]
+        energy = masses['energy'][:, None] + masses['slope'][:, None] * dx + masses['curvature'][:, None] * dx**2
 
-    def load_electronic_properties(self):
+        colors = np.where(masses['carrier'][:, None] < 0, to_rgba_array(['tab:red']), to_rgba_array(['tab:blue']))
+        ax.add_collection(LineCollection(np.stack((x / total, energy), axis=-1), colors=colors, linestyles='--', linewidth=1.5))
+        ax.scatter(kpath[masses['kpoint']] / total, masses['energy'], c=colors, s=12, zorder=3)
+
+
+    def surface_window(self):
         """
-        Load the electronic properties from PROCAR_band and PROCAR_DOS and compute the DOS over the entire Brillouin zone
-        Connected to the Load button
+        Window with the lines of constant energy on a plane through the Brillouin zone
         """
-        self.list_energy = [self.minE.get_name(), self.maxE.get_name(), self.Eres.get_name()]
+        if self.plot_button['state'] == DISABLED:
+            messagebox.showerror(message = 'Please load the data first!')
+            return
 
-        self.get_energies()
-        self.get_kpoints()
-        self.sum_DOS_elements()
+        self.Surface = Toplevel()
+        self.Surface.configure(bg = self._from_rgb((11, 165, 193)))
+        self.Surface.geometry("900x1000")
+        self.Surface.iconbitmap('icon_band.ico')
+
+        self.surface_energies = EntryItem(self.Surface, name = 'Energies / eV (list or min:max:step)', row = 0)
+        self.surface_energies.create_EntryItem(); self.surface_energies.set_name('0')
+        self.surface_origin = EntryItem(self.Surface, name = 'Center of the plane (fractional)', row = 1)
+        self.surface_origin.create_EntryItem(); self.surface_origin.set_name('0 0 0')
+        self.surface_axis1 = EntryItem(self.Surface, name = 'First axis (fractional)', row = 2)
+        self.surface_axis1.create_EntryItem(); self.surface_axis1.set_name('1 0 0')
+        self.surface_axis2 = EntryItem(self.Surface, name = 'Second axis (fractional)', row = 3)
+        self.surface_axis2.create_EntryItem(); self.surface_axis2.set_name('0 1 0')
+        self.surface_resolution = EntryItem(self.Surface, name = 'Points along each axis', row = 4)
+        self.surface_resolution.create_EntryItem(); self.surface_resolution.set_name('150')
+
+        self.surface_weighting = StringVar(); self.surface_weighting.set('none')
+        frame = Frame(self.Surface)
+        frame.grid(row = 5, column = 0, columnspan = 2, padx = 10, pady = 6)
+        Label(frame, text = 'Color by').grid(row = 0, column = 0, padx = 6)
+        for i, (text, value) in enumerate([('energy', 'none'), ('elements', 'elements'), ('orbitals', 'orbitals')]):
+            Radiobutton(frame, text = text, variable = self.surface_weighting, value = value).grid(row = 0, column = i + 1, padx = 6)
+
+        self.surface_button = Button(self.Surface, text = 'Compute', command = self.compute_surface)
+        self.surface_button.grid(row = 6, column = 0, columnspan = 2, padx = 10, pady = 10, ipadx = 35)
+        self.surface_button['font'] = self.font_window
+
+        self.surface_text = Text(self.Surface, height = 8, width = 100)
+        self.surface_text.grid(row = 8, column = 0, columnspan = 2, padx = 10, pady = 10)
+
+
+    def compute_surface(self):
+        """
+        Compute the lines of constant energy of the loaded calculation in a worker thread
+        """
+        try:
+            energies = self.parse_values(self.surface_energies.get_name())
+            origin, axis1, axis2 = [np.array(x.get_name().replace(',', ' ').split(), dtype=float) for x in
+                (self.surface_origin, self.surface_axis1, self.surface_axis2)]
+            resolution = int(self.surface_resolution.get_name())
+        except ValueError:
+            messagebox.showerror(message = 'Please enter the energies, three numbers for each vector, and the points as integer!')
+            return
 
-        self.DOS.energy_DOS, self.DOS.totDOS_DOS = self.DOS.sum_partial_DOS(self.DOS.totDOS, float(self.minE.get_name()), float(self.maxE.get_name()), float(self.Eres.get_name()))
+        if len(origin) != 3 or len(axis1) != 3 or len(axis2) != 3 or not 10 <= resolution <= 2000 or len(energies) > 100:
+            messagebox.showerror(message = 'Vectors need three numbers, 10 to 2000 points, and at most 100 energies!')
+            return
 
-        self.contrib = self.get_contribution(self.Band.energy, self.Band.DOS_element_new)
-        self.contrib_orbital = self.get_contribution(self.Band.energy, self.Band.DOS_orbitals)
+        self.surface_button.config(state=DISABLED, text='Computing...')
+        self.run_in_background(self.calc.energy_surface, (energies, origin, axis1, axis2, resolution, self.surface_weighting.get()),
+            self.show_surface)
 
-        self.orbital_DOS = []
 
-        for cmpd in range(len(self.DOS.DOS_orbitals[0][0])):
-            self.Energy_DOS, oDOS = self.DOS.sum_partial_DOS(np.moveaxis(self.DOS.DOS_orbitals, 2, 0)[cmpd], float(self.minE.get_name()), float(self.maxE.get_name()), float(self.Eres.get_name()))
-            self.orbital_DOS.append(oDOS)
+    def show_surface(self, result, error):
+        """
+        Plot the lines of constant energy into the window and list the pockets
+        """
+        if not self.Surface.winfo_exists():
+            return
+        self.surface_button.config(state=NORMAL, text='Compute')
 
+        if error is not None:
+            messagebox.showerror(message = 'Constant energy lines failed: {}'.format(error))
+            return
 
-        self.partial_DOS = []
+        if getattr(self, 'surface_canvas', None) is not None and self.surface_canvas.get_tk_widget().winfo_exists():
+            self.surface_canvas.get_tk_widget().destroy()
 
-        for cmpd in range(len(self.DOS.DOS_element_new[0][0])):
-            self.Energy_DOS, pDOS = self.DOS.sum_partial_DOS(np.moveaxis(self.DOS.DOS_element_new, 2, 0)[cmpd], float(self.minE.get_name()), float(self.maxE.get_name()), float(self.Eres.get_name()))
-            self.partial_DOS.append(pDOS)
+        self.surface_canvas = FigureCanvasTkAgg(self.draw_surface(result), master = self.Surface)
+        self.surface_canvas.draw()
+        self.surface_canvas.get_tk_widget().grid(row = 7, column = 0, columnspan = 2, padx = 10, pady = 10)
 
-        self.plot_button.config(state=NORMAL)
+        self.surface_text.delete('1.0', END)
+        self.surface_text.insert(INSERT, self.surface_report(result))
 
-        if len(self.cmp) in [2, 3]:
-            self.pDOS_E.config(state=NORMAL)
 
-        if len(self.partial_DOS) in [2, 3]:
-            self.pDOS_O.config(state=NORMAL)
+    def surface_report(self, result):
+        """
+        Number of lines, closed pockets, and their areas for each energy and band
+        """
+        lines = ['Mesh of PROCAR_DOS: {}x{}x{}'.format(*result['mesh'])]
+        lines.append('{:>10} {:>6} {:>7} {:>8} {:>24}'.format('E / eV', 'band', 'lines', 'pockets', 'areas / Ang^-2'))
 
+        groups = {}
+        for energy, band, xy, projections, closed, area in result['lines']:
+            groups.setdefault((energy, band), []).append(area if closed else None)
 
-    def plot(self, save=False, filename=''):
+        for (energy, band), areas in sorted(groups.items()):
+            closed = sorted([a for a in areas if a is not None], reverse=True)
+            lines.append('{:10.4f} {:6d} {:7d} {:8d} {:>24}'.format(energy, int(band) + 1, len(areas), len(closed),
+                ' '.join('{:.4f}'.format(a) for a in closed[:4]) + (' ...' if len(closed) > 4 else '')))
+
+        if len(groups) == 0:
+            lines.append('No band crosses these energies on the plane')
+
+        return '\n'.join(lines)
+
+
+    def draw_surface(self, result):
         """
-        Plot electronic band structure and DOS
+        Draw the lines of constant energy on the plane, colored by energy or by elemental or orbital character
         Input:
         --------------------------------
-        save: Boolean
-            If save is True, the figure will be saved (default is False)
-        filename: str
-            Filename from Save button
+        result: dictionary
+            Output of Calculation.energy_surface
+        Output:
+        --------------------------------
+        fig: Matplotlib Figure
         """
+        plt.rcParams["font.family"] = self.initial_font.get()
+        fig = Figure(figsize = (8, 7), dpi = 100)
+        ax = fig.add_subplot(1, 1, 1)
 
-        if self.list_energy != [self.minE.get_name(), self.maxE.get_name(), self.Eres.get_name()]:
-            load_new = messagebox.askyesno('New energy range!',
-             'You have changed minimum energy, maximum energy, or the resolution. You need to load first the new data. Do you want to load the data?')
+        ax.plot(result['outline'][:, 0], result['outline'][:, 1], color='grey', lw=1)
+        ax.plot(0, 0, 'o', color='grey', ms=4)
 
-            if load_new:
-                self.load_electronic_properties()
+        if result['weighting'] == 'none':
+            energies = list(result['energies'])
+            colors = [self.color] if len(energies) == 1 else [cm.viridis(i / (len(energies) - 1)) for i in range(len(energies))]
+            for energy, color in zip(energies, colors):
+                segments = [xy for e, band, xy, projections, closed, area in result['lines'] if e == energy]
+                ax.add_collection(LineCollection(segments, colors=[color], linewidth=1.5))
+                ax.plot([], [], color=color, label='{:.3f} eV'.format(energy))
+            ax.legend(fancybox=True, shadow=True, prop={'size': 9})
+
+        else:
+            colors = self.channel_colors(len(result['names']))
+            for energy, band, xy, projections, closed, area in result['lines']:
+                segments = np.stack((xy[:-1], xy[1:]), axis=1)
+                ax.add_collection(LineCollection(segments, colors=self.mix_colors(0.5 * (projections[:-1] + projections[1:]), colors),
+                    linewidth=2))
+            legend = fig.add_axes([0.7, 0.84, 0.22, 0.1]); legend.axis('off')
+            self.draw_legend(legend, result['names'], colors)
+
+        ax.set_aspect('equal')
+        ax.autoscale_view()
+        ax.set_xlabel('$k_1$ / $\\AA^{-1}$', fontsize=11)
+        ax.set_ylabel('$k_2$ / $\\AA^{-1}$', fontsize=11)
+
+        return fig
+
+
+    def draw_figure(self):
+        """
+        Draw electronic band structure and DOS into a new figure
+        Output:
+        --------------------------------
+        fig: Matplotlib Figure
+            Figure including the band structure (first axis) and the DOS (second axis)
+        """
 
         plt.rcParams["font.family"] = self.initial_font.get()
         plt.rcParams.update({'font.size': self.font_size_band_energy.get()})
 
-        self.fig = Figure(figsize= (self.size_x.get(), self.size_y.get()), dpi = 100)
+        fig = Figure(figsize= (self.size_x.get(), self.size_y.get()), dpi = 100)
+        self.band_artists = []
 
-        gs = self.fig.add_gridspec(1, 2, width_ratios=[2, 1,])
+        gs = fig.add_gridspec(1, 2, width_ratios=[2, 1,])
         gs.update(left=0.1, right=0.95, wspace=0.15)
-        self.ax1 = self.fig.add_subplot(gs[0])
-        self.ax2 = self.fig.add_subplot(gs[1])
+        ax1 = fig.add_subplot(gs[0])
+        ax2 = fig.add_subplot(gs[1])
 
-        self.ax1.set_xlim(0, 1.)
-        self.ax1.set_ylim(float(self.minE.get_name()), float(self.maxE.get_name()))
-        self.ax2.set_xlim(float(self.minE.get_name()), float(self.maxE.get_name()))
-        self.ax2.set_ylim(-0.0005, float(self.ymax.var.get()))
+        ax1.set_xlim(0, 1.)
+        ax1.set_ylim(float(self.minE.get_name()), float(self.maxE.get_name()))
+        ax2.set_xlim(float(self.minE.get_name()), float(self.maxE.get_name()))
+        ax2.set_ylim(-0.0005, float(self.ymax.var.get()))
         if self.grid_energy_var.get():
-            self.ax1.grid()
+            ax1.grid()
         if self.label_ticks_var.get():
-            self.ax1.set_xlabel('Wavevector $k$', fontsize=self.font_size_band_x.get(), family=self.initial_font.get())
+            ax1.set_xlabel('Wavevector $k$', fontsize=self.font_size_band_x.get(), family=self.initial_font.get())
         if self.label_energy_var.get():
-            self.ax1.set_ylabel('$E-E_F$ / eV', fontsize=self.font_size_band_y.get(), family=self.initial_font.get())
+            ax1.set_ylabel('$E-E_F$ / eV', fontsize=self.font_size_band_y.get(), family=self.initial_font.get())
 
         for p in self.distance:
-            self.ax1.plot([p, p], [float(self.minE.get_name()), float(self.maxE.get_name())], 'k-', color='grey')
-        self.ax1.set_xticks(self.distance)
-        self.ax1.set_xticklabels(self.ticks)
-        self.ax1.tick_params(axis='x', which='major', labelsize=self.font_size_band_ticks.get())
-        self.ax2.tick_params(axis='x', which='major', labelsize=self.font_size_DOS_number.get())
-
-        self.ax2.fill_between(self.DOS.energy_DOS, -self.DOS.totDOS_DOS, 0, color=(0.7, 0.7, 0.7), facecolor=(0.7, 0.7, 0.7))
-        self.ax2.plot(self.DOS.energy_DOS, -self.DOS.totDOS_DOS, color =(0.6, 0.6, 0.6), label='Total DOS')
+            ax1.plot([p, p], [float(self.minE.get_name()), float(self.maxE.get_name())], 'k-', color='grey')
+        ax1.set_xticks(self.distance)
+        ax1.set_xticklabels(self.ticks)
+        ax1.tick_params(axis='x', which='major', labelsize=self.font_size_band_ticks.get())
+        ax2.tick_params(axis='x', which='major', labelsize=self.font_size_DOS_number.get())
+
+        ax2.fill_between(self.DOS.energy_DOS, -self.DOS.totDOS_DOS, 0, color=(0.7, 0.7, 0.7), facecolor=(0.7, 0.7, 0.7))
+        ax2.plot(self.DOS.energy_DOS, -self.DOS.totDOS_DOS, color =(0.6, 0.6, 0.6), label='Total DOS')
         if self.label_DOS_var.get():
-            self.ax2.set_xlabel('Density of States', fontsize=self.font_size_DOS_y.get(), family=self.initial_font.get())
+            ax2.set_xlabel('Density of States', fontsize=self.font_size_DOS_y.get(), family=self.initial_font.get())
         if self.label_energy_DOS_var.get():
-            self.ax2.set_ylabel('$E-E_F$ / eV', fontsize=self.font_size_DOS_y.get(), family=self.initial_font.get())
+            ax2.set_ylabel('$E-E_F$ / eV', fontsize=self.font_size_DOS_y.get(), family=self.initial_font.get())
 
         if self.pDOS_E_var.get() or self.pDOS_O_var.get():
-            gs2 = self.fig.add_gridspec(2, 4, width_ratios=[1, 1, 1, 2,], height_ratios=[1, 4,])
+            gs2 = fig.add_gridspec(2, 4, width_ratios=[1, 1, 1, 2,], height_ratios=[1, 4,])
             gs2.update(bottom=0.6, top=0.95)
-            self.ax3 = self.fig.add_subplot(gs2[1]); self.ax3.axis('off')
-            self.ax4 = self.fig.add_subplot(gs2[0]); self.ax4.axis('off')
-            self.ax5 = self.fig.add_subplot(gs2[2]); self.ax5.axis('off')
-
-            if len(self.cmp) == 3 and self.pDOS_E_var.get():
-                rgb_triangle = plt.imread('rgb_triangle.png')
-                self.ax3.imshow(rgb_triangle)
-                self.ax3.text(200, 0, self.cmp[0], color='red')
-                self.ax4.text(33, 0, self.cmp[2], color='blue'); self.ax4.set_xlim(-100, 2)
-                self.ax5.text(-0.45, 0, self.cmp[1], color='green'); self.ax5.set_xlim(0, 1)
-                for b in range(len(self.Band.energy)):
-                    self.rgbline(self.ax1,
-                        self.Band.kpts,
-                        self.Band.energy[b],
-                        self.contrib[b, :, 0],
-                        self.contrib[b, :, 1],
-                        self.contrib[b, :, 2])
-
-            if len(self.Band.DOS_orbitals[0][0]) == 3 and self.pDOS_O_var.get():
-                rgb_triangle = plt.imread('rgb_triangle.png')
-                self.ax3.imshow(rgb_triangle)
-                self.ax3.text(290, 0, 's', color='red')
-                self.ax4.text(39, 0, 'd', color='blue'); self.ax4.set_xlim(-100, 2)
-                self.ax5.text(-0.45, 0, 'p', color='green'); self.ax5.set_xlim(0, 1)
-                for b in range(len(self.Band.energy)):
-                    self.rgbline(self.ax1,
-                        self.Band.kpts,
-                        self.Band.energy[b],
-                        self.contrib_orbital[b, :, 0],
-                        self.contrib_orbital[b, :, 1],
-                        self.contrib_orbital[b, :, 2])
-
-            elif len(self.Band.DOS_orbitals[0][0]) == 2 and self.pDOS_O_var.get():
-
-                if self.initial_color_2plot.get() == 'red-green':
-                    rg_line = plt.imread('rg_line.png')
-                    self.ax3.imshow(rg_line)
-                    self.ax4.text(0, 0, 's', color='red')
-                    self.ax5.text(0, 0, 's', color='green')
-
-                    for b in range(len(self.Band.energy)):
-                        self.rgbline(self.ax1,
-                            self.Band.kpts,
-                            self.Band.energy[b],
-                            self.contrib_orbital[b, :, 0],
-                            self.contrib_orbital[b, :, 1],
-                            [])
-
-                elif self.initial_color_2plot.get() == 'red-blue':
-                    rb_line = plt.imread('rb_line.png')
-                    self.ax3.imshow(rb_line)
-                    self.ax4.text(0, 0, 's', color='red')
-                    self.ax5.text(0, 0, 'p', color='blue')
-
-                    for b in range(len(self.Band.energy)):
-                        self.rgbline(self.ax1,
-                            self.Band.kpts,
-                            self.Band.energy[b],
-                            self.contrib_orbital[b, :, 0],
-                            [],
-                            self.contrib_orbital[b, :, 1],
-                            )
-
-                elif self.initial_color_2plot.get() == 'green-blue':
-                    gb_line = plt.imread('gb_line.png')
-                    self.ax3.imshow(gb_line)
-                    self.ax4.text(0, 0, 's', color='green')
-                    self.ax5.text(0, 0, 'p', color='blue')
-
-                    for b in range(len(self.Band.energy)):
-                        self.rgbline(self.ax1,
-                            self.Band.kpts,
-                            self.Band.energy[b],
-                            [],
-                            self.contrib_orbital[b, :, 0],
-                            self.contrib_orbital[b, :, 1],
-                            )
-
-
-            elif len(self.cmp) == 2 and self.pDOS_E_var.get():
-
-                if self.initial_color_2plot.get() == 'red-green':
-                    rg_line = plt.imread('rg_line.png')
-                    self.ax3.imshow(rg_line)
-                    self.ax4.text(0, 0, self.cmp[0], color='red')
-                    self.ax5.text(0, 0, self.cmp[1], color='green')
-
-                    for b in range(len(self.Band.energy)):
-                        self.rgbline(self.ax1,
-                            self.Band.kpts,
-                            self.Band.energy[b],
-                            self.contrib[b, :, 0],
-                            self.contrib[b, :, 1],
-                            [])
-
-                elif self.initial_color_2plot.get() == 'red-blue':
-                    rb_line = plt.imread('rb_line.png')
-                    self.ax3.imshow(rb_line)
-                    self.ax4.text(0, 0, self.cmp[0], color='red')
-                    self.ax5.text(0, 0, self.cmp[1], color='blue')
-
-                    for b in range(len(self.Band.energy)):
-                        self.rgbline(self.ax1,
-                            self.Band.kpts,
-                            self.Band.energy[b],
-                            self.contrib[b, :, 0],
-                            [],
-                            self.contrib[b, :, 1],
-                            )
-
-                elif self.initial_color_2plot.get() == 'green-blue':
-                    gb_line = plt.imread('gb_line.png')
-                    self.ax3.imshow(gb_line)
-                    self.ax4.text(0, 0, self.cmp[0], color='green')
-                    self.ax5.text(0, 0, self.cmp[1], color='blue')
-
-                    for b in range(len(self.Band.energy)):
-                        self.rgbline(self.ax1,
-                            self.Band.kpts,
-                            self.Band.energy[b],
-                            [],
-                            self.contrib[b, :, 0],
-                            self.contrib[b, :, 1],
-                            )
-
-                self.ax3.set_xlim(0, 500); self.ax3.set_ylim(200, 240)
-                self.ax4.set_ylim(-1, 1); self.ax5.set_ylim(-1, 1); self.ax4.set_xlim(-100, 2)
+            ax3 = fig.add_subplot(gs2[1]); ax3.axis('off')
+
+            if self.pDOS_E_var.get():
+                names, contrib = self.cmp, self.contrib
+            else:
+                names, contrib = self.Band.orbitals, self.contrib_orbital
+
+            colors = self.channel_colors(len(names))
+            self.draw_legend(ax3, names, colors)
+            self.band_artists.append(self.fat_bands(ax1, self.Band.kpts, self.Band.energy, contrib, colors))
 
         else:
-            for b in range(len(self.Band.energy)):
-                self.ax1.plot(
-                    self.Band.kpts,
-                    self.Band.energy[b],
-                    color=self.color)
+            bands = DecimatedLineCollection(self.Band.kpts, self.Band.energy, color=self.color, linewidth=1.5)
+            ax1.add_collection(bands)
+            self.band_artists.append(bands)
 
         if self.pDOS.get() == 2:
-            self.plot_pDOS(self.ax2)
+            self.plot_pDOS(ax2)
 
         elif self.pDOS.get() == 3:
-            self.plot_oDOS(self.ax2)
+            self.plot_oDOS(ax2)
 
-        self.ax1.hlines(y=0, xmin=0, xmax=1, color="k", lw=2)
+        if self.masses_var.get():
+            self.plot_masses(ax1)
+
+        ax1.hlines(y=0, xmin=0, xmax=1, color="k", lw=2)
         r = Affine2D().rotate_deg(90)
 
-        for x in self.ax2.images + self.ax2.lines + self.ax2.collections:
+        for x in ax2.images + ax2.lines + ax2.collections:
             trans = x.get_transform()
             x.set_transform(r + trans)
             if isinstance(x, PathCollection):
                 transoff = x.get_offset_transform()
                 x._transOffset = r + transoff
 
-        old = self.ax2.axis()
-        self.ax2.axis(old[2:4] + old[0:2])
+        old = ax2.axis()
+        ax2.axis(old[2:4] + old[0:2])
 
         if self.grid_DOS_var.get():
-            self.ax2.grid()
+            ax2.grid()
         if not self.ticks_energy_var.get():
-            self.ax1.set_yticklabels([])
+            ax1.set_yticklabels([])
         if not self.ticks_wavevector_var.get():
-            self.ax1.set_xticklabels([])
+            ax1.set_xticklabels([])
         if not self.ticks_energy_DOS_var.get():
-            self.ax2.set_yticklabels([])
+            ax2.set_yticklabels([])
         if not self.ticks_DOS_var.get():
-            self.ax2.set_xticklabels([])
-        self.ax2.hlines(y=0, xmin=-0.5, xmax=float(self.ymax.get_name()) + 0.5, color='k', lw =2)
-        self.ax2.legend(fancybox=True, shadow=True, prop={'size': 18})
+            ax2.set_xticklabels([])
+        ax2.hlines(y=0, xmin=-0.5, xmax=float(self.ymax.get_name()) + 0.5, color='k', lw =2)
+        ax2.legend(fancybox=True, shadow=True, prop={'size': 18})
+
+        return fig
 
-        if save:
-            self.fig.set_size_inches(12, 8)
-            self.fig.savefig(filename, dpi=int(self.set_dpi.get_name()))
 
+    def export_figure(self, filenames, dpis=(100,), sizes=((12, 8),), rasterize=False):
+        """
+        Draw the figure once and save it in several formats, dpi values and sizes
+        Input:
+        --------------------------------
+        filenames: list
+            List of filenames, the format is taken from the extension
+        dpis: tuple or list
+            dpi values; the dpi is added to the filename if more than one is given
+        sizes: tuple or list, shape (S, 2)
+            figure sizes (width, height) in inches; the size is added to the filename if more than one is given
+        rasterize: Boolean
+            If True, the bands are rasterized in vector formats (pdf, svg, eps)
+        """
+        if getattr(self, 'calculations', None) is not None:
+            fig = self.draw_comparison(self.calculations)
         else:
-            self.canvas = FigureCanvasTkAgg(self.fig, master = self.parent)
-            self.canvas.draw()
-            self.plot_widget = self.canvas.get_tk_widget()
-            self.plot_widget.grid(row = 1, column = 3, columnspan = 11, rowspan = 13)
+            fig = self.draw_figure()
+
+        for artist in self.band_artists:
+            artist.set_rasterized(rasterize)
+
+        for size in sizes:
+            fig.set_size_inches(*size)
+
+            for dpi in dpis:
+                for filename in filenames:
+                    name, extension = os.path.splitext(filename)
+                    if len(sizes) > 1:
+                        name += '_{}x{}'.format(*size)
+                    if len(dpis) > 1:
+                        name += '_{}dpi'.format(dpi)
+
+                    fig.savefig(name + extension, dpi=dpi)
+
+
+    def export_window(self):
+        """
+        Window to save the figure in several formats, dpi values and sizes at once
+        """
+        if self.plot_button['state'] == DISABLED:
+            return
+
+        self.Export = Toplevel()
+        self.Export.configure(bg = self._from_rgb((11, 165, 193)))
+        self.Export.geometry("500x380")
+        self.Export.iconbitmap('icon_band.ico')
+        self.Export.grab_set()
+
+        self.export_formats = ['png', 'pdf', 'svg', 'eps']
+        self.export_format_var = list()
+        for i in range(len(self.export_formats)):
+            self.export_format_var.append(BooleanVar())
+            Checkbutton(self.Export, text='.{}'.format(self.export_formats[i]), variable=self.export_format_var[-1]).grid(row=0, column=i, padx=10, pady=10)
+        self.export_format_var[0].set(True)
+
+        self.export_dpi = EntryItem(self.Export, name = 'dpi (comma separated)', row = 1, columnspan = 2)
+        self.export_dpi.create_EntryItem(); self.export_dpi.set_name('300')
+        self.export_size = EntryItem(self.Export, name = 'Size / inch (e.g. 12x8, 6x4)', row = 2, columnspan = 2)
+        self.export_size.create_EntryItem(); self.export_size.set_name('12x8')
+
+        self.export_rasterize_var = BooleanVar(); self.export_rasterize_var.set(False)
+        Checkbutton(self.Export, text='Rasterize bands in vector formats', variable=self.export_rasterize_var).grid(row=3, column=0, columnspan=4, pady=10)
+
+        btn_export = Button(self.Export, text = 'Export', command = self.export_electronic_structure)
+        btn_export.grid(row = 4, column = 0, columnspan = 4, padx = 10, pady = 10, ipadx = 35)
+        btn_export['font'] = self.font_window
+
+
+    def export_electronic_structure(self):
+        """
+        Export the figure with the settings of the Export window
+        """
+        formats = [self.export_formats[i] for i in range(len(self.export_formats)) if self.export_format_var[i].get()]
+        try:
+            dpis = [int(x) for x in self.export_dpi.get_name().split(',')]
+            sizes = [tuple(float(y) for y in x.lower().split('x')) for x in self.export_size.get_name().split(',')]
+            if min(dpis) <= 0 or any(len(size) != 2 or min(size) <= 0 for size in sizes):
+                raise ValueError('dpi and sizes must be positive')
+        except ValueError:
+            messagebox.showerror(message = 'Please enter the dpi as positive integers and each size as width x height!')
+            return
+
+        if len(formats) == 0:
+            return
+
+        filename = filedialog.asksaveasfilename(title = 'Export figure')
+        if filename == '':
+            return
 
-            toolbar_frame = Frame(self.parent) 
-            toolbar_frame.grid(row=16,column=2,columnspan=4) 
-            toolbar = NavigationToolbar2Tk(self.canvas, toolbar_frame)
-            toolbar.update()
+        name = os.path.splitext(filename)[0]
+        self.export_figure(['{}.{}'.format(name, f) for f in formats], dpis=dpis, sizes=sizes, rasterize=self.export_rasterize_var.get())
+        self.Export.destroy()
 
 
     def save_electronic_structure(self):
@@ -1611,57 +5609,166 @@ class MainApplication:
         if filename == '':
             return
 
-        self.plot(save=True, filename=filename)
+        if getattr(self, 'calculations', None) is not None:
+            self.export_figure([filename], dpis=[int(self.set_dpi.get_name())], sizes=[(12, 8)])
+        else:
+            self.plot(save=True, filename=filename)
 
 
     def save_csv_file(self):
         """
-        Save the DOS and bands as a .csv file
+        Save the DOS and bands as a .csv file, or as a binary .npz/.h5 file including the projections
         """
 
-        filename = filedialog.asksaveasfilename(title='Save file', filetypes=[('CSV (Comma delimited)', '*.csv')])
+        filetypes = [('CSV (Comma delimited)', '*.csv'), ('NumPy archive', '*.npz')]
+        if h5py is not None:
+            filetypes.append(('HDF5', '*.h5'))
+
+        filename = filedialog.asksaveasfilename(title='Save file', filetypes=filetypes)
         if filename == '':
             return
 
-        with open(filename + '_DOS.csv', 'w') as fil:
-            fil.write('Energy / eV, Total DOS')
+        data = self.export_data()
+        extension = os.path.splitext(filename)[1].lower()
+
+        if extension == '.npz':
+            target = self.write_npz
+        elif extension in ['.h5', '.hdf5'] and h5py is not None:
+            target = self.write_hdf5
+        else:
+            target = self.write_csv
+            if extension == '.csv':
+                filename = filename[:-4]
+
+        self.save_fig_csv_button.config(state=DISABLED)
+        self.run_in_background(target, (filename, data), self.export_finished)
+
+
+    def export_data(self):
+        """
+        Collect all arrays for the export, so the files can be written while the user keeps working
+        Output:
+        -------------------------
+        data: dictionary
+            Dictionary of arrays and labels of the loaded data
+        """
+        return {
+            'elements': list(self.cmp),
+            'orbitals': list(self.DOS.orbitals),
+            'energy_DOS': np.asarray(self.DOS.energy_DOS),
+            'total_DOS': np.asarray(self.DOS.totDOS_DOS),
+            'partial_DOS': np.array(self.partial_DOS).reshape(len(self.partial_DOS), -1),
+            'orbital_DOS': np.array(self.orbital_DOS).reshape(len(self.orbital_DOS), -1),
+            'kpoints': np.asarray(self.Band.kpts, dtype=float),
+            'energy_band': np.asarray(self.Band.energy),
+            'ticks': list(self.ticks),
+            'distance': np.asarray(self.distance, dtype=float),
+            'contribution': np.asarray(self.contrib),
+            'contribution_orbital': np.asarray(self.contrib_orbital),
+        }
 
-            for p in range(len(self.cmp)):
-                fil.write(" , {} ".format(self.cmp[p]))
 
-            orbitals = ['s', 'p', 'd', 'f', 'g']
-            for o in range(len(self.orbital_DOS)):
-                fil.write(" , {}".format(orbitals[o]))
-            fil.write('\n')
+    def write_csv(self, filename, data):
+        """
+        Write the DOS and the bands in two .csv files
+        Input:
+        --------------------------
+        filename: str
+            Filename without extension
+        data: dictionary from export_data
+        """
+        header = ['Energy / eV', 'Total DOS'] + data['elements'] + data['orbitals']
+        block = np.column_stack([data['energy_DOS'], data['total_DOS'], data['partial_DOS'].T, data['orbital_DOS'].T])
 
-            for i in range(len(self.DOS.energy_DOS)):
-                fil.write("{}, {}".format(self.DOS.energy_DOS[i], self.DOS.totDOS_DOS[i]))
+        with open(filename + '_DOS.csv', 'w') as fil:
+            fil.write(', '.join(header) + '\n')
+            np.savetxt(fil, block, fmt='%.8f', delimiter=', ')
 
-                for p in range(len(self.cmp)):
-                    fil.write(" , {}".format(self.partial_DOS[p][i]))
+        kpts = data['kpoints']
+        labels = [''] * len(kpts)
+        rows = np.clip(np.searchsorted(kpts, data['distance'], side='right') - 1, 0, len(kpts) - 1)
+        for r, tick in zip(rows, data['ticks']):
+            labels[r] = tick
 
-                for o in range(len(self.orbital_DOS)):
-                    fil.write(" , {} ".format(self.orbital_DOS[o][i]))
-                fil.write("\n")
+        block = np.column_stack([np.array(labels, dtype=object), kpts, data['energy_band'].T])
 
         with open(filename + '_Band.csv', 'w') as fil:
             fil.write('ticks, k-points, Energy / eV \n')
+            np.savetxt(fil, block, fmt=', '.join(['%s'] + ['%.8f'] * (block.shape[1] - 1)))
 
-            counter = 0
-            for k in range(len(self.Band.kpts)):
-                if k + 1 < len(self.Band.kpts):
-                    if self.distance[counter] < self.Band.kpts[k + 1]:
-                        fil.write(self.ticks[counter])
-                        counter += 1
-                    else:
-                        fil.write('')
-                else:
-                    fil.write(self.ticks[counter])
 
-                fil.write(" , {}".format(self.Band.kpts[k]))
-                for b in range(len(self.Band.energy)):
-                    fil.write(" , {} ".format(self.Band.energy[b][k]))
-                fil.write("\n")
+    def write_npz(self, filename, data):
+        """
+        Write all arrays including the projections into a compressed NumPy archive
+        Input:
+        --------------------------
+        filename: str
+            Filename including .npz
+        data: dictionary from export_data
+        """
+        np.savez_compressed(filename, **{key: np.asarray(value) for key, value in data.items()})
+
+
+    def write_hdf5(self, filename, data):
+        """
+        Write all arrays including the projections into a HDF5 file (requires h5py)
+        Input:
+        --------------------------
+        filename: str
+            Filename including .h5
+        data: dictionary from export_data
+        """
+        with h5py.File(filename, 'w') as fil:
+            for key in ['elements', 'orbitals', 'ticks']:
+                fil.attrs[key] = [str(x) for x in data[key]]
+
+            for key, value in data.items():
+                if isinstance(value, np.ndarray):
+                    fil.create_dataset(key, data=value, compression='gzip')
+
+
+    def export_finished(self, result, error):
+        """
+        Called in the main thread after an export has finished
+        """
+        self.save_fig_csv_button.config(state=NORMAL)
+
+        if error is not None:
+            messagebox.showerror(message='Export failed: {}'.format(error))
+
+
+    def run_in_background(self, function, args, callback, interval=100):
+        """
+        Run a function in a worker thread and hand the result to callback in the Tkinter main thread
+        Input:
+        --------------------------
+        function: function
+            Function running in the worker thread (must not touch any Tkinter item)
+        args: tuple
+            Arguments of the function
+        callback: function
+            Called with (result, error) after the function has finished
+        interval: int
+            Time in ms between two checks of the worker thread
+        """
+        output = {'result': None, 'error': None}
+
+        def work():
+            try:
+                output['result'] = function(*args)
+            except Exception as err:
+                output['error'] = err
+
+        thread = threading.Thread(target=work, daemon=True)
+        thread.start()
+
+        def check():
+            if thread.is_alive():
+                self.parent.after(interval, check)
+            else:
+                callback(output['result'], output['error'])
+
+        self.parent.after(interval, check)
 
 
     def welcome(self):
@@ -1682,6 +5789,69 @@ class MainApplication:
         documentary.documentary()
 
 
+    def performance(self):
+        """
+        Show the time and peak memory of the stages of the last load and plot in the Help menu
+        """
+        about = Help()
+        about.screen_help.geometry('700x560')
+
+        self.memory_var = BooleanVar(); self.memory_var.set(profiler.memory)
+        self.profile_var = BooleanVar(); self.profile_var.set(profiler.profile is not None)
+
+        self.performance_text = Text(about.screen_help, height = 24, width = 84)
+        self.performance_text.grid(row = 0, column = 0, columnspan = 4, padx = 10, pady = (20, 10))
+
+        Checkbutton(about.screen_help, text='Peak memory (slower)', variable=self.memory_var,
+            command=self.set_profiler).grid(row=1, column=0, pady=10)
+        Checkbutton(about.screen_help, text='cProfile', variable=self.profile_var,
+            command=self.set_profiler).grid(row=1, column=1, pady=10)
+        Button(about.screen_help, text='Clear', command=self.clear_profiler).grid(row=1, column=2, pady=10, ipadx=10)
+        Button(about.screen_help, text='Save JSON', command=self.save_performance).grid(row=1, column=3, pady=10, ipadx=10)
+
+        self.show_performance()
+
+
+    def show_performance(self):
+        """
+        Write the recorded stages into the performance window
+        """
+        self.performance_text.delete('1.0', END)
+        self.performance_text.insert(INSERT, profiler.text() + '\n\n')
+
+        if len(profiler.stages) == 0:
+            self.performance_text.insert(INSERT, 'Load and plot a calculation to record the stages. \n')
+
+        self.performance_text.insert(END, profiler.statistics())
+
+
+    def set_profiler(self):
+        """
+        Choose memory tracing and cProfile for the next load and plot
+        """
+        profiler.capture(memory=self.memory_var.get(), profile=self.profile_var.get())
+
+
+    def clear_profiler(self):
+        """
+        Remove the recorded stages
+        """
+        profiler.clear()
+        self.show_performance()
+
+
+    def save_performance(self):
+        """
+        Save the report of the stages as JSON file
+        """
+        filename = filedialog.asksaveasfilename(defaultextension='.json', filetypes=[('JSON', '*.json')])
+
+        if filename == '':
+            return
+
+        profiler.write(filename)
+
+
     def about(self):
         """
         Create an about window in the Help menu
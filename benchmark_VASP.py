@@ -0,0 +1,397 @@
+"""
+Synthetic VASP output and benchmarks of the stages of the VASP Electronic Band Structure App
+
+Usage:
+    python benchmark_VASP.py --kpoints 50 200 800 --bands 50 200 --ions 10 50 --output benchmark.json
+    python benchmark_VASP.py --compare old.json new.json
+"""
+
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+import BandStructure_VASP as BS
+import service_VASP
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+
+class SyntheticCalculation:
+    """
+    Write CONTCAR, KPOINTS, PROCAR_band, and PROCAR_DOS files of a made-up semiconductor
+    """
+
+    orbital_layouts = {
+        'spd': ['s', 'p', 'd'],
+        'spdf': ['s', 'p', 'd', 'f'],
+        'lm': ['s', 'py', 'pz', 'px', 'dxy', 'dyz', 'dz2', 'dxz', 'x2-y2'],
+        'lmf': ['s', 'py', 'pz', 'px', 'dxy', 'dyz', 'dz2', 'dxz', 'x2-y2', 'fy3x2', 'fxyz', 'fyz2', 'fz3', 'fxz2', 'fzx2', 'fx3'],
+    }
+
+    path = [('\\Gamma', [0, 0, 0]), ('X', [0.5, 0, 0]), ('M', [0.5, 0.5, 0]), ('\\Gamma', [0, 0, 0]), ('R', [0.5, 0.5, 0.5])]
+
+    def __init__(self, kpoints=200, bands=100, ions=10, species=2, orbitals='lm', spin=1, mesh=8, gap=1., lattice=5., seed=0):
+        """
+        Input:
+        --------------------------
+        kpoints: int
+            number of kpoints of the band structure path
+        bands: int
+            number of bands
+        ions: int
+            number of ions
+        species: int
+            number of elements, the ions are distributed evenly
+        orbitals: str
+            layout of the orbitals, one of 'spd', 'spdf', 'lm', 'lmf'
+        spin: int
+            1 or 2 (ISPIN); for spin 2 the second spin channel is written after the first one
+        mesh: int
+            kpoints per direction of the mesh of PROCAR_DOS
+        gap: float
+            band gap in eV
+        lattice: float
+            cubic lattice parameter in Ang
+        seed: int
+            seed of the random projections
+        """
+        self.kpoints = kpoints
+        self.bands = bands
+        self.ions = ions
+        self.species = min(species, ions)
+        self.orbitals = self.orbital_layouts[orbitals]
+        self.spin = spin
+        self.mesh = mesh
+        self.gap = gap
+        self.lattice = lattice
+        self.rng = np.random.default_rng(seed)
+
+
+    def write(self, foldername):
+        """
+        Write all files of one calculation into a folder
+        Output:
+        --------------------------
+        sizes: dictionary
+            size of PROCAR_band and PROCAR_DOS in MB
+        """
+        os.makedirs(foldername, exist_ok=True)
+
+        coords, labels = self.path_kpoints()
+        self.write_contcar(foldername + '/CONTCAR')
+        self.write_kpoints(foldername + '/KPOINTS', coords, labels)
+        self.write_procar(foldername + '/PROCAR_band', coords, np.full(len(coords), 1. / len(coords)))
+
+        grid = (np.indices((self.mesh,) * 3).reshape(3, -1).T + 0.5) / self.mesh - 0.5
+        self.write_procar(foldername + '/PROCAR_DOS', grid, np.full(len(grid), 1. / len(grid)))
+
+        return {name: os.path.getsize(foldername + '/' + name) / 2**20 for name in ['PROCAR_band', 'PROCAR_DOS']}
+
+
+    def path_kpoints(self):
+        """
+        Kpoints along the path with repeated kpoints at the junctions
+        """
+        Nmb_segments = len(self.path) - 1
+        counts = np.full(Nmb_segments, max(self.kpoints // Nmb_segments, 2))
+        counts[-1] += max(self.kpoints - counts.sum(), 0)
+
+        coords = []; labels = []
+        for s in range(Nmb_segments):
+            coords.append(np.linspace(self.path[s][1], self.path[s + 1][1], counts[s]))
+            labels += [self.path[s][0]] + [''] * (counts[s] - 2) + [self.path[s + 1][0]]
+
+        return np.concatenate(coords), labels
+
+
+    def write_contcar(self, filename):
+        """
+        Cubic cell with the ions distributed over the elements
+        """
+        symbols = ['Ag', 'Sn', 'Li', 'O', 'Bi', 'Te', 'Se', 'Pb'] + ['X{}'.format(i) for i in range(8, 100)]
+        counts = np.diff(np.linspace(0, self.ions, self.species + 1).astype(int))
+        positions = self.rng.random((self.ions, 3))
+
+        with open(filename, 'w') as fil:
+            fil.write('Synthetic calculation \n1.0 \n')
+            fil.write(''.join('{:14.8f}{:14.8f}{:14.8f} \n'.format(*row) for row in self.lattice * np.eye(3)))
+            fil.write(' '.join(symbols[:self.species]) + ' \n' + ' '.join(str(c) for c in counts) + ' \nDirect \n')
+            fil.write(''.join('{:14.8f}{:14.8f}{:14.8f} \n'.format(*row) for row in positions))
+
+
+    def write_kpoints(self, filename, coords, labels):
+        """
+        Explicit list of kpoints in the format of the KPOINTS window of the app
+        """
+        with open(filename, 'w') as fil:
+            fil.write('Synthetic band structure \n{} \nReciprocal \n'.format(len(coords)))
+            fil.write(''.join('{:.4f} {:.4f} {:.4f}     1 {}\n'.format(*k, '  {} '.format(l) if l else '') for k, l in zip(coords, labels)))
+
+
+    def band_energies(self, coords):
+        """
+        Cosine bands below and above the gap, valence band maximum at 0 eV
+        """
+        Nmb_occ = self.bands // 2
+        band = np.arange(self.bands)[:, None]
+        phase = np.cos(2 * np.pi * coords).sum(axis=1)[None, :] / 3
+
+        valence = -(Nmb_occ - 1 - band) * 0.8 - 1.5 * (1 - phase)
+        conduction = self.gap + (band - Nmb_occ) * 0.8 + 1.5 * (1 - phase)
+        energy = np.where(band < Nmb_occ, valence, conduction)
+
+        occ = np.repeat(np.where(band < Nmb_occ, 1., 0.), len(coords), axis=1)
+
+        return energy + 0.01 * self.rng.standard_normal(energy.shape), occ
+
+
+    def write_procar(self, filename, coords, weights):
+        """
+        Write a PROCAR file kpoint by kpoint; all numbers of one kpoint are formatted at once
+        """
+        Nmb_orb = len(self.orbitals)
+        ion_line = '%4d' + ' %6.3f' * (Nmb_orb + 1) + '\n'
+        band_block = ('band %5d # energy %14.8f # occ. %11.8f\n\n' + 'ion ' + ' '.join('%6s' % o for o in self.orbitals) +
+            '    tot\n' + ion_line * self.ions + 'tot ' + ' %6.3f' * (Nmb_orb + 1) + '\n\n')
+        header = '# of k-points:  {}         # of bands:  {}         # of ions:  {}\n\n'.format(len(coords), self.bands, self.ions)
+
+        with open(filename, 'w') as fil:
+            fil.write('PROCAR lm decomposed\n')
+
+            for spin in range(self.spin):
+                fil.write(header)
+                energy, occ = self.band_energies(coords)
+                energy += 0.05 * spin
+
+                for k in range(len(coords)):
+                    projection = self.rng.random((self.bands, self.ions, Nmb_orb)) * (0.5 / (self.ions * Nmb_orb))
+                    ions = np.concatenate((np.broadcast_to(np.arange(1, self.ions + 1)[None, :, None], (self.bands, self.ions, 1)),
+                        projection, projection.sum(axis=2, keepdims=True)), axis=2)
+                    total = projection.sum(axis=1)
+
+                    values = np.concatenate((np.arange(1, self.bands + 1)[:, None], energy[:, k, None], occ[:, k, None],
+                        ions.reshape(self.bands, -1), total, total.sum(axis=1, keepdims=True)), axis=1)
+
+                    fil.write(' k-point %5d :    %.8f %.8f %.8f     weight = %.8f\n\n' % (k + 1, *coords[k], weights[k]))
+                    fil.write((band_block * self.bands) % tuple(values.ravel()))
+                    fil.write('\n')
+
+
+class Benchmark:
+    """
+    Time the stages of the app on synthetic calculations of increasing size
+    """
+
+    def __init__(self, grid, orbitals='lm', spin=1, species=2, repeat=1, memory=True):
+        """
+        Input:
+        --------------------------
+        grid: list
+            List of (kpoints, bands, ions)
+        orbitals: str
+            layout of the orbitals
+        spin: int
+            1 or 2
+        species: int
+            number of elements
+        repeat: int
+            number of runs of each stage, the fastest run is reported
+        memory: Boolean
+            If True, the peak memory of each stage is traced (in an extra run)
+        """
+        self.grid = grid
+        self.orbitals = orbitals
+        self.spin = spin
+        self.species = species
+        self.repeat = repeat
+        self.memory = memory
+
+
+    def run(self, foldername=None):
+        """
+        Run all cases of the grid
+        Input:
+        --------------------------
+        foldername: str
+            folder for the synthetic files; a temporary folder is used and removed if None
+        Output:
+        --------------------------
+        results: dictionary
+        """
+        temporary = foldername is None
+        foldername = tempfile.mkdtemp(prefix='procar_') if temporary else foldername
+
+        results = {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'orbitals': self.orbitals, 'spin': self.spin, 'species': self.species,
+            'cases': [],
+        }
+
+        try:
+            for kpoints, bands, ions in self.grid:
+                case = '{}/k{}_b{}_i{}'.format(foldername, kpoints, bands, ions)
+                synthetic = SyntheticCalculation(kpoints=kpoints, bands=bands, ions=ions, species=self.species,
+                    orbitals=self.orbitals, spin=self.spin)
+                sizes = synthetic.write(case)
+
+                results['cases'].append({'kpoints': kpoints, 'bands': bands, 'ions': ions,
+                    'PROCAR_band / MB': sizes['PROCAR_band'], 'PROCAR_DOS / MB': sizes['PROCAR_DOS'],
+                    'stages': self.run_case(case, kpoints, sizes['PROCAR_band'])})
+                print(self.text(results['cases'][-1]))
+
+        finally:
+            if temporary:
+                shutil.rmtree(foldername, ignore_errors=True)
+
+        return results
+
+
+    def stages(self, foldername):
+        """
+        Stages of the app as (name, function); the functions of later stages use the results of earlier stages
+        """
+        list_energy = ['-5', '5', '0.01']
+        state = {}
+
+        def parse():
+            with open(foldername + '/PROCAR_band') as fil:
+                state['Band'] = BS.Energy(fil.readlines())
+            state['Band'].get_energies()
+
+        def stream():
+            for data in BS.Energy(None).stream(foldername + '/PROCAR_band', 64.):
+                pass
+
+        def element_DOS():
+            with open(foldername + '/CONTCAR') as con:
+                state['Band'].element_DOS(con.readlines())
+
+        def sum_partial_DOS():
+            state['Band'].sum_partial_DOS(state['Band'].DOS_element_new, -5., 5., 0.01)
+
+        def get_contribution():
+            state['calc'] = BS.Calculation(foldername, list_energy)
+            state['calc'].get_contribution(state['Band'].energy, state['Band'].DOS_element_new)
+
+        def load():
+            state['calc'] = BS.Calculation(foldername, list_energy).load()
+
+        def plot_screen():
+            # the figure of the app with projected bands, projected DOS, and ticks
+            app = service_VASP.HeadlessFigure(service_VASP.normalize_settings({'dos': 'elements', 'projection': 'elements'}))
+            app.use_calculation(state['calc'])
+            state['figure'] = app.draw_figure()
+            FigureCanvasAgg(state['figure'])
+            state['figure'].canvas.draw()
+
+        def plot_save():
+            state['figure'].savefig(io.BytesIO(), format='png', dpi=300)
+
+        return [('parse PROCAR_band', parse), ('stream PROCAR_band', stream), ('element_DOS', element_DOS),
+            ('sum_partial_DOS', sum_partial_DOS), ('get_contribution', get_contribution), ('Calculation.load', load),
+            ('plot (screen)', plot_screen), ('plot (save 300 dpi)', plot_save)]
+
+
+    def run_case(self, foldername, kpoints, size):
+        """
+        Time each stage of one calculation
+        """
+        records = {}
+
+        for name, function in self.stages(foldername):
+            times = []
+            for r in range(self.repeat):
+                start = time.perf_counter()
+                function()
+                times.append(time.perf_counter() - start)
+
+            records[name] = {'time / s': min(times)}
+
+            if name in ['parse PROCAR_band', 'stream PROCAR_band']:
+                records[name]['MB/s'] = size / min(times)
+                records[name]['kpoints/s'] = kpoints / min(times)
+
+            if self.memory:
+                # the profiler keeps the largest peak over all calls of a stage
+                BS.profiler.clear()
+                BS.profiler.capture(memory=True)
+                with BS.profiler.stage(name):
+                    function()
+                records[name]['peak memory / MB'] = BS.profiler.stages[name]['peak memory / MB']
+                BS.profiler.capture()
+
+        return records
+
+
+    def text(self, case):
+        """
+        Table of the stages of one case
+        """
+        lines = ['kpoints {kpoints}, bands {bands}, ions {ions}, PROCAR_band {PROCAR_band / MB:.1f} MB'.format(**case)]
+        for name, record in case['stages'].items():
+            lines.append('  {:<22}{:>10.4f} s{:>12}{:>14}{:>12}'.format(name, record['time / s'],
+                '{:.1f} MB/s'.format(record['MB/s']) if 'MB/s' in record else '',
+                '{:.0f} kpts/s'.format(record['kpoints/s']) if 'kpoints/s' in record else '',
+                '{:.1f} MB'.format(record['peak memory / MB']) if 'peak memory / MB' in record else ''))
+
+        return '\n'.join(lines)
+
+
+def compare(old, new):
+    """
+    Ratio of the times of two benchmark files for the cases and stages in both files
+    """
+    with open(old) as fil:
+        old = json.load(fil)
+    with open(new) as fil:
+        new = json.load(fil)
+
+    cases = {(c['kpoints'], c['bands'], c['ions']): c['stages'] for c in old['cases']}
+
+    for case in new['cases']:
+        key = (case['kpoints'], case['bands'], case['ions'])
+        if key not in cases:
+            continue
+
+        print('kpoints {}, bands {}, ions {}'.format(*key))
+        for name, record in case['stages'].items():
+            if name in cases[key]:
+                print('  {:<22}{:>10.4f} s -> {:>10.4f} s   x{:.2f}'.format(name, cases[key][name]['time / s'],
+                    record['time / s'], cases[key][name]['time / s'] / record['time / s']))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the stages of the VASP Electronic Band Structure App')
+    parser.add_argument('--kpoints', type=int, nargs='+', default=[50, 200, 800])
+    parser.add_argument('--bands', type=int, nargs='+', default=[50, 200])
+    parser.add_argument('--ions', type=int, nargs='+', default=[10, 50])
+    parser.add_argument('--orbitals', default='lm', choices=sorted(SyntheticCalculation.orbital_layouts))
+    parser.add_argument('--spin', type=int, default=1, choices=[1, 2])
+    parser.add_argument('--species', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--no-memory', action='store_true', help='do not trace the peak memory')
+    parser.add_argument('--folder', default=None, help='keep the synthetic files in this folder')
+    parser.add_argument('--output', default='benchmark.json')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two benchmark files')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+
+    else:
+        grid = [(k, b, i) for k in args.kpoints for b in args.bands for i in args.ions]
+        results = Benchmark(grid, orbitals=args.orbitals, spin=args.spin, species=args.species, repeat=args.repeat,
+            memory=not args.no_memory).run(args.folder)
+
+        with open(args.output, 'w') as fil:
+            json.dump(results, fil, indent=2)
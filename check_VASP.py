@@ -0,0 +1,214 @@
+"""
+Checks of the numerical routines of the VASP Electronic Band Structure App against known values
+
+Usage:
+    python check_VASP.py
+"""
+
+import sys
+import tempfile
+
+import numpy as np
+
+import BandStructure_VASP as BS
+from benchmark_VASP import SyntheticCalculation
+
+
+class Checks:
+    """
+    Every method starting with check_ raises an AssertionError if a result is wrong
+    """
+
+    def __init__(self):
+        # the KPOINTS methods of MainApplication do not need the window
+        self.app = BS.MainApplication.__new__(BS.MainApplication)
+
+
+    def check_segment_lengths(self):
+        """
+        Segments of the face- and body-centred cubic paths have their textbook lengths in units of 2 pi / a
+        """
+        a = 5.
+        for crystal, points in [
+            ('Cubic, face-centered, cF', [([0, 0, 0], [0.5, 0, 0.5], 1.), ([0, 0, 0], [0.5, 0.5, 0.5], 3**0.5 / 2),
+                ([0.5, 0, 0.5], [0.5, 0.25, 0.75], 0.5)]),
+            ('Cubic, body-centered, cI', [([0, 0, 0], [0.5, -0.5, 0.5], 1.), ([0, 0, 0], [0, 0, 0.5], 2**0.5 / 2),
+                ([0, 0, 0], [0.25, 0.25, 0.25], 3**0.5 / 2)]),
+            ('Cubic, primitive, cP', [([0, 0, 0], [0, 0.5, 0], 0.5), ([0, 0, 0], [0.5, 0.5, 0.5], 3**0.5 / 2)])]:
+
+            reciprocal = self.app.reciprocal_lattice(crystal, a, a, a, 90, 90, 90)
+            for start, end, expected in points:
+                length = np.linalg.norm((np.array(end) - np.array(start)) @ reciprocal) / (2 * np.pi / a)
+                assert np.isclose(length, expected), '{} {} -> {}: {:.4f} instead of {:.4f}'.format(crystal, start, end,
+                    length, expected)
+
+
+    def check_point_counts(self):
+        """
+        The shortest segment gets the minimum number of points and the others the same density
+        """
+        Points = {'G': {'point': [0, 0, 0]}, 'X': {'point': [0.5, 0, 0.5]}, 'W': {'point': [0.5, 0.25, 0.75]}}
+        reciprocal = self.app.reciprocal_lattice('Cubic, face-centered, cF', 5., 5., 5., 90, 90, 90)
+        counts = self.app.point_counts([['G', 'X'], ['X', 'W']], Points, reciprocal, 10)
+
+        assert counts == [20, 10], 'point counts {} instead of [20, 10]'.format(counts)
+
+
+    def check_path_interpolation(self):
+        """
+        The kpoints of a segment which does not start at Gamma run from its first to its last high-symmetry point
+        """
+        Points = {'G': {'point': [0, 0, 0], 'Sym': '\\Gamma'}, 'X': {'point': [0.5, 0, 0.5], 'Sym': 'X'},
+            'W': {'point': [0.5, 0.25, 0.75], 'Sym': 'W'}}
+        text = self.app.create_list_points([['G', 'X'], ['X', 'W']], Points, [3, 5])
+        rows = [line.split() for line in text.splitlines() if line.strip() != '']
+        kpts = np.array([row[:3] for row in rows], dtype=float)
+
+        expected = np.concatenate([np.linspace([0, 0, 0], [0.5, 0, 0.5], 3), np.linspace([0.5, 0, 0.5], [0.5, 0.25, 0.75], 5)])
+        assert np.allclose(kpts, expected, atol=1e-8), 'kpoints of the path:\n{}'.format(kpts)
+        assert [row[4:] for row in rows if len(row) > 4] == [['\\Gamma'], ['X'], ['X'], ['W']], 'labels of the path'
+
+
+    def check_path_axis(self):
+        """
+        The k-axis of a synthetic calculation has its high-symmetry points at the Cartesian lengths of the segments
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            SyntheticCalculation(kpoints=60, bands=6, ions=2, mesh=2, lattice=5.).write(folder)
+            calc = BS.Calculation(folder, ['-3', '3', '0.05'])
+            calc.get_energies()
+            calc.get_kpoints()
+
+        segments = np.array([0.5, 0.5, 2**0.5 / 2, 3**0.5 / 2]) * 2 * np.pi / 5.
+        expected = np.concatenate(([0], np.cumsum(segments)))
+
+        assert np.isclose(calc.Band.kpath[-1], expected[-1], rtol=1e-3), 'path length {:.4f} instead of {:.4f}'.format(
+            calc.Band.kpath[-1], expected[-1])
+        assert np.allclose(calc.distance, expected / expected[-1], atol=1e-3), 'tick positions {}'.format(calc.distance)
+
+
+    def procar_loops(self, procar):
+        """
+        Arrays of a PROCAR file read line by line as in the first version of Energy.get_energies
+        """
+        header = procar[1].split()
+        Nmb_kpts, Nmb_bands, Nmb_ions = int(header[3]), int(header[7]), int(header[11])
+        Nmb_orb = len(procar[7].split()) - 2
+
+        data = {'coord': np.zeros((Nmb_kpts, 3)), 'weight': np.zeros(Nmb_kpts), 'energy': np.zeros((Nmb_bands, Nmb_kpts)),
+            'occ': np.zeros((Nmb_bands, Nmb_kpts)), 'totDOS': np.zeros((Nmb_bands, Nmb_kpts)),
+            'DOS_elements': np.zeros((Nmb_bands, Nmb_kpts, Nmb_ions)), 'DOS_orbitals': np.zeros((Nmb_bands, Nmb_kpts, Nmb_orb))}
+
+        for i in range(Nmb_kpts):
+            line = ((Nmb_ions + 5) * Nmb_bands + 5) * i + 3 - i * 2
+            for x in range(3):
+                data['coord'][i][x] = procar[line].split()[3 + x]
+            data['weight'][i] = procar[line].split()[8]
+
+            for j in range(Nmb_bands):
+                lines = (Nmb_ions + 5) * j + 2 + line
+                data['energy'][j][i] = procar[lines].split()[4]
+                data['occ'][j][i] = procar[lines].split()[7]
+                data['totDOS'][j][i] = procar[lines + 3 + Nmb_ions].split()[Nmb_orb + 1]
+                for k in range(Nmb_ions):
+                    data['DOS_elements'][j][i][k] = procar[lines + 3 + k].split()[-1]
+                for l in range(Nmb_orb):
+                    data['DOS_orbitals'][j][i][l] = procar[lines + 3 + Nmb_ions].split()[l + 1]
+
+        return data
+
+
+    def histogram_loops(self, energy, weight, values, minE, maxE, Eres):
+        """
+        DOS summed up step by step as in the first version of Energy.sum_partial_DOS
+        """
+        steps = int((maxE - minE) / Eres)
+        Energy_DOS = np.zeros(steps); DOS = np.zeros(steps)
+
+        for i in range(steps):
+            Energy_DOS[i] = minE + i * Eres + 0.001
+            for j in range(len(energy)):
+                for k in range(len(energy[0])):
+                    if Energy_DOS[i] - 0.5 * Eres < energy[j][k] < Energy_DOS[i] + 0.5 * Eres:
+                        DOS[i] += values[j][k] * weight[k]
+
+        return Energy_DOS, DOS
+
+
+    def check_parser(self):
+        """
+        parse_kpoints reads the same arrays as the line by line parser, also for ISPIN=2 and lm-decomposed files
+        """
+        for orbitals, spin in [('spd', 1), ('lm', 2)]:
+            with tempfile.TemporaryDirectory() as folder:
+                SyntheticCalculation(kpoints=12, bands=6, ions=3, orbitals=orbitals, spin=spin, mesh=2).write(folder)
+                with open(folder + '/PROCAR_band') as fil:
+                    procar = fil.readlines()
+
+            data = BS.Energy(procar)
+            data.get_energies()
+            for key, value in self.procar_loops(procar).items():
+                assert np.allclose(getattr(data, key), value), '{} of {}, ISPIN={}'.format(key, orbitals, spin)
+
+
+    def check_histogram(self):
+        """
+        The binned total and elemental DOS agree with the sum over every energy step
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            SyntheticCalculation(kpoints=12, bands=6, ions=4, species=2, mesh=3).write(folder)
+            with open(folder + '/PROCAR_DOS') as fil:
+                data = BS.Energy(fil.readlines())
+            with open(folder + '/CONTCAR') as fil:
+                contcar = fil.readlines()
+
+        data.get_energies()
+        data.element_DOS(contcar)
+        Energy_DOS, total = data.sum_partial_DOS(data.totDOS, -6., 6., 0.05)
+        elements = data.sum_partial_DOS(data.DOS_element_new, -6., 6., 0.05)[1]
+
+        reference = self.histogram_loops(data.energy, data.weight, data.totDOS, -6., 6., 0.05)
+        assert np.allclose(Energy_DOS, reference[0]) and np.allclose(total, reference[1]), 'total DOS'
+
+        first = np.asarray(data.DOS_elements)[:, :, :2].sum(axis=2)
+        assert np.allclose(elements[:, 0], self.histogram_loops(data.energy, data.weight, first, -6., 6., 0.05)[1]), 'elemental DOS'
+
+
+    def check_fermi_level(self):
+        """
+        With mirror-symmetric valence and conduction DOS the intrinsic chemical potential is at midgap at every
+        temperature, and a doped semiconductor stays neutral
+        """
+        Eres = 0.001
+        energy = np.arange(-3, 4, Eres) + 0.5 * Eres
+        DOS = np.sqrt(np.clip(-energy, 0, None)) + np.sqrt(np.clip(energy - 1, 0, None))
+        solver = BS.FermiLevel(energy, DOS * Eres, np.sum(DOS[energy < 0]) * Eres, 40., 0.5)
+
+        mu, n, p = solver.solve([100, 300, 1000], [0, 1e18])
+        assert np.allclose(mu[:, 0], 0.5, atol=1e-5), 'intrinsic chemical potential {}'.format(mu[:, 0])
+        assert np.allclose(n[:, 0], p[:, 0], rtol=1e-3), 'intrinsic carriers {} and {}'.format(n[:, 0], p[:, 0])
+        assert np.allclose(n[:, 1] - p[:, 1], 1e18, rtol=1e-3), 'net carriers {}'.format(n[:, 1] - p[:, 1])
+
+
+    def run(self):
+        """
+        Run all checks and print the result of each
+        Output:
+        --------------------------
+        failed: int
+            number of failed checks
+        """
+        failed = 0
+        for name in sorted([x for x in dir(self) if x.startswith('check_')]):
+            try:
+                getattr(self, name)()
+                print('ok      {}'.format(name))
+            except AssertionError as error:
+                failed += 1
+                print('FAILED  {}: {}'.format(name, error))
+
+        return failed
+
+
+if __name__ == "__main__":
+    sys.exit(1 if Checks().run() > 0 else 0)
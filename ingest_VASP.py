@@ -0,0 +1,451 @@
+"""
+Ingest finished VASP calculations into an SQLite index of electronic-structure descriptors
+
+Usage:
+    python ingest_VASP.py ingest /data/calculations --database calculations.sqlite --workers 8 --dos
+    python ingest_VASP.py query --database calculations.sqlite --where "gap > 1 and direct = 1 and CBM_element = 'Sn'" --order gap
+
+Every folder below the root which includes CONTCAR, KPOINTS, and PROCAR_band is parsed in a worker process;
+calculations whose fingerprint (path, size, and modification time of the VASP files) is unchanged are skipped.
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import BandStructure_VASP as BS
+
+
+schema = """
+CREATE TABLE IF NOT EXISTS calculations (
+    path TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, name TEXT, formula TEXT,
+    kpoints INTEGER, bands INTEGER, ions INTEGER,
+    gap REAL, direct_gap REAL, direct INTEGER, metal INTEGER, VBM REAL, CBM REAL,
+    VBM_kpoint TEXT, CBM_kpoint TEXT,
+    VBM_element TEXT, VBM_element_weight REAL, VBM_orbital TEXT, VBM_orbital_weight REAL,
+    CBM_element TEXT, CBM_element_weight REAL, CBM_orbital TEXT, CBM_orbital_weight REAL,
+    ingested REAL, seconds REAL, error TEXT
+);
+CREATE TABLE IF NOT EXISTS elements (
+    path TEXT NOT NULL REFERENCES calculations(path) ON DELETE CASCADE, element TEXT NOT NULL, ions INTEGER
+);
+CREATE TABLE IF NOT EXISTS dos (
+    path TEXT PRIMARY KEY REFERENCES calculations(path) ON DELETE CASCADE,
+    minE REAL, Eres REAL, steps INTEGER, channels TEXT, total BLOB, projected BLOB
+);
+CREATE INDEX IF NOT EXISTS calculations_gap ON calculations(gap);
+CREATE INDEX IF NOT EXISTS calculations_direct_gap ON calculations(direct, gap);
+CREATE INDEX IF NOT EXISTS calculations_VBM ON calculations(VBM);
+CREATE INDEX IF NOT EXISTS calculations_CBM ON calculations(CBM);
+CREATE INDEX IF NOT EXISTS calculations_VBM_character ON calculations(VBM_element, VBM_orbital);
+CREATE INDEX IF NOT EXISTS calculations_CBM_character ON calculations(CBM_element, CBM_orbital);
+CREATE INDEX IF NOT EXISTS calculations_formula ON calculations(formula);
+CREATE INDEX IF NOT EXISTS elements_element ON elements(element, path);
+CREATE INDEX IF NOT EXISTS elements_path ON elements(path);
+"""
+
+columns = ['path', 'fingerprint', 'name', 'formula', 'kpoints', 'bands', 'ions', 'gap', 'direct_gap', 'direct', 'metal', 'VBM',
+    'CBM', 'VBM_kpoint', 'CBM_kpoint', 'VBM_element', 'VBM_element_weight', 'VBM_orbital', 'VBM_orbital_weight', 'CBM_element',
+    'CBM_element_weight', 'CBM_orbital', 'CBM_orbital_weight', 'ingested', 'seconds', 'error']
+
+
+def find_calculations(root):
+    """
+    All folders below root which include the files of Calculation.required_files
+    """
+    folders = list()
+
+    for folder, subfolders, files in os.walk(root):
+        subfolders.sort()
+        if set(BS.Calculation.required_files).issubset(files):
+            folders.append(os.path.realpath(folder))
+
+    return folders
+
+
+def pack(array):
+    """
+    Compress a binned DOS as float32 for a BLOB column
+    """
+    return zlib.compress(np.ascontiguousarray(array, dtype=np.float32).tobytes())
+
+
+def unpack(blob, shape):
+    """
+    Binned DOS of a BLOB column written by pack
+    """
+    return np.frombuffer(zlib.decompress(blob), dtype=np.float32).reshape(shape)
+
+
+class Descriptors:
+    """
+    Band edges and their character of a loaded calculation
+    """
+
+    def __init__(self, calc, tolerance=1e-3):
+        """
+        Input:
+        --------------------------
+        calc: Calculation
+            calculation after get_energies, get_kpoints, and sum_DOS_elements
+        tolerance: float
+            a gap is direct if the smallest gap at one kpoint exceeds the band gap by less than tolerance in eV
+        """
+        self.calc = calc
+        self.tolerance = tolerance
+
+        # PROCAR_band and PROCAR_DOS are both searched; the k-path can pass points which are not on the DOS mesh
+        self.sources = [calc.Band] + ([calc.DOS] if calc.DOS is not calc.Band else [])
+
+
+    def edges(self):
+        """
+        Band gap, smallest direct gap, and positions of both band edges
+        Output:
+        --------------------------
+        gap, direct_gap: float
+            in eV (0 for metals)
+        VB, CB: tuple
+            (source, band, kpoint) of the valence band maximum and the conduction band minimum
+        """
+        energy = np.concatenate([np.asarray(data.energy, dtype=float) for data in self.sources], axis=1)
+        occupied = np.concatenate([np.asarray(data.occ) > 0.01 for data in self.sources], axis=1)
+        source = np.concatenate([np.full(len(data.weight), i) for i, data in enumerate(self.sources)])
+        local = np.concatenate([np.arange(len(data.weight)) for data in self.sources])
+
+        valence = np.where(occupied, energy, -np.inf)
+        conduction = np.where(occupied, np.inf, energy)
+        top, bottom = valence.max(axis=0), conduction.min(axis=0)
+
+        # the same kpoint can be part of both files, so the direct gap is taken per distinct coordinate
+        coord = np.concatenate([np.asarray(data.coord, dtype=float) for data in self.sources])
+        distinct, inverse = np.unique(np.round(coord, 5), axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        top_k, bottom_k = np.full(len(distinct), -np.inf), np.full(len(distinct), np.inf)
+        np.maximum.at(top_k, inverse, top)
+        np.minimum.at(bottom_k, inverse, bottom)
+        direct_gap = np.min(bottom_k - top_k)
+
+        k_VB, k_CB = int(np.argmax(top)), int(np.argmin(bottom))
+        VB = (self.sources[source[k_VB]], int(np.argmax(valence[:, k_VB])), int(local[k_VB]))
+        CB = (self.sources[source[k_CB]], int(np.argmin(conduction[:, k_CB])), int(local[k_CB]))
+        gap = max(bottom[k_CB] - top[k_VB], 0.)
+
+        return gap, max(direct_gap, 0.), VB, CB
+
+
+    def character(self, edge):
+        """
+        Dominant element (projection group) and orbital of one band edge
+        Output:
+        --------------------------
+        element, element_weight, orbital, orbital_weight: str, float, str, float
+            names and their fractions of the projections
+        """
+        data, band, k = edge
+        elements = np.asarray(data.DOS_element_new[band, k], dtype=float)
+
+        # lm-decomposed orbitals (px, dxy, ...) are summed up to s, p, d, f
+        letters = [name[0] for name in data.orbitals]
+        names = list(dict.fromkeys(letters))
+        orbitals = np.zeros(len(names))
+        np.add.at(orbitals, [names.index(x) for x in letters], np.asarray(data.DOS_orbitals[band, k], dtype=float))
+
+        result = list()
+        for values, labels in [(elements, self.calc.cmp), (orbitals, names)]:
+            total = values.sum()
+            i = int(np.argmax(values))
+            result += [labels[i], float(values[i] / total) if total > 0 else 0.]
+
+        return result
+
+
+    def kpoint(self, edge):
+        data, band, k = edge
+        return ' '.join('{:.6f}'.format(x) for x in np.asarray(data.coord)[k])
+
+
+    def row(self):
+        """
+        Descriptors as a dictionary of the columns of the calculations table
+        """
+        calc = self.calc
+        gap, direct_gap, VB, CB = self.edges()
+        counts = [len(ions) for ions in calc.species_ions]
+
+        row = {
+            'name': calc.name, 'formula': ''.join('{}{}'.format(s, n if n > 1 else '') for s, n in zip(calc.species, counts)),
+            'kpoints': len(calc.Band.weight),
+            'bands': int(np.shape(calc.Band.energy)[0]), 'ions': int(sum(counts)),
+            'gap': gap, 'direct_gap': direct_gap, 'metal': int(gap == 0),
+            'direct': int(gap > 0 and direct_gap - gap < self.tolerance),
+            'VBM': float(calc.VBM + VB[0].energy[VB[1], VB[2]]), 'CBM': float(calc.VBM + CB[0].energy[CB[1], CB[2]]),
+            'VBM_kpoint': self.kpoint(VB), 'CBM_kpoint': self.kpoint(CB),
+        }
+
+        for prefix, edge in [('VBM', VB), ('CBM', CB)]:
+            values = self.character(edge)
+            for key, value in zip(['element', 'element_weight', 'orbital', 'orbital_weight'], values):
+                row['{}_{}'.format(prefix, key)] = value
+
+        return row
+
+
+def describe(foldername, key, list_energy=None):
+    """
+    Parse one calculation and compute its descriptors (runs in a worker process)
+    Input:
+    --------------------------
+    foldername: str
+        folder of the calculation
+    key: str
+        fingerprint of the calculation
+    list_energy: list, shape (3)
+        minimum energy, maximum energy, and resolution in eV of the binned DOS; no DOS is stored if None
+    Output:
+    --------------------------
+    row: dictionary
+        columns of the calculations table, and 'species' and 'dos' for the other tables
+    """
+    start = time.perf_counter()
+    row = {'path': foldername, 'fingerprint': key, 'name': os.path.basename(foldername)}
+
+    try:
+        calc = BS.Calculation(foldername, [str(x) for x in list_energy or [-5, 5, 0.05]])
+        calc.get_energies()
+        calc.get_kpoints()
+        calc.sum_DOS_elements()
+
+        row.update(Descriptors(calc).row())
+        row['species'] = [(s, len(ions)) for s, ions in zip(calc.species, calc.species_ions)]
+
+        if list_energy is not None:
+            calc.sum_DOS()
+            row['dos'] = {
+                'minE': float(list_energy[0]), 'Eres': float(list_energy[2]), 'steps': len(calc.Energy_DOS),
+                'channels': ' '.join(calc.cmp), 'total': pack(calc.DOS.totDOS_DOS), 'projected': pack(calc.partial_DOS),
+            }
+
+    except Exception as error:
+        row['error'] = '{}: {}'.format(type(error).__name__, error)
+
+    row['ingested'] = time.time()
+    row['seconds'] = time.perf_counter() - start
+
+    return row
+
+
+class Index:
+    """
+    SQLite database of the descriptors of many calculations
+    """
+
+    def __init__(self, database):
+        """
+        Input:
+        --------------------------
+        database: str
+            SQLite file, created if it does not exist
+        """
+        self.connection = sqlite3.connect(database)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.executescript(schema)
+
+
+    def fingerprints(self):
+        """
+        Fingerprint of each ingested calculation
+        """
+        return dict(self.connection.execute('SELECT path, fingerprint FROM calculations'))
+
+
+    def write(self, row):
+        """
+        Insert or replace the descriptors, elements, and binned DOS of one calculation
+        """
+        with self.connection:
+            self.connection.execute('DELETE FROM calculations WHERE path = ?', (row['path'],))
+            self.connection.execute('INSERT INTO calculations ({}) VALUES ({})'.format(', '.join(columns), ', '.join('?' * len(columns))),
+                [row.get(key) for key in columns])
+            self.connection.executemany('INSERT INTO elements (path, element, ions) VALUES (?, ?, ?)',
+                [(row['path'], s, n) for s, n in row.get('species', [])])
+
+            if 'dos' in row:
+                dos = row['dos']
+                self.connection.execute('INSERT INTO dos (path, minE, Eres, steps, channels, total, projected) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (row['path'], dos['minE'], dos['Eres'], dos['steps'], dos['channels'], dos['total'], dos['projected']))
+
+
+    def remove(self, paths):
+        """
+        Remove calculations which do not exist anymore
+        """
+        with self.connection:
+            self.connection.executemany('DELETE FROM calculations WHERE path = ?', [(p,) for p in paths])
+
+
+    def ingest(self, root, workers=None, list_energy=None, prune=False, retry=False, progress=None):
+        """
+        Parse all new or changed calculations below root in parallel and write their descriptors
+        Input:
+        --------------------------
+        root: str
+            folder which is searched for calculations
+        workers: int
+            number of worker processes (default is the number of processors)
+        list_energy: list, shape (3)
+            energy range and resolution of the binned DOS blobs; no DOS is stored if None
+        prune: Boolean
+            If True, calculations below root which do not exist anymore are removed
+        retry: Boolean
+            If True, calculations which failed before are parsed again even if they are unchanged
+        progress: function
+            called with (number done, number to parse, row) after each calculation
+        Output:
+        --------------------------
+        summary: dictionary
+            numbers of found, skipped, ingested, failed, vanished (removed during the walk), and removed calculations
+        """
+        root = os.path.realpath(os.path.expanduser(root))
+        folders = find_calculations(root)
+        known = self.fingerprints()
+        failed = {row['path'] for row in self.connection.execute('SELECT path FROM calculations WHERE error IS NOT NULL')}
+
+        summary = {'found': len(folders), 'skipped': 0, 'ingested': 0, 'failed': 0, 'vanished': 0, 'removed': 0}
+        todo = list(); found = set()
+        for folder in folders:
+            try:
+                key = BS.fingerprint(folder)
+            except (OSError, ValueError):
+                summary['vanished'] += 1
+                continue
+
+            found.add(folder)
+            if known.get(folder) == key and not (retry and folder in failed):
+                summary['skipped'] += 1
+            else:
+                todo.append((folder, key))
+
+        if prune:
+            missing = [p for p in known if os.path.commonpath([root, p]) == root and p not in found]
+            self.remove(missing)
+            summary['removed'] = len(missing)
+
+        if todo:
+            with ProcessPoolExecutor(workers) as pool:
+                futures = [pool.submit(describe, folder, key, list_energy) for folder, key in todo]
+
+                for done, future in enumerate(as_completed(futures), 1):
+                    row = future.result()
+                    self.write(row)
+                    summary['failed' if row.get('error') else 'ingested'] += 1
+
+                    if progress is not None:
+                        progress(done, len(todo), row)
+
+        return summary
+
+
+    def query(self, where='1', parameters=(), order='path', limit=None, element=None):
+        """
+        Select calculations
+        Input:
+        --------------------------
+        where: str
+            SQL condition on the columns of the calculations table, e.g. 'gap > 1 AND direct = 1'
+        parameters: tuple
+            values of the ? placeholders of where
+        order: str
+            column to sort by
+        limit: int
+            maximum number of calculations
+        element: str
+            only calculations which include this element
+        Output:
+        --------------------------
+        rows: list of sqlite3.Row
+        """
+        sql = 'SELECT * FROM calculations WHERE ({})'.format(where)
+        if element is not None:
+            sql += ' AND path IN (SELECT path FROM elements WHERE element = ?)'
+            parameters = tuple(parameters) + (element,)
+        sql += ' ORDER BY {}'.format(order)
+        if limit is not None:
+            sql += ' LIMIT {}'.format(int(limit))
+
+        return self.connection.execute(sql, parameters).fetchall()
+
+
+    def dos(self, path):
+        """
+        Binned DOS of one calculation
+        Output:
+        --------------------------
+        Energy_DOS: ndarray, shape (S)
+        total: ndarray, shape (S)
+        projected: ndarray, shape (C, S)
+        channels: list, shape (C)
+        """
+        row = self.connection.execute('SELECT * FROM dos WHERE path = ?', (path,)).fetchone()
+        if row is None:
+            raise KeyError('{} has no binned DOS'.format(path))
+
+        channels = row['channels'].split()
+        Energy_DOS = row['minE'] + np.arange(row['steps']) * row['Eres'] + 0.001
+
+        return Energy_DOS, unpack(row['total'], (row['steps'],)), unpack(row['projected'], (len(channels), row['steps'])), channels
+
+
+    def close(self):
+        self.connection.close()
+
+
+def print_progress(done, total, row):
+    status = row['error'] if row.get('error') else 'gap {:.3f} eV'.format(row['gap'])
+    print('[{}/{}] {} ({:.1f} s): {}'.format(done, total, row['path'], row['seconds'], status))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Index of electronic-structure descriptors of VASP calculations')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest', help='parse new or changed calculations below a folder')
+    ingest.add_argument('root')
+    ingest.add_argument('--database', default='calculations.sqlite')
+    ingest.add_argument('--workers', type=int, default=None)
+    ingest.add_argument('--dos', action='store_true', help='store the binned total and projected DOS')
+    ingest.add_argument('--energy', type=float, nargs=3, default=[-10., 10., 0.05], metavar=('MIN', 'MAX', 'RES'),
+        help='energy range and resolution of the binned DOS in eV')
+    ingest.add_argument('--prune', action='store_true', help='remove calculations which do not exist anymore')
+    ingest.add_argument('--retry', action='store_true', help='parse failed calculations again')
+
+    query = commands.add_parser('query', help='select calculations')
+    query.add_argument('--database', default='calculations.sqlite')
+    query.add_argument('--where', default='1')
+    query.add_argument('--element', default=None)
+    query.add_argument('--order', default='path')
+    query.add_argument('--limit', type=int, default=None)
+    args = parser.parse_args()
+
+    index = Index(args.database)
+
+    if args.command == 'ingest':
+        summary = index.ingest(args.root, args.workers, args.energy if args.dos else None, args.prune, args.retry, print_progress)
+        print(', '.join('{} {}'.format(value, key) for key, value in summary.items()))
+
+    else:
+        print('\t'.join(['path', 'formula', 'gap', 'direct', 'VBM', 'CBM', 'VBM character', 'CBM character']))
+        for row in index.query(args.where, order=args.order, limit=args.limit, element=args.element):
+            if row['error']:
+                continue
+            print('\t'.join([row['path'], row['formula'], '{:.3f}'.format(row['gap']), 'direct' if row['direct'] else 'indirect',
+                '{:.3f}'.format(row['VBM']), '{:.3f}'.format(row['CBM']), '{} {}'.format(row['VBM_element'], row['VBM_orbital']),
+                '{} {}'.format(row['CBM_element'], row['CBM_orbital'])]))
+
+    index.close()
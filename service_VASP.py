@@ -0,0 +1,378 @@
+"""
+Local HTTP/JSON service which renders electronic band structures without the graphical user interface
+
+Usage:
+    python service_VASP.py --port 8765 --workers 4 --cache ~/.bandstructure_cache --root /data/calculations
+
+Requests:
+    GET  /render?path=/data/calculations/Ag2SnLi&projection=elements&format=png&dpi=150
+    POST /render  {"path": "/data/calculations/Ag2SnLi", "settings": {"minE": -3, "maxE": 3, "dos": "orbitals"}}
+    GET  /stats   counters of requests, cache hits, renders, queue depth, and throughput
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import BandStructure_VASP as BS
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+
+content_types = {'png': 'image/png', 'svg': 'image/svg+xml', 'pdf': 'application/pdf'}
+
+default_request = {
+    'minE': -5., 'maxE': 5., 'Eres': 0.05, 'ymax': 2., 'dos': 'total', 'projection': 'none',
+    'format': 'png', 'dpi': 100, 'width': 12., 'height': 8.,
+}
+
+
+class Value:
+    """
+    Stand-in for the Tkinter variables and entries of MainApplication
+    """
+
+    def __init__(self, value=None):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+    get_name = get
+    set_name = set
+
+    @property
+    def var(self):
+        return self
+
+
+class HeadlessFigure(BS.MainApplication):
+    """
+    Draw the figure of MainApplication from a settings dictionary instead of the window
+    """
+
+    def __init__(self, settings):
+        """
+        Input:
+        --------------------------
+        settings: dictionary
+            output of normalize_settings
+        """
+        for name in self.figure_variables:
+            setattr(self, name, Value())
+
+        self.font_options = [settings['font']]
+        self.color_2plot_options = [settings['color_2plot']]
+        self.apply_settings(settings)
+
+        self.minE.set(settings['minE']); self.maxE.set(settings['maxE']); self.Eres.set(settings['Eres'])
+        self.ymax.set(settings['ymax'])
+        self.pDOS.set({'total': 1, 'elements': 2, 'orbitals': 3}[settings['dos']])
+        self.pDOS_E_var.set(settings['projection'] == 'elements')
+        self.pDOS_O_var.set(settings['projection'] == 'orbitals')
+        self.settings = settings
+
+
+    def render(self, calc):
+        """
+        Render the figure of a calculation
+        Output:
+        --------------------------
+        image: bytes
+        """
+        self.use_calculation(calc)
+
+        fig = self.draw_figure()
+        FigureCanvasAgg(fig)
+        fig.set_size_inches(self.settings['width'], self.settings['height'])
+
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=self.settings['format'], dpi=self.settings['dpi'])
+
+        return buffer.getvalue()
+
+
+def normalize_settings(settings):
+    """
+    Complete the settings of a request with the defaults and convert the values to the types of the defaults
+    """
+    defaults = dict(BS.MainApplication.default_settings, **default_request)
+    result = {}
+
+    for key, default in defaults.items():
+        value = settings.get(key, default)
+
+        if isinstance(default, bool):
+            value = value if isinstance(value, bool) else str(value).lower() in ['1', 'true', 'yes']
+        elif isinstance(default, (int, float)):
+            value = type(default)(float(value))
+        elif isinstance(default, list):
+            value = [float(x) for x in value]
+        else:
+            value = str(value)
+
+        result[key] = value
+
+    if result['format'] not in content_types:
+        raise ValueError('Unknown format {}'.format(result['format']))
+    if result['dos'] not in ['total', 'elements', 'orbitals'] or result['projection'] not in ['none', 'elements', 'orbitals']:
+        raise ValueError('dos must be total, elements, or orbitals and projection none, elements, or orbitals')
+
+    return result
+
+
+def cached_calculation(foldername, list_energy, cache):
+    """
+    Load a calculation from the array cache (a session folder) or parse it and add it to the cache
+    """
+    key = hashlib.sha256('{} {}'.format(BS.fingerprint(foldername), list_energy).encode()).hexdigest()
+    session = os.path.join(cache, 'arrays', key)
+
+    if os.path.isfile(os.path.join(session, 'session.json')):
+        return BS.load_session(session)[0]
+
+    calc = BS.Calculation(foldername, [str(x) for x in list_energy]).load()
+
+    temporary = tempfile.mkdtemp(dir=os.path.join(cache, 'arrays'))
+    with open(os.path.join(temporary, 'session.json'), 'w') as fil:
+        json.dump({'calculation': calc.save(temporary)}, fil)
+
+    try:
+        os.replace(temporary, session)
+    except OSError:
+        shutil.rmtree(temporary, ignore_errors=True)
+
+    return calc
+
+
+def render_to_file(foldername, settings, filename, cache):
+    """
+    Render a figure into the image cache (runs in a worker process)
+    Output:
+    --------------------------
+    seconds: float
+        time of the rendering including the parsing
+    """
+    start = time.perf_counter()
+
+    calc = cached_calculation(foldername, [settings['minE'], settings['maxE'], settings['Eres']], cache)
+    image = HeadlessFigure(settings).render(calc)
+
+    temporary = '{}.{}.tmp'.format(filename, os.getpid())
+    with open(temporary, 'wb') as fil:
+        fil.write(image)
+    os.replace(temporary, filename)
+
+    return time.perf_counter() - start
+
+
+class RenderService:
+    """
+    Dispatch renderings to a process pool; images and parsed arrays are cached by the fingerprint of the calculation
+    """
+
+    def __init__(self, cache, workers=None, root=None):
+        """
+        Input:
+        --------------------------
+        cache: str
+            cache folder
+        workers: int
+            number of worker processes (default is the number of processors)
+        root: str
+            only calculations below this folder are rendered if given
+        """
+        self.cache = os.path.expanduser(cache)
+        self.root = os.path.realpath(root) if root else None
+        os.makedirs(os.path.join(self.cache, 'images'), exist_ok=True)
+        os.makedirs(os.path.join(self.cache, 'arrays'), exist_ok=True)
+
+        self.pool = ProcessPoolExecutor(workers)
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.counters = {'requests': 0, 'cache hits': 0, 'cache misses': 0, 'shared': 0, 'renders': 0, 'errors': 0,
+            'render time / s': 0.}
+
+
+    def count(self, key, value=1):
+        with self.lock:
+            self.counters[key] += value
+
+
+    def request(self, foldername, settings):
+        """
+        Image of a calculation
+        Output:
+        --------------------------
+        image: bytes
+        content_type: str
+        cache: str
+            'hit' if the image was cached, 'shared' if an identical request was rendering, 'miss' otherwise
+        """
+        self.count('requests')
+
+        foldername = os.path.realpath(os.path.expanduser(foldername))
+        if self.root is not None and os.path.commonpath([self.root, foldername]) != self.root:
+            raise PermissionError('{} is not below {}'.format(foldername, self.root))
+
+        settings = normalize_settings(settings)
+        key = hashlib.sha256(json.dumps({'calculation': BS.fingerprint(foldername), 'settings': settings},
+            sort_keys=True).encode()).hexdigest()
+        filename = os.path.join(self.cache, 'images', '{}.{}'.format(key, settings['format']))
+
+        if os.path.isfile(filename):
+            self.count('cache hits')
+            status = 'hit'
+
+        else:
+            with self.lock:
+                future = self.pending.get(key)
+                status = 'shared' if future is not None else 'miss'
+                self.counters['shared' if future is not None else 'cache misses'] += 1
+
+                if future is None:
+                    future = self.pool.submit(render_to_file, foldername, settings, filename, self.cache)
+                    self.pending[key] = future
+                    future.add_done_callback(lambda f: self.finished(key, f))
+
+            future.result()
+
+        with open(filename, 'rb') as fil:
+            return fil.read(), content_types[settings['format']], status
+
+
+    def finished(self, key, future):
+        """
+        Update the counters after a rendering
+        """
+        with self.lock:
+            self.pending.pop(key, None)
+            if future.exception() is not None:
+                self.counters['errors'] += 1
+            else:
+                self.counters['renders'] += 1
+                self.counters['render time / s'] += future.result()
+
+
+    def stats(self):
+        """
+        Counters for monitoring
+        """
+        with self.lock:
+            stats = dict(self.counters)
+            futures = list(self.pending.values())
+
+        uptime = time.time() - self.started
+        stats['queue depth'] = sum(not f.running() and not f.done() for f in futures)
+        stats['rendering'] = sum(f.running() for f in futures)
+        stats['uptime / s'] = uptime
+        stats['renders per minute'] = 60 * stats['renders'] / uptime
+        stats['mean render time / s'] = stats['render time / s'] / stats['renders'] if stats['renders'] else 0.
+        stats['cache hit ratio'] = stats['cache hits'] / stats['requests'] if stats['requests'] else 0.
+
+        return stats
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP requests of the render service; the service is an attribute of the server
+    """
+
+    def send_json(self, data, status=200):
+        body = json.dumps(data, indent=1).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+    def render(self, foldername, settings):
+        try:
+            image, content_type, status = self.server.service.request(foldername, settings)
+        except (ValueError, PermissionError, OSError) as error:
+            self.send_json({'error': str(error)}, status=400)
+            return
+        except Exception as error:
+            self.send_json({'error': str(error)}, status=500)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(image)))
+        self.send_header('X-Cache', status)
+        self.end_headers()
+        self.wfile.write(image)
+
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: value[-1] for key, value in parse_qs(url.query).items()}
+
+        if url.path == '/render' and 'path' in query:
+            self.render(query.pop('path'), query)
+        elif url.path == '/stats':
+            self.send_json(self.server.service.stats())
+        elif url.path == '/health':
+            self.send_json({'status': 'ok'})
+        else:
+            self.send_json({'error': 'unknown request'}, status=404)
+
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/render':
+            self.send_json({'error': 'unknown request'}, status=404)
+            return
+
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        except ValueError:
+            self.send_json({'error': 'request is not JSON'}, status=400)
+            return
+
+        if 'path' not in request:
+            self.send_json({'error': 'path is missing'}, status=400)
+            return
+
+        self.render(request['path'], request.get('settings', {}))
+
+
+def serve(host='127.0.0.1', port=8765, cache='~/.bandstructure_cache', workers=None, root=None):
+    """
+    Run the render service until it is interrupted
+    """
+    server = ThreadingHTTPServer((host, port), RequestHandler)
+    server.service = RenderService(cache, workers=workers, root=root)
+    print('Serving band structures on http://{}:{}'.format(host, port))
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.pool.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Render electronic band structures on request')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cache', default='~/.bandstructure_cache')
+    parser.add_argument('--root', default=None, help='only render calculations below this folder')
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.cache, args.workers, args.root)